@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for the PBIXRay MCP server
+
+Spawns the server (src/pbixray_server.py) over stdio, loads a PBIX file and
+replays a weighted mix of tool calls with a target number of calls in
+flight. Reports throughput and p50/p95/p99 latency per tool, including the
+cold (fresh server process) and warm (same file loaded again) times of
+load_pbix_file.
+
+Usage:
+    python benchmarks/load_test.py --file "demo/AdventureWorks Sales.pbix"
+    python benchmarks/load_test.py --file model.pbix --concurrency 16 --requests 2000 \\
+        --mix get_table_contents=5 count_rows=2 get_schema=1 --server-args="--response-cache-size 0"
+    python benchmarks/load_test.py --file model.pbix --mix-file mix.json --output results.json
+
+A mix file is a JSON list of {"tool": name, "arguments": {...}, "weight": n}. String
+arguments may contain {table} (a random table of the model) and {page} (a random page
+between 1 and --max-page).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shlex
+import sys
+import time
+from collections import defaultdict
+
+from mcp import StdioServerParameters
+from mcp.client.session import ClientSession
+from mcp.client.stdio import stdio_client
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_PATH = os.path.join(REPO_ROOT, "src", "pbixray_server.py")
+
+# Default mix: mostly table reads, with metadata lookups and summaries
+DEFAULT_MIX = [
+    {"tool": "get_table_contents", "arguments": {"table_name": "{table}", "page": "{page}"}, "weight": 4},
+    {"tool": "count_rows", "arguments": {"table_name": "{table}"}, "weight": 2},
+    {"tool": "get_schema", "arguments": {"table_name": "{table}"}, "weight": 2},
+    {"tool": "get_tables", "arguments": {}, "weight": 1},
+    {"tool": "get_dax_measures", "arguments": {}, "weight": 1},
+    {"tool": "get_relationships", "arguments": {}, "weight": 1},
+    {"tool": "get_statistics", "arguments": {"table_name": "{table}"}, "weight": 1},
+    {"tool": "get_model_summary", "arguments": {}, "weight": 1},
+]
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def parse_mix(entries):
+    """
+    Parse "tool=weight" entries into a mix. Known tools get the arguments of the default mix.
+
+    Returns:
+        A list of {"tool", "arguments", "weight"} entries
+    """
+    defaults = {entry["tool"]: entry["arguments"] for entry in DEFAULT_MIX}
+    mix = []
+    for entry in entries:
+        tool, _, weight = entry.partition("=")
+        mix.append({"tool": tool, "arguments": defaults.get(tool, {}), "weight": float(weight or 1)})
+    return mix
+
+
+def render_arguments(arguments, tables, max_page, rng):
+    """Replace the {table} and {page} placeholders of call arguments."""
+    table = rng.choice(tables) if tables else ""
+    rendered = {}
+    for name, value in arguments.items():
+        if value == "{page}":
+            rendered[name] = rng.randint(1, max_page)
+        elif isinstance(value, str):
+            rendered[name] = value.replace("{table}", table)
+        else:
+            rendered[name] = value
+    return rendered
+
+
+def response_text(result):
+    return "".join(content.text for content in result.content if getattr(content, "text", None))
+
+
+class LatencyRecorder:
+    """Latencies and errors of calls, grouped by label."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, label, latency, error):
+        self.latencies[label].append(latency)
+        if error:
+            self.errors[label] += 1
+
+    def summary(self, elapsed=None):
+        summary = {}
+        for label, latencies in sorted(self.latencies.items()):
+            summary[label] = {
+                "calls": len(latencies),
+                "errors": self.errors[label],
+                "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else None,
+                "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "max_ms": round(max(latencies) * 1000, 2),
+            }
+        return summary
+
+
+async def timed_call(session, recorder, label, tool, arguments):
+    started = time.perf_counter()
+    error = True
+    try:
+        result = await session.call_tool(tool, arguments)
+        error = bool(result.isError) or response_text(result).startswith("Error")
+        return result
+    finally:
+        recorder.record(label, time.perf_counter() - started, error)
+
+
+def server_parameters(server_args):
+    return StdioServerParameters(command=sys.executable, args=[SERVER_PATH, *server_args], env=None)
+
+
+async def cold_load(server_args, file_path, recorder, errlog):
+    """Start a fresh server and time its startup and first load."""
+    started = time.perf_counter()
+    async with stdio_client(server_parameters(server_args), errlog=errlog) as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            recorder.record("server_startup", time.perf_counter() - started, False)
+            await timed_call(session, recorder, "load_pbix_file (cold)", "load_pbix_file", {"file_path": file_path})
+
+
+async def discover_tables(session):
+    result = await session.call_tool("get_tables", {})
+    try:
+        tables = json.loads(response_text(result))
+    except json.JSONDecodeError:
+        return []
+    return tables if isinstance(tables, list) else []
+
+
+async def run_load_test(args, mix, errlog):
+    recorder = LatencyRecorder()
+    rng = random.Random(args.seed)
+    server_args = shlex.split(args.server_args)
+    file_path = os.path.abspath(os.path.expanduser(args.file)) if args.file else None
+
+    started = time.perf_counter()
+    async with stdio_client(server_parameters(server_args), errlog=errlog) as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            recorder.record("server_startup", time.perf_counter() - started, False)
+
+            tables = []
+            if file_path:
+                load = {"file_path": file_path}
+                result = await timed_call(session, recorder, "load_pbix_file (cold)", "load_pbix_file", load)
+                if result.isError or response_text(result).startswith("Error"):
+                    raise RuntimeError(f"Could not load {file_path}: {response_text(result)}")
+                for _ in range(args.warm_loads):
+                    await timed_call(session, recorder, "load_pbix_file (warm)", "load_pbix_file", load)
+                tables = args.tables or await discover_tables(session)
+
+            # Replay the mix with a fixed number of calls in flight
+            calls = rng.choices(mix, weights=[entry["weight"] for entry in mix], k=args.requests)
+            queue = asyncio.Queue()
+            for entry in calls:
+                queue.put_nowait((entry["tool"], render_arguments(entry["arguments"], tables, args.max_page, rng)))
+            mix_recorder = LatencyRecorder()
+
+            async def worker():
+                while not queue.empty():
+                    tool, arguments = queue.get_nowait()
+                    try:
+                        await timed_call(session, mix_recorder, tool, tool, arguments)
+                    except Exception as e:
+                        print(f"Call to {tool} failed: {e}", file=sys.stderr)
+
+            mix_started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - mix_started
+
+    # Extra cold samples, each from a fresh server process
+    if file_path:
+        for _ in range(args.cold_loads - 1):
+            await cold_load(server_args, file_path, recorder, errlog)
+
+    completed = sum(len(latencies) for latencies in mix_recorder.latencies.values())
+    return {
+        "config": {
+            "file": file_path,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "server_args": server_args,
+            "mix": mix,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(completed / elapsed, 2) if elapsed else None,
+        "errors": sum(mix_recorder.errors.values()),
+        "load": recorder.summary(),
+        "tools": mix_recorder.summary(elapsed),
+    }
+
+
+def print_report(report):
+    print(f"\n{'call':<28} {'calls':>6} {'errors':>6} {'per s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for section in ("load", "tools"):
+        for label, stats in report[section].items():
+            throughput = "" if stats["throughput_per_s"] is None else f"{stats['throughput_per_s']:.1f}"
+            print(
+                f"{label:<28} {stats['calls']:>6} {stats['errors']:>6} {throughput:>8} "
+                f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}"
+            )
+    print(
+        f"\n{sum(stats['calls'] for stats in report['tools'].values())} calls in {report['elapsed_s']}s "
+        f"at concurrency {report['config']['concurrency']}: {report['throughput_per_s']} calls/s, {report['errors']} errors"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the PBIXRay MCP server over stdio")
+    parser.add_argument("--file", help="PBIX file to load (without it, the mix runs with no model loaded)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Calls in flight (default: 8)")
+    parser.add_argument("--requests", type=int, default=500, help="Number of calls in the mix (default: 500)")
+    parser.add_argument("--mix", nargs="+", help="Tool mix as tool=weight entries (default: a read-heavy mix)")
+    parser.add_argument("--mix-file", help="JSON file with the tool mix")
+    parser.add_argument("--tables", nargs="+", help="Tables used for {table} (default: every table of the model)")
+    parser.add_argument("--max-page", type=int, default=10, help="Highest page used for {page} (default: 10)")
+    parser.add_argument("--warm-loads", type=int, default=3, help="Times the file is loaded again (default: 3)")
+    parser.add_argument("--cold-loads", type=int, default=1, help="Server processes started for cold loads (default: 1)")
+    parser.add_argument("--server-args", default="", help='Extra server options, e.g. "--max-rows 100"')
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the call sequence")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the server logs")
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1 or args.requests < 1:
+        parser.error("--concurrency and --requests must be 1 or greater")
+    if args.mix_file:
+        with open(args.mix_file, encoding="utf-8") as f:
+            mix = json.load(f)
+    elif args.mix:
+        mix = parse_mix(args.mix)
+    else:
+        mix = DEFAULT_MIX
+
+    # Server logs go to stderr only when asked for
+    with open(os.devnull, "w") as devnull:
+        report = asyncio.run(run_load_test(args, mix, sys.stderr if args.verbose else devnull))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
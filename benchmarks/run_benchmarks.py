@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the PBIXRay MCP server
+
+Runs the server tools against a synthetic model (see synthetic_model.py) and
+reports the median and minimum time of each scenario. Results are compared
+with a baseline file, and the run fails when a scenario is slower than the
+baseline by more than the regression threshold.
+
+Usage:
+    python benchmarks/run_benchmarks.py                       # compare with benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --save-baseline       # record a new baseline
+    python benchmarks/run_benchmarks.py --rows 20000000 --scenario filtered_page
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+
+# Slowdowns smaller than this many seconds are noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.002
+
+
+class BenchmarkContext:
+    """Minimal MCP context for calling tools directly."""
+
+    async def info(self, message):
+        pass
+
+    async def error(self, message):
+        pass
+
+    async def report_progress(self, progress, total):
+        pass
+
+
+def define_scenarios(server, model):
+    """
+    Build the benchmark scenarios.
+
+    Returns:
+        A dict of scenario name to (group, zero-argument callable returning the tool response
+        or a coroutine of it)
+    """
+    ctx = BenchmarkContext()
+    last_page = (model.fact_rows + server.PAGE_SIZE - 1) // server.PAGE_SIZE
+
+    async def page_through():
+        for page in range(1, 11):
+            response = await server.get_table_contents(ctx, table_name="Sales", page=page)
+        return response
+
+    return {
+        # Paging through the fact table
+        "first_page": ("pages", lambda: server.get_table_contents(ctx, table_name="Sales")),
+        "page_through": ("pages", page_through),
+        "last_page": ("pages", lambda: server.get_table_contents(ctx, table_name="Sales", page=last_page)),
+        # Filtered pages and counts
+        "filtered_page": (
+            "filters",
+            lambda: server.get_table_contents(ctx, table_name="Sales", filters="Region=East;Amount>100"),
+        ),
+        "date_filtered_page": (
+            "filters",
+            lambda: server.get_table_contents(ctx, table_name="Sales", filters="OrderDate>=2023-01-01;Channel!=Store"),
+        ),
+        "count_filtered": ("filters", lambda: server.count_rows(ctx, table_name="Sales", filters="Quantity>=5")),
+        # Metadata lookups
+        "schema": ("metadata", lambda: server.get_schema(ctx)),
+        "schema_table": ("metadata", lambda: server.get_schema(ctx, table_name="Table025")),
+        "measures": ("metadata", lambda: server.get_dax_measures(ctx)),
+        "measure_lookup": ("metadata", lambda: server.get_dax_measures(ctx, measure_name="Sum Amount 0000")),
+        "relationships": ("metadata", lambda: server.get_relationships(ctx)),
+        # Summaries
+        "model_summary": ("summaries", lambda: server.get_model_summary(ctx)),
+        "statistics": ("summaries", lambda: server.get_statistics(ctx)),
+        "distinct_values": ("summaries", lambda: server.get_distinct_values(ctx, table_name="Sales", column_name="Region")),
+        "profile_columns": (
+            "summaries",
+            lambda: server.profile_columns(ctx, table_name="Sales", columns="Amount,Region,OrderDate"),
+        ),
+    }
+
+
+async def call(fn):
+    response = fn()
+    if asyncio.iscoroutine(response):
+        response = await response
+    if isinstance(response, str) and response.startswith("Error"):
+        raise RuntimeError(response)
+    return response
+
+
+async def run_scenarios(server, scenarios, repeat):
+    results = {}
+    for name, (group, fn) in scenarios.items():
+        # The first call decodes the tables and builds the indexes it needs
+        await call(fn)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await call(fn)
+            timings.append(time.perf_counter() - started)
+        results[name] = {
+            "group": group,
+            "median_s": round(statistics.median(timings), 6),
+            "min_s": round(min(timings), 6),
+            "runs": repeat,
+        }
+        print(f"  {name:<20} {results[name]['median_s'] * 1000:10.2f} ms", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline.
+
+    Returns:
+        A list of (scenario, median, baseline median, relative change, regressed) tuples
+    """
+    rows = []
+    for name, result in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        median, base = result["median_s"], previous["median_s"]
+        change = (median - base) / base if base else 0.0
+        regressed = change > threshold and median - base > MIN_REGRESSION_SECONDS
+        rows.append((name, median, base, change, regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the PBIXRay MCP server on a synthetic model")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows in the fact table (default: 1,000,000)")
+    parser.add_argument("--measures", type=int, default=3_000, help="Number of measures (default: 3,000)")
+    parser.add_argument("--tables", type=int, default=50, help="Number of 40-column filler tables (default: 50)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per scenario (default: 5)")
+    parser.add_argument("--max-rows", type=int, default=100, help="Server --max-rows and page size (default: 100)")
+    parser.add_argument("--scenario", nargs="+", help="Only run these scenarios")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline file")
+    parser.add_argument("--output", help="Also write the results to this file")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="Allowed slowdown relative to the baseline (default: 0.25)"
+    )
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, BENCHMARKS_DIR)
+    sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "src"))
+    from synthetic_model import SyntheticPBIXRay
+
+    # The server parses its options on import
+    saved_argv = sys.argv
+    sys.argv = [saved_argv[0], "--max-rows", str(args.max_rows), "--page-size", str(args.max_rows)]
+    try:
+        import pbixray_server as server
+    finally:
+        sys.argv = saved_argv
+
+    print(f"Generating synthetic model with {args.rows:,} fact rows...", file=sys.stderr)
+    model = SyntheticPBIXRay(fact_rows=args.rows, measures=args.measures, filler_tables=args.tables)
+    server.select_model(model, model.file_path)
+    # Time the tools, not the response cache
+    server.response_cache.configure(max_entries=0)
+
+    scenarios = define_scenarios(server, model)
+    unknown = set(args.scenario or []) - set(scenarios)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}. Available: {', '.join(scenarios)}")
+    if args.scenario:
+        scenarios = {name: scenario for name, scenario in scenarios.items() if name in args.scenario}
+
+    results = asyncio.run(run_scenarios(server, scenarios, args.repeat))
+    report = {
+        "config": {"rows": args.rows, "measures": args.measures, "tables": args.tables, "max_rows": args.max_rows},
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": server.pd.__version__,
+            "numpy": server.np.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        if os.path.exists(args.baseline) and args.scenario:
+            # Keep the baseline of the scenarios that were not run
+            with open(args.baseline, encoding="utf-8") as f:
+                report["results"] = {**json.load(f)["results"], **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with. Record one with --save-baseline.", file=sys.stderr)
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["config"] != report["config"]:
+        print(f"Baseline was recorded with different settings: {baseline['config']}", file=sys.stderr)
+        return 2
+
+    rows = compare(results, baseline, args.threshold)
+    print(f"\n{'scenario':<20} {'median ms':>10} {'baseline ms':>12} {'change':>8}")
+    for name, median, base, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<20} {median * 1000:10.2f} {base * 1000:12.2f} {change:+8.1%}{flag}")
+
+    regressions = [row[0] for row in rows if row[4]]
+    if regressions:
+        print(f"\n{len(regressions)} scenario(s) slower than the baseline by more than {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Synthetic Power BI model for benchmarks
+
+SyntheticPBIXRay exposes the same attributes and methods as PBIXRay, backed
+by generated data: a star schema (Sales fact table with Customer, Product and
+Date dimensions) whose fact table can have tens of millions of rows, plus any
+number of wide filler tables and thousands of measures, so that metadata
+tools see realistic volumes too. Data is deterministic for a given seed and
+each table is generated on first use.
+"""
+
+import numpy as np
+import pandas as pd
+
+REGIONS = np.array(["North", "South", "East", "West", "Central", "Northeast", "Northwest", "Southwest"])
+CHANNELS = np.array(["Store", "Online", "Reseller"])
+SEGMENTS = np.array(["Consumer", "Corporate", "Home Office", "Small Business"])
+CATEGORIES = np.array(["Bikes", "Components", "Clothing", "Accessories"])
+COLORS = np.array(["Black", "Red", "Silver", "Blue", "Yellow", "White", "Multi"])
+START_DATE = np.datetime64("2020-01-01")
+DAYS = 5 * 365
+PRODUCTS = 1_000
+
+# Filler column types cycle through these dtypes
+FILLER_TYPES = ("int64", "float64", "string", "datetime64[ns]", "bool")
+
+
+class SyntheticPBIXRay:
+    """Stand-in for PBIXRay serving generated tables."""
+
+    def __init__(
+        self,
+        fact_rows=1_000_000,
+        customers=10_000,
+        filler_tables=50,
+        filler_columns=40,
+        filler_rows=100,
+        measures=3_000,
+        seed=0,
+    ):
+        self.file_path = f"synthetic-{fact_rows}.pbix"
+        self.fact_rows = fact_rows
+        self.customers = customers
+        self.filler_tables = [f"Table{index:03d}" for index in range(1, filler_tables + 1)]
+        self.filler_columns = filler_columns
+        self.filler_rows = filler_rows
+        self.measure_count = measures
+        self.seed = seed
+        self._frames = {}
+        self._generators = {
+            "Sales": self._sales,
+            "Customer": self._customer,
+            "Product": self._product,
+            "Date": self._date,
+        }
+
+        self.tables = list(self._generators) + self.filler_tables
+        self.schema = self._schema()
+        self.dax_measures = self._measures()
+        self.dax_columns = pd.DataFrame(
+            {
+                "TableName": ["Sales", "Sales"],
+                "ColumnName": ["Margin", "OrderYear"],
+                "Expression": ["Sales[Amount] - Sales[Quantity] * RELATED(Product[ListPrice])", "YEAR(Sales[OrderDate])"],
+            }
+        )
+        self.dax_tables = pd.DataFrame({"TableName": ["Calendar"], "Expression": ["CALENDARAUTO()"]})
+        self.relationships = pd.DataFrame(
+            {
+                "FromTableName": ["Sales", "Sales", "Sales"],
+                "FromColumnName": ["CustomerKey", "ProductKey", "OrderDate"],
+                "ToTableName": ["Customer", "Product", "Date"],
+                "ToColumnName": ["CustomerKey", "ProductKey", "Date"],
+                "IsActive": [True, True, True],
+                "Cardinality": ["M:1", "M:1", "M:1"],
+                "CrossFilteringBehavior": ["OneDirection"] * 3,
+            }
+        )
+        self.power_query = pd.DataFrame(
+            {
+                "TableName": self.tables,
+                "Expression": [
+                    f'let\n    Source = Sql.Database("sql01", "Sales"),\n    Data = Source{{[Schema="dbo",Item="{name}"]}}[Data]\nin\n    Data'
+                    for name in self.tables
+                ],
+            }
+        )
+        self.m_parameters = pd.DataFrame(
+            {"ParameterName": ["Server"], "Description": [""], "Expression": ['"sql01" meta [IsParameterQuery=true]']}
+        )
+        self.metadata = pd.DataFrame({"Name": ["Version", "CreatedFrom"], "Value": ["1550", "Synthetic benchmark model"]})
+        self.statistics = pd.DataFrame(
+            {
+                "TableName": self.schema["TableName"],
+                "ColumnName": self.schema["ColumnName"],
+                "Cardinality": np.random.default_rng(seed).integers(1, 1_000_000, len(self.schema)),
+                "Dictionary": 1024,
+                "HashIndex": 0,
+                "DataSize": 4096,
+            }
+        )
+        self.size = int(self.statistics["DataSize"].sum())
+
+    def _rng(self, table_name):
+        return np.random.default_rng([self.seed, sum(table_name.encode())])
+
+    def _sales(self, rows=None):
+        rng, n = self._rng("Sales"), self.fact_rows if rows is None else rows
+        quantity = rng.integers(1, 11, n)
+        unit_price = np.round(rng.gamma(2.0, 40.0, n), 2)
+        discount = np.round(rng.uniform(0, 0.3, n), 3)
+        discount[rng.random(n) < 0.1] = np.nan
+        return pd.DataFrame(
+            {
+                "SalesKey": np.arange(n, dtype="int64"),
+                "OrderNumber": pd.Series(np.char.add("SO", (np.arange(n) // 3 + 43659).astype(str)), dtype=object),
+                "OrderDate": START_DATE + rng.integers(0, DAYS, n).astype("timedelta64[D]"),
+                "CustomerKey": rng.integers(0, self.customers, n),
+                "ProductKey": rng.integers(0, PRODUCTS, n),
+                "Region": pd.Series(REGIONS[rng.integers(0, len(REGIONS), n)], dtype=object),
+                "Channel": pd.Series(CHANNELS[rng.integers(0, len(CHANNELS), n)], dtype=object),
+                "Quantity": quantity,
+                "UnitPrice": unit_price,
+                "Amount": np.round(quantity * unit_price, 2),
+                "Discount": discount,
+                "IsReturned": rng.random(n) < 0.02,
+            }
+        ).astype({"OrderDate": "datetime64[ns]"})
+
+    def _customer(self):
+        rng, n = self._rng("Customer"), self.customers
+        return pd.DataFrame(
+            {
+                "CustomerKey": np.arange(n, dtype="int64"),
+                "Name": pd.Series(np.char.add("Customer ", np.arange(n).astype(str)), dtype=object),
+                "City": pd.Series(np.char.add("City ", rng.integers(0, 500, n).astype(str)), dtype=object),
+                "Segment": pd.Series(SEGMENTS[rng.integers(0, len(SEGMENTS), n)], dtype=object),
+                "BirthDate": (np.datetime64("1950-01-01") + rng.integers(0, 50 * 365, n).astype("timedelta64[D]")).astype(
+                    "datetime64[ns]"
+                ),
+            }
+        )
+
+    def _product(self):
+        rng = self._rng("Product")
+        return pd.DataFrame(
+            {
+                "ProductKey": np.arange(PRODUCTS, dtype="int64"),
+                "Product": pd.Series(np.char.add("Product ", np.arange(PRODUCTS).astype(str)), dtype=object),
+                "Category": pd.Series(CATEGORIES[rng.integers(0, len(CATEGORIES), PRODUCTS)], dtype=object),
+                "Color": pd.Series(COLORS[rng.integers(0, len(COLORS), PRODUCTS)], dtype=object),
+                "ListPrice": np.round(rng.gamma(2.0, 200.0, PRODUCTS), 2),
+            }
+        )
+
+    def _date(self):
+        dates = pd.date_range(str(START_DATE), periods=DAYS, freq="D")
+        return pd.DataFrame(
+            {
+                "Date": dates,
+                "Year": dates.year.astype("int64"),
+                "Month": dates.month.astype("int64"),
+                "MonthName": pd.Series(dates.strftime("%B"), dtype=object),
+            }
+        )
+
+    def _filler(self, table_name):
+        rng, n = self._rng(table_name), self.filler_rows
+        columns = {}
+        for index in range(self.filler_columns):
+            kind = FILLER_TYPES[index % len(FILLER_TYPES)]
+            name = f"Column{index:03d}"
+            if kind == "int64":
+                columns[name] = rng.integers(0, 1_000_000, n)
+            elif kind == "float64":
+                columns[name] = rng.normal(100, 25, n)
+            elif kind == "string":
+                columns[name] = pd.Series(np.char.add("Value ", rng.integers(0, 50, n).astype(str)), dtype=object)
+            elif kind == "datetime64[ns]":
+                columns[name] = (START_DATE + rng.integers(0, DAYS, n).astype("timedelta64[D]")).astype("datetime64[ns]")
+            else:
+                columns[name] = rng.random(n) < 0.5
+        return pd.DataFrame(columns)
+
+    def _schema(self):
+        rows = []
+        for table_name in self._generators:
+            # Describe the fact table without generating all of its rows
+            frame = self._sales(rows=10) if table_name == "Sales" else self.get_table(table_name)
+            rows += [(table_name, column, str(dtype)) for column, dtype in frame.dtypes.items()]
+        for table_name in self.filler_tables:
+            rows += [
+                (table_name, f"Column{index:03d}", FILLER_TYPES[index % len(FILLER_TYPES)])
+                for index in range(self.filler_columns)
+            ]
+        return pd.DataFrame(rows, columns=["TableName", "ColumnName", "PandasDataType"])
+
+    def _measures(self):
+        columns = ["Amount", "Quantity", "UnitPrice", "Discount"]
+        functions = ["SUM", "AVERAGE", "MIN", "MAX"]
+        names, expressions, folders = [], [], []
+        for index in range(self.measure_count):
+            function, column = functions[index % len(functions)], columns[(index // len(functions)) % len(columns)]
+            names.append(f"{function.title()} {column} {index:04d}")
+            expressions.append(f'CALCULATE({function}(Sales[{column}]), Sales[Region] = "{REGIONS[index % len(REGIONS)]}")')
+            folders.append(f"Folder {index // 100:02d}")
+        return pd.DataFrame(
+            {
+                "TableName": "Sales",
+                "Name": names,
+                "Expression": expressions,
+                "DisplayFolder": folders,
+                "Description": "",
+            }
+        )
+
+    def get_table(self, table_name):
+        """Return the generated frame of a table, generating it on first use."""
+        if table_name not in self._frames:
+            if table_name in self._generators:
+                self._frames[table_name] = self._generators[table_name]()
+            elif table_name in self.filler_tables:
+                self._frames[table_name] = self._filler(table_name)
+            else:
+                raise ValueError(f"Table '{table_name}' not found")
+        return self._frames[table_name]
+
+    def close(self):
+        self._frames.clear()
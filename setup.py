@@ -42,6 +42,7 @@ setup(
     entry_points={
         "console_scripts": [
             "pbixray-mcp-server=pbixray_server:main",
+            "pbixray-catalog=pbix_catalog:main",
         ],
     },
 )
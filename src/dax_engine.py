@@ -0,0 +1,453 @@
+"""
+Local DAX evaluation engine
+
+Evaluates the common subset of DAX found in model measures against decoded
+tables, without the Power BI service. Supported:
+
+- Aggregations: SUM, AVERAGE, MIN, MAX, COUNT, DISTINCTCOUNT, COUNTROWS
+- DIVIDE, BLANK, TRUE, FALSE and arithmetic (+, -, *, /, &)
+- CALCULATE with simple column filters (Table[Column] <op> constant,
+  combined with &&) and the ALL / REMOVEFILTERS modifiers
+- References to other measures
+
+Filters are applied as boolean masks and propagate from the one side to the
+many side of relationships through a row-mapping callback supplied by the
+caller, so the engine itself knows nothing about PBIXRay or the server.
+"""
+
+import copy
+import re
+
+import numpy as np
+import pandas as pd
+
+
+class DaxError(ValueError):
+    """Raised when an expression uses unsupported DAX or cannot be evaluated. The message is user-facing."""
+
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+    |(?P<comment>//[^\n]*|--[^\n]*|/\*.*?\*/)
+    |(?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)
+    |(?P<string>"(?:[^"]|"")*")
+    |(?P<quoted>'(?:[^']|'')*')
+    |(?P<bracket>\[(?:[^\]]|\]\])*\])
+    |(?P<ident>[A-Za-z_][A-Za-z0-9_.]*)
+    |(?P<op><>|<=|>=|==|&&|\|\||[-+*/=<>(),&])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+COMPARISON_OPERATORS = ("=", "==", "<>", "<", ">", "<=", ">=")
+
+# Operator to use when the constant is written on the left: 5 < T[C] is T[C] > 5
+_FLIPPED = {"=": "=", "==": "==", "<>": "<>", "<": ">", ">": "<", "<=": ">=", ">=": "<="}
+
+AGGREGATIONS = ("SUM", "AVERAGE", "MIN", "MAX", "COUNT", "DISTINCTCOUNT")
+
+SUPPORTED_FUNCTIONS = AGGREGATIONS + ("COUNTROWS", "DIVIDE", "CALCULATE", "ALL", "REMOVEFILTERS", "BLANK", "TRUE", "FALSE")
+
+
+def tokenize(expression):
+    """Split a DAX expression into (kind, text) tokens, dropping whitespace and comments."""
+    tokens = []
+    position = 0
+    while position < len(expression):
+        match = _TOKEN_RE.match(expression, position)
+        if not match:
+            raise DaxError(f"Error: Unexpected character {expression[position]!r} at position {position}.")
+        kind = match.lastgroup
+        if kind not in ("ws", "comment"):
+            tokens.append((kind, match.group()))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser producing a tuple-based syntax tree."""
+
+    def __init__(self, expression):
+        self.tokens = tokenize(expression)
+        self.position = 0
+
+    def peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def take(self, expected=None):
+        kind, text = self.peek()
+        if kind is None:
+            raise DaxError("Error: Unexpected end of expression.")
+        if expected is not None and text != expected:
+            raise DaxError(f"Error: Expected '{expected}' but found '{text}'.")
+        self.position += 1
+        return kind, text
+
+    def parse(self):
+        node = self.parse_expression()
+        if self.peek()[0] is not None:
+            raise DaxError(f"Error: Unexpected '{self.peek()[1]}' after end of expression.")
+        return node
+
+    def parse_expression(self):
+        node = self.parse_comparison()
+        while self.peek()[1] in ("&&", "||"):
+            op = self.take()[1]
+            node = ("logical", op, node, self.parse_comparison())
+        return node
+
+    def parse_comparison(self):
+        node = self.parse_additive()
+        if self.peek()[1] in COMPARISON_OPERATORS:
+            op = self.take()[1]
+            node = ("compare", op, node, self.parse_additive())
+        return node
+
+    def parse_additive(self):
+        node = self.parse_term()
+        while self.peek()[1] in ("+", "-", "&"):
+            op = self.take()[1]
+            node = ("binary", op, node, self.parse_term())
+        return node
+
+    def parse_term(self):
+        node = self.parse_unary()
+        while self.peek()[1] in ("*", "/"):
+            op = self.take()[1]
+            node = ("binary", op, node, self.parse_unary())
+        return node
+
+    def parse_unary(self):
+        if self.peek()[1] == "-":
+            self.take()
+            return ("negate", self.parse_unary())
+        if self.peek()[1] == "+":
+            self.take()
+            return self.parse_unary()
+        return self.parse_primary()
+
+    def parse_primary(self):
+        kind, text = self.take()
+        if kind == "number":
+            value = float(text)
+            return ("constant", int(value) if value.is_integer() and "." not in text and "e" not in text.lower() else value)
+        if kind == "string":
+            return ("constant", text[1:-1].replace('""', '"'))
+        if kind == "bracket":
+            return ("measure", text[1:-1].replace("]]", "]"))
+        if kind == "quoted":
+            return self._table_or_reference(text[1:-1].replace("''", "'"))
+        if kind == "ident":
+            if self.peek()[1] == "(":
+                return self._call(text.upper())
+            if text.upper() in ("TRUE", "FALSE"):
+                return ("constant", text.upper() == "TRUE")
+            return self._table_or_reference(text)
+        if text == "(":
+            node = self.parse_expression()
+            self.take(")")
+            return node
+        raise DaxError(f"Error: Unexpected '{text}' in expression.")
+
+    def _table_or_reference(self, table_name):
+        if self.peek()[0] == "bracket":
+            column = self.take()[1][1:-1].replace("]]", "]")
+            return ("reference", table_name, column)
+        return ("table", table_name)
+
+    def _call(self, name):
+        self.take("(")
+        arguments = []
+        if self.peek()[1] != ")":
+            arguments.append(self.parse_expression())
+            while self.peek()[1] == ",":
+                self.take()
+                arguments.append(self.parse_expression())
+        self.take(")")
+        return ("call", name, arguments)
+
+
+def parse(expression):
+    """Parse a DAX expression into a syntax tree."""
+    return _Parser(expression).parse()
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+
+def _to_python(value):
+    # Convert NumPy scalars and NaN to plain Python values (NaN means BLANK)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if _is_blank(value):
+        return None
+    return value
+
+
+class DaxEvaluator:
+    """
+    Evaluate DAX expressions and measures against decoded tables.
+
+    Args:
+        get_table: Callable returning the decoded DataFrame of a table
+        measures: Mapping of measure name to DAX expression
+        map_rows: Callable (from_table, to_table) returning, for every row of
+            from_table, the position of its related row in to_table (-1 when
+            there is none), or None when the tables are not related
+        memoize: Optional callable (key, compute_fn) used to cache parsed
+            expressions
+
+    Filter masks and measure values are as long as the filtered tables, so
+    they are only kept for the duration of one evaluation.
+    """
+
+    def __init__(self, get_table, measures, map_rows, memoize=None):
+        self.get_table = get_table
+        self.measures = {name.lower(): (name, expression) for name, expression in measures.items()}
+        self.map_rows = map_rows
+        self.memoize = memoize or (lambda key, compute_fn: compute_fn())
+        self._scratch = None
+
+    # ---------- Public API ----------
+
+    def evaluate(self, expression, filters=()):
+        """
+        Evaluate a DAX expression.
+
+        Args:
+            expression: The DAX expression, e.g. "SUM(Sales[Amount])"
+            filters: Initial filter context as (table, column, operator, value) tuples
+
+        Returns:
+            The scalar result, or None for BLANK
+        """
+        node = self.memoize(("dax_parse", expression), lambda: parse(expression))
+        return _to_python(self._scope()._eval(node, self._context(filters), ()))
+
+    def evaluate_measure(self, measure_name, filters=()):
+        """Evaluate a measure of the model by name."""
+        return _to_python(self._scope()._measure(measure_name, self._context(filters), ()))
+
+    def _scope(self):
+        # A copy with its own scratch cache, so concurrent evaluations share nothing but the tables
+        scope = copy.copy(self)
+        scope._scratch = {}
+        return scope
+
+    def _local(self, key, compute_fn):
+        if key not in self._scratch:
+            self._scratch[key] = compute_fn()
+        return self._scratch[key]
+
+    # ---------- Filter context ----------
+
+    @staticmethod
+    def _context(filters):
+        # A filter context is a sorted tuple so it can be used as a cache key
+        return tuple(sorted(filters, key=repr))
+
+    def _compare(self, table_name, column_name, op, value):
+        frame = self.get_table(table_name)
+        if column_name not in frame.columns:
+            raise DaxError(f"Error: Column '{column_name}' not found in table '{table_name}'.")
+        column = frame[column_name]
+        if value is None:
+            blank = column.isna().to_numpy()
+            return ~blank if op == "<>" else blank
+        if isinstance(value, str) and pd.api.types.is_datetime64_any_dtype(column):
+            try:
+                value = pd.Timestamp(value)
+            except ValueError:
+                raise DaxError(f"Error: '{value}' is not a valid date for {table_name}[{column_name}].")
+        if isinstance(value, str) and op != "==":
+            # DAX text comparisons are case-insensitive
+            column = column.astype(object).map(lambda v: v.lower() if isinstance(v, str) else v)
+            value = value.lower()
+        functions = {
+            "=": lambda c: c == value,
+            "==": lambda c: c == value,
+            "<>": lambda c: c != value,
+            "<": lambda c: c < value,
+            ">": lambda c: c > value,
+            "<=": lambda c: c <= value,
+            ">=": lambda c: c >= value,
+        }
+        try:
+            return np.asarray(functions[op](column), dtype=bool)
+        except TypeError as e:
+            raise DaxError(f"Error: Cannot compare {table_name}[{column_name}] with {value!r}: {e}")
+
+    def _mask(self, table_name, context):
+        """Rows of a table visible in a filter context, with filters propagated across relationships."""
+
+        def compute():
+            frame = self.get_table(table_name)
+            mask = np.ones(len(frame), dtype=bool)
+            by_table = {}
+            for filter_table, column, op, value in context:
+                by_table.setdefault(filter_table, []).append((column, op, value))
+            for filter_table, conditions in by_table.items():
+                filter_mask = np.ones(len(self.get_table(filter_table)), dtype=bool)
+                for column, op, value in conditions:
+                    filter_mask &= self._compare(filter_table, column, op, value)
+                if filter_table == table_name:
+                    mask &= filter_mask
+                    continue
+                rows = self.map_rows(table_name, filter_table)
+                if rows is None:
+                    # Filters only flow along relationships
+                    continue
+                mask &= (rows >= 0) & filter_mask[np.maximum(rows, 0)]
+            return mask
+
+        return self._local(("dax_mask", table_name, context), compute)
+
+    # ---------- Evaluation ----------
+
+    def _measure(self, name, context, stack):
+        key = name.lower()
+        if key not in self.measures:
+            raise DaxError(f"Error: Measure '{name}' not found.")
+        if key in stack:
+            raise DaxError(f"Error: Circular measure reference: {' -> '.join(stack + (key,))}.")
+        measure_name, expression = self.measures[key]
+
+        def compute():
+            node = self.memoize(("dax_parse", expression), lambda: parse(expression))
+            return self._eval(node, context, stack + (key,))
+
+        return self._local(("dax_measure", key, context), compute)
+
+    def _eval(self, node, context, stack):
+        kind = node[0]
+        if kind == "constant":
+            return node[1]
+        if kind == "measure":
+            return self._measure(node[1], context, stack)
+        if kind == "reference":
+            table_name, name = node[1], node[2]
+            if name.lower() in self.measures and name not in self.get_table(table_name).columns:
+                return self._measure(name, context, stack)
+            raise DaxError(f"Error: Column reference {table_name}[{name}] must be used inside an aggregation.")
+        if kind == "table":
+            raise DaxError(f"Error: Table '{node[1]}' must be used inside a function such as COUNTROWS.")
+        if kind == "negate":
+            value = self._eval(node[1], context, stack)
+            return None if _is_blank(value) else -value
+        if kind == "binary":
+            return self._binary(node[1], self._eval(node[2], context, stack), self._eval(node[3], context, stack))
+        if kind in ("compare", "logical"):
+            raise DaxError("Error: Comparisons are only supported as CALCULATE filter arguments.")
+        if kind == "call":
+            return self._call(node[1], node[2], context, stack)
+        raise DaxError(f"Error: Unsupported expression '{kind}'.")
+
+    @staticmethod
+    def _binary(op, left, right):
+        if op == "&":
+            return ("" if _is_blank(left) else str(left)) + ("" if _is_blank(right) else str(right))
+        if op in ("+", "-"):
+            if _is_blank(left) and _is_blank(right):
+                return None
+            left = 0 if _is_blank(left) else left
+            right = 0 if _is_blank(right) else right
+            return left + right if op == "+" else left - right
+        if _is_blank(left) or _is_blank(right):
+            return None
+        if op == "*":
+            return left * right
+        if right == 0:
+            return None
+        return left / right
+
+    def _column(self, node):
+        if node[0] != "reference":
+            raise DaxError("Error: Expected a column reference such as Table[Column].")
+        return node[1], node[2]
+
+    def _call(self, name, arguments, context, stack):
+        if name in AGGREGATIONS:
+            if len(arguments) != 1:
+                raise DaxError(f"Error: {name} expects a single column argument.")
+            table_name, column_name = self._column(arguments[0])
+            frame = self.get_table(table_name)
+            if column_name not in frame.columns:
+                raise DaxError(f"Error: Column '{column_name}' not found in table '{table_name}'.")
+            values = frame[column_name][self._mask(table_name, context)]
+            if name == "DISTINCTCOUNT":
+                return int(values.nunique(dropna=False)) if len(values) else None
+            if name == "COUNT":
+                count = int(values.count())
+                return count or None
+            if name == "SUM":
+                return values.sum(min_count=1)
+            if name == "AVERAGE":
+                return values.mean()
+            if values.count() == 0:
+                return None
+            return values.min() if name == "MIN" else values.max()
+
+        if name == "COUNTROWS":
+            if len(arguments) != 1 or arguments[0][0] != "table":
+                raise DaxError("Error: COUNTROWS expects a table name.")
+            count = int(np.count_nonzero(self._mask(arguments[0][1], context)))
+            return count or None
+
+        if name == "DIVIDE":
+            if len(arguments) not in (2, 3):
+                raise DaxError("Error: DIVIDE expects 2 or 3 arguments.")
+            numerator = self._eval(arguments[0], context, stack)
+            denominator = self._eval(arguments[1], context, stack)
+            if _is_blank(denominator) or denominator == 0:
+                return self._eval(arguments[2], context, stack) if len(arguments) == 3 else None
+            if _is_blank(numerator):
+                return None
+            return numerator / denominator
+
+        if name == "CALCULATE":
+            if not arguments:
+                raise DaxError("Error: CALCULATE expects an expression.")
+            return self._eval(arguments[0], self._apply_filters(arguments[1:], context, stack), stack)
+
+        if name == "BLANK" and not arguments:
+            return None
+        if name in ("TRUE", "FALSE") and not arguments:
+            return name == "TRUE"
+
+        raise DaxError(f"Error: Unsupported DAX function '{name}'. Supported functions: {', '.join(SUPPORTED_FUNCTIONS)}.")
+
+    def _apply_filters(self, arguments, context, stack):
+        """Build the filter context of CALCULATE: each filtered column replaces its outer filters."""
+        filters = list(context)
+        added = []
+        for argument in arguments:
+            if argument[0] == "call" and argument[1] in ("ALL", "REMOVEFILTERS"):
+                for target in argument[2]:
+                    if target[0] == "table":
+                        # ALL(Table) also removes the filters reaching it through relationships
+                        filters = [f for f in filters if f[0] != target[1] and self.map_rows(target[1], f[0]) is None]
+                    else:
+                        table_name, column_name = self._column(target)
+                        filters = [f for f in filters if f[:2] != (table_name, column_name)]
+                continue
+            added.extend(self._filter_conditions(argument, context, stack))
+
+        replaced = {(table_name, column_name) for table_name, column_name, _, _ in added}
+        filters = [f for f in filters if f[:2] not in replaced] + added
+        return self._context(filters)
+
+    def _filter_conditions(self, node, context, stack):
+        if node[0] == "logical":
+            if node[1] != "&&":
+                raise DaxError("Error: Only && is supported to combine CALCULATE filters.")
+            return self._filter_conditions(node[2], context, stack) + self._filter_conditions(node[3], context, stack)
+        if node[0] != "compare":
+            raise DaxError('Error: CALCULATE filters must compare a column with a value, e.g. Product[Color] = "Red".')
+        op, left, right = node[1], node[2], node[3]
+        if left[0] != "reference" and right[0] == "reference":
+            op, left, right = _FLIPPED[op], right, left
+        table_name, column_name = self._column(left)
+        return [(table_name, column_name, op, _to_python(self._eval(right, context, stack)))]
@@ -0,0 +1,396 @@
+"""
+Power Query (M) parser
+
+Parses the M expressions of a model into a structured index, so that data
+sources and expensive steps can be found without reading the M code:
+
+- Steps of each query (the bindings of its top-level let), with the functions
+  they call, a step type (merge, grouping, custom column, buffer, ...) and the
+  steps they depend on
+- Data sources: connector calls such as Sql.Database or File.Contents with
+  their arguments, where parameter references are resolved to their values
+- References to other queries and to M parameters
+
+The parser is deliberately tolerant: it never rejects an expression, it only
+extracts what it recognizes.
+"""
+
+import re
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+    |(?P<comment>//[^\n]*|/\*.*?(?:\*/|$))
+    |(?P<string>"(?:[^"]|"")*"?)
+    |(?P<quoted>\#"(?:[^"]|"")*"?)
+    |(?P<ident>\#?[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*)
+    |(?P<number>0[xX][0-9a-fA-F]+|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+    |(?P<op>=>|<=|>=|<>|\.\.\.|\.\.|\?\?|[-+*/&=<>(){}\[\],;@!?.])
+    |(?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# fmt: off
+KEYWORDS = {
+    "let", "in", "each", "if", "then", "else", "and", "or", "not", "try", "otherwise", "error",
+    "as", "is", "meta", "type", "true", "false", "null", "section", "shared", "_",
+}
+
+# Namespaces of the functions that read data from outside the model
+SOURCE_NAMESPACES = {
+    "AccessDatabase", "ActiveDirectory", "AmazonRedshift", "AnalysisServices", "AzureDataExplorer",
+    "AzureDataLakeStorage", "AzureStorage", "Cdm", "CommonDataService", "Databricks", "DB2", "Dataverse",
+    "Exchange", "File", "Folder", "GoogleAnalytics", "GoogleBigQuery", "Hdfs", "HdInsight", "Informix",
+    "Lakehouse", "MySQL", "OData", "Odbc", "OleDb", "Oracle", "PostgreSQL", "PowerBI", "PowerPlatform",
+    "Salesforce", "SapBusinessWarehouse", "SapHana", "SharePoint", "Snowflake", "Spark", "Sql",
+    "Sybase", "Teradata", "Web",
+}
+# fmt: on
+
+# Functions that also read data but live in a namespace shared with transformations
+SOURCE_FUNCTIONS = {"Excel.CurrentWorkbook", "Excel.Workbook", "Value.NativeQuery"}
+
+# Step type of the transformation functions worth knowing about
+STEP_TYPES = {
+    "Table.NestedJoin": "merge",
+    "Table.Join": "merge",
+    "Table.FuzzyNestedJoin": "merge",
+    "Table.FuzzyJoin": "merge",
+    "Table.Combine": "append",
+    "Table.Group": "grouping",
+    "Table.FuzzyGroup": "grouping",
+    "Table.AddColumn": "custom_column",
+    "Table.AddIndexColumn": "index_column",
+    "Table.Buffer": "buffer",
+    "List.Buffer": "buffer",
+    "Binary.Buffer": "buffer",
+    "Table.SelectRows": "filter",
+    "Table.Sort": "sort",
+    "Table.Distinct": "distinct",
+    "Table.Pivot": "pivot",
+    "Table.Unpivot": "unpivot",
+    "Table.UnpivotOtherColumns": "unpivot",
+    "Table.TransformColumnTypes": "type_change",
+    "Table.TransformColumns": "transform_columns",
+    "Table.ExpandTableColumn": "expand",
+    "Table.ExpandRecordColumn": "expand",
+    "Table.ExpandListColumn": "expand",
+    "Table.SelectColumns": "column_selection",
+    "Table.RemoveColumns": "column_selection",
+    "Table.ReorderColumns": "column_selection",
+    "Table.RenameColumns": "rename",
+    "Table.ReplaceValue": "replace_values",
+    "Table.PromoteHeaders": "promote_headers",
+    "Value.NativeQuery": "native_query",
+}
+
+# Longest raw expression kept for arguments that are not simple values
+MAX_ARGUMENT_TEXT = 200
+
+_OPENING = {"(": ")", "[": "]", "{": "}"}
+
+
+def tokenize(expression):
+    """Split an M expression into (kind, text, start, end) tokens, dropping whitespace and comments."""
+    tokens = []
+    for match in _TOKEN_RE.finditer(expression):
+        kind = match.lastgroup
+        if kind not in ("ws", "comment"):
+            tokens.append((kind, match.group(), match.start(), match.end()))
+    return tokens
+
+
+def _identifier(token):
+    # Name of an identifier token (#"Quoted Name" -> Quoted Name), None for anything else
+    kind, text = token[0], token[1]
+    if kind == "ident" and text not in KEYWORDS and not text.startswith("#"):
+        return text
+    if kind == "quoted":
+        return text[2:].rstrip('"').replace('""', '"')
+    return None
+
+
+def _string_value(text):
+    return text[1:].rstrip('"').replace('""', '"') if text.startswith('"') else text
+
+
+def _number(text):
+    if text.lower().startswith("0x"):
+        return int(text, 16)
+    return float(text) if any(c in text for c in ".eE") else int(text)
+
+
+def _split_top_level(tokens, separator=","):
+    # Split a token list at separators that are not nested in brackets
+    parts, current, depth = [], [], 0
+    for token in tokens:
+        if token[0] == "op" and token[1] in _OPENING:
+            depth += 1
+        elif token[0] == "op" and token[1] in _OPENING.values():
+            depth -= 1
+        if depth == 0 and token[0] == "op" and token[1] == separator:
+            parts.append(current)
+            current = []
+        else:
+            current.append(token)
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _matching_close(tokens, index):
+    # Index of the bracket closing the one at tokens[index]
+    depth = 0
+    for position in range(index, len(tokens)):
+        kind, text = tokens[position][0], tokens[position][1]
+        if kind == "op" and text in _OPENING:
+            depth += 1
+        elif kind == "op" and text in _OPENING.values():
+            depth -= 1
+            if depth == 0:
+                return position
+    return len(tokens) - 1
+
+
+def split_let(expression):
+    """
+    Split an M expression into its top-level let bindings.
+
+    Returns:
+        A list of (step name, tokens) pairs and the tokens of the final "in" expression.
+        Expressions that are not a let expression give a single unnamed step.
+    """
+    tokens = tokenize(expression)
+    if not tokens or tokens[0][1] != "let":
+        return [(None, tokens)], tokens
+
+    bindings, current = [], []
+    depth, nested_lets = 0, 0
+    result_tokens = []
+    for position, token in enumerate(tokens[1:], start=1):
+        kind, text = token[0], token[1]
+        if kind == "op" and text in _OPENING:
+            depth += 1
+        elif kind == "op" and text in _OPENING.values():
+            depth -= 1
+        elif kind == "ident" and text == "let" and depth == 0:
+            nested_lets += 1
+        elif kind == "ident" and text == "in" and depth == 0:
+            if nested_lets == 0:
+                bindings.append(current)
+                result_tokens = tokens[position + 1 :]
+                break
+            nested_lets -= 1
+        if depth == 0 and nested_lets == 0 and kind == "op" and text == ",":
+            bindings.append(current)
+            current = []
+        else:
+            current.append(token)
+    else:
+        bindings.append(current)
+
+    steps = []
+    for binding in bindings:
+        equals = next((i for i, t in enumerate(binding) if t[0] == "op" and t[1] == "="), None)
+        if equals is None or equals == 0:
+            continue
+        name = _identifier(binding[0]) or binding[0][1]
+        steps.append((name, binding[equals + 1 :]))
+    return steps, result_tokens
+
+
+def _references(tokens):
+    # Identifiers used as values: not function names, not record field names or field accesses
+    names = []
+    stack = []
+    for position, token in enumerate(tokens):
+        kind, text = token[0], token[1]
+        if kind == "op" and text in _OPENING:
+            stack.append(text)
+            continue
+        if kind == "op" and text in _OPENING.values():
+            if stack:
+                stack.pop()
+            continue
+        name = _identifier(token)
+        if name is None:
+            continue
+        following = tokens[position + 1][1] if position + 1 < len(tokens) else None
+        preceding = tokens[position - 1][1] if position > 0 else None
+        if following == "(" and token[0] == "ident":
+            continue
+        if stack and stack[-1] == "[" and preceding in ("[", ","):
+            continue
+        names.append(name)
+    return names
+
+
+def _calls(tokens):
+    # Every function call in a token list: (function name, argument token lists, tokens of the parenthesis)
+    calls = []
+    for position, token in enumerate(tokens[:-1]):
+        if token[0] == "ident" and token[1] not in KEYWORDS and tokens[position + 1][1] == "(":
+            close = _matching_close(tokens, position + 1)
+            arguments = _split_top_level(tokens[position + 2 : close])
+            calls.append((token[1], arguments, tokens[position + 1 : close + 1]))
+    return calls
+
+
+def is_source_function(function):
+    """Check whether a function reads data from outside the model."""
+    return function in SOURCE_FUNCTIONS or function.split(".")[0] in SOURCE_NAMESPACES
+
+
+def _argument(tokens, expression, parameters):
+    # Simple values as-is, parameter references resolved, nested calls as structures
+    if len(tokens) == 1:
+        kind, text = tokens[0][0], tokens[0][1]
+        if kind == "string":
+            return _string_value(text)
+        if kind == "number":
+            return _number(text)
+        if kind == "ident" and text in ("true", "false", "null"):
+            return {"true": True, "false": False, "null": None}[text]
+        name = _identifier(tokens[0])
+        if name is not None:
+            if name in parameters:
+                return {"parameter": name, "value": parameters[name]}
+            return {"reference": name}
+    if len(tokens) > 2 and tokens[0][0] == "ident" and tokens[1][1] == "(" and _matching_close(tokens, 1) == len(tokens) - 1:
+        return {
+            "function": tokens[0][1],
+            "arguments": [_argument(argument, expression, parameters) for argument in _split_top_level(tokens[2:-1])],
+        }
+    text = expression[tokens[0][2] : tokens[-1][3]] if tokens else ""
+    if len(text) > MAX_ARGUMENT_TEXT:
+        text = text[:MAX_ARGUMENT_TEXT] + "..."
+    return {"expression": text}
+
+
+def parse_parameter_value(expression):
+    """
+    Get the current value of an M parameter ("value" meta [IsParameterQuery=true, ...]).
+
+    Returns:
+        The literal value, or None when the expression is not a literal
+    """
+    tokens = tokenize(expression or "")
+    if not tokens:
+        return None
+    kind, text = tokens[0][0], tokens[0][1]
+    if kind == "string":
+        return _string_value(text)
+    if kind == "number":
+        return _number(text)
+    if kind == "ident" and text in ("true", "false"):
+        return text == "true"
+    return None
+
+
+def is_parameter_query(expression):
+    """Check whether a shared expression is an M parameter rather than a query or function."""
+    return bool(re.search(r"IsParameterQuery\s*=\s*true", expression or "", re.IGNORECASE))
+
+
+def parse_query(name, expression, query_names=(), parameters=None):
+    """
+    Parse one M query into steps, sources and references.
+
+    Args:
+        name: Name of the query
+        expression: M code of the query
+        query_names: Names of the other queries of the model, to detect references
+        parameters: Dictionary mapping M parameter names to their current values
+
+    Returns:
+        A dictionary with the steps, output step, sources, referenced queries and parameters
+    """
+    parameters = parameters or {}
+    expression = expression or ""
+    bindings, result_tokens = split_let(expression)
+    step_names = {step_name for step_name, _ in bindings if step_name}
+
+    steps, sources = [], []
+    referenced_queries, used_parameters = set(), set()
+    for step_name, tokens in bindings:
+        step_name = step_name or name
+        calls = _calls(tokens)
+        functions = list(dict.fromkeys(call[0] for call in calls))
+        types = list(dict.fromkeys(STEP_TYPES[function] for function in functions if function in STEP_TYPES))
+
+        # Only the outermost connector call counts: Excel.Workbook(File.Contents(...)) is one source
+        covered = []
+        for function, arguments, span in calls:
+            if not is_source_function(function) or any(span[0][2] >= s and span[-1][3] <= e for s, e in covered):
+                continue
+            covered.append((span[0][2], span[-1][3]))
+            sources.append(
+                {
+                    "step": step_name,
+                    "function": function,
+                    "arguments": [_argument(argument, expression, parameters) for argument in arguments],
+                }
+            )
+        if covered and "source" not in types:
+            types.insert(0, "source")
+
+        references = _references(tokens)
+        depends_on = list(dict.fromkeys(r for r in references if r in step_names and r != step_name))
+        referenced_queries.update(
+            r for r in references if r in query_names and r not in parameters and r not in step_names and r != name
+        )
+        used_parameters.update(r for r in references if r in parameters and r not in step_names)
+
+        steps.append(
+            {
+                "name": step_name,
+                "types": types or ["other"],
+                "functions": functions,
+                "depends_on": depends_on,
+            }
+        )
+
+    output = None
+    if result_tokens and len(result_tokens) == 1:
+        output = _identifier(result_tokens[0])
+
+    return {
+        "name": name,
+        "steps": steps,
+        "output": output,
+        "sources": sources,
+        "referenced_queries": sorted(referenced_queries),
+        "parameters": sorted(used_parameters),
+    }
+
+
+def build_m_index(queries, shared_expressions=None):
+    """
+    Parse every M query of a model.
+
+    Args:
+        queries: Dictionary mapping table names to the M code loading them
+        shared_expressions: Dictionary mapping shared expression names (M parameters,
+                            functions and queries not loaded to a table) to their M code
+
+    Returns:
+        A dictionary with the parsed "queries" (table and shared queries) and the
+        current value of each M "parameters" entry
+    """
+    shared_expressions = shared_expressions or {}
+    parameters = {
+        name: parse_parameter_value(expression)
+        for name, expression in shared_expressions.items()
+        if is_parameter_query(expression)
+    }
+    query_names = set(queries) | set(shared_expressions)
+
+    parsed = []
+    for name, expression in queries.items():
+        parsed.append({**parse_query(name, expression, query_names, parameters), "kind": "table"})
+    for name, expression in shared_expressions.items():
+        if name not in parameters:
+            parsed.append({**parse_query(name, expression, query_names, parameters), "kind": "shared"})
+
+    return {"queries": parsed, "parameters": parameters}
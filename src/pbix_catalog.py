@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+PBIX Catalog
+
+Indexes many Power BI (.pbix) files into a single SQLite database so that
+cross-report questions ("which reports use this source or this measure?")
+can be answered without loading any PBIX file.
+
+Files are loaded in a process pool. Each file's schema, statistics,
+relationships, DAX measures, Power Query (M) code and metadata are written
+to the catalog, together with a full-text index over names and expressions.
+On a re-scan, files whose fingerprint (size and modification time) has not
+changed are skipped. Files that failed to index are retried.
+
+Usage:
+    python src/pbix_catalog.py scan /shared/reports --db catalog.sqlite
+    python src/pbix_catalog.py search "Sql.Database" --db catalog.sqlite
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+import datetime
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    fingerprint TEXT NOT NULL,
+    size_bytes INTEGER,
+    indexed_at TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS columns (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    table_name TEXT,
+    column_name TEXT,
+    data_type TEXT,
+    cardinality INTEGER,
+    dictionary_bytes INTEGER,
+    hash_index_bytes INTEGER,
+    data_bytes INTEGER
+);
+CREATE TABLE IF NOT EXISTS measures (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    table_name TEXT,
+    name TEXT,
+    expression TEXT
+);
+CREATE TABLE IF NOT EXISTS relationships (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    from_table TEXT,
+    from_column TEXT,
+    to_table TEXT,
+    to_column TEXT,
+    is_active INTEGER,
+    cardinality TEXT
+);
+CREATE TABLE IF NOT EXISTS power_queries (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    table_name TEXT,
+    expression TEXT
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    name TEXT,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_columns_file ON columns(file_id);
+CREATE INDEX IF NOT EXISTS idx_measures_name ON measures(name);
+CREATE INDEX IF NOT EXISTS idx_measures_file ON measures(file_id);
+CREATE INDEX IF NOT EXISTS idx_relationships_file ON relationships(file_id);
+CREATE INDEX IF NOT EXISTS idx_power_queries_file ON power_queries(file_id);
+CREATE INDEX IF NOT EXISTS idx_metadata_file ON metadata(file_id);
+"""
+
+# Full-text index over everything searchable; falls back to a plain table when FTS5 is unavailable
+SEARCH_FTS_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(file_id UNINDEXED, kind UNINDEXED, table_name, name, content)"
+)
+SEARCH_PLAIN_SQL = "CREATE TABLE IF NOT EXISTS search (file_id INTEGER, kind TEXT, table_name TEXT, name TEXT, content TEXT)"
+
+SEARCH_KINDS = ("measure", "column", "power_query", "relationship", "metadata")
+
+# Artifacts extracted from every file, as exposed by PBIXRay
+ARTIFACTS = ("schema", "statistics", "relationships", "dax_measures", "power_query", "metadata")
+
+
+def file_fingerprint(file_path):
+    """Fingerprint used to detect changed files: size and modification time."""
+    stat = os.stat(file_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def find_pbix_files(root):
+    """Find every .pbix file below a directory."""
+    found = []
+    for directory, _, file_names in os.walk(root):
+        for file_name in file_names:
+            if file_name.lower().endswith(".pbix"):
+                found.append(os.path.abspath(os.path.join(directory, file_name)))
+    return sorted(found)
+
+
+def _plain(value):
+    # Convert values from PBIXRay frames into types SQLite can store
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, (list, tuple, dict, np.ndarray)):
+        return json.dumps(value.tolist() if isinstance(value, np.ndarray) else value, default=str)
+    if value is not None and not isinstance(value, (int, float, str, bytes)):
+        return str(value)
+    return value
+
+
+def extract_pbix(file_path):
+    """
+    Load a PBIX file and extract its catalog artifacts.
+
+    Runs in a worker process, so it returns plain lists of records.
+
+    Returns:
+        A dictionary mapping each artifact name to its records
+    """
+    from pbixray import PBIXRay
+
+    model = PBIXRay(file_path)
+    try:
+        extracted = {}
+        for artifact in ARTIFACTS:
+            try:
+                frame = getattr(model, artifact)
+                extracted[artifact] = [
+                    {key: _plain(value) for key, value in record.items()} for record in frame.to_dict("records")
+                ]
+            except Exception:
+                extracted[artifact] = []
+        return extracted
+    finally:
+        if hasattr(model, "close"):
+            model.close()
+
+
+class PbixCatalog:
+    """
+    SQLite catalog of PBIX files.
+
+    Args:
+        db_path: Path of the SQLite database (created if missing)
+    """
+
+    def __init__(self, db_path):
+        self.db_path = os.path.expanduser(db_path)
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA_SQL)
+            try:
+                conn.execute(SEARCH_FTS_SQL)
+            except sqlite3.OperationalError:
+                conn.execute(SEARCH_PLAIN_SQL)
+            self.has_fts = (
+                conn.execute("SELECT sql FROM sqlite_master WHERE name = 'search'").fetchone()[0].upper().find("FTS5") >= 0
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One transaction per use; the connection is closed afterwards, not just committed
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        with contextlib.closing(conn), conn:
+            yield conn
+
+    # ---------- Indexing ----------
+
+    def scan(self, root, workers=None, prune=True, extractor=None, progress=None):
+        """
+        Index every PBIX file below a directory, skipping unchanged files.
+
+        Files whose last attempt failed are indexed again even when unchanged,
+        so transient errors (a file being written, a locked share) recover.
+
+        Args:
+            root: Directory to scan recursively
+            workers: Number of worker processes (None for one per CPU, 0 to load in-process)
+            prune: Remove catalog entries for files under root that no longer exist
+            extractor: Function returning the artifacts of one file (see extract_pbix)
+            progress: Optional callback (done, total) called as files complete
+
+        Returns:
+            A summary with the number of files found, indexed, skipped, failed and removed
+        """
+        extractor = extractor or extract_pbix
+        root = os.path.abspath(os.path.expanduser(root))
+        paths = find_pbix_files(root)
+
+        with self._connect() as conn:
+            rows = conn.execute("SELECT path, fingerprint, error FROM files").fetchall()
+        known = {row["path"]: row["fingerprint"] for row in rows}
+        failed = {row["path"] for row in rows if row["error"] is not None}
+
+        pending = {}
+        for path in paths:
+            fingerprint = file_fingerprint(path)
+            if known.get(path) != fingerprint or path in failed:
+                pending[path] = fingerprint
+
+        summary = {"found": len(paths), "indexed": 0, "skipped": len(paths) - len(pending), "failed": 0, "removed": 0}
+
+        def store(path, extracted, error):
+            self._store(path, pending[path], extracted, error)
+            summary["failed" if error else "indexed"] += 1
+            if progress:
+                progress(summary["indexed"] + summary["failed"], len(pending))
+
+        if workers == 0:
+            for path in pending:
+                try:
+                    store(path, extractor(path), None)
+                except Exception as e:
+                    store(path, None, str(e))
+        elif pending:
+            # Spawned workers: forking the multithreaded server could copy held locks into the children
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                futures = {executor.submit(extractor, path): path for path in pending}
+                for future in as_completed(futures):
+                    try:
+                        store(futures[future], future.result(), None)
+                    except Exception as e:
+                        store(futures[future], None, str(e))
+
+        if prune:
+            present = set(paths)
+            removed = [path for path in known if path.startswith(root + os.sep) and path not in present]
+            with self._connect() as conn:
+                for path in removed:
+                    self._delete_file(conn, path)
+            summary["removed"] = len(removed)
+
+        return summary
+
+    def _delete_file(self, conn, path):
+        row = conn.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row:
+            conn.execute("DELETE FROM search WHERE file_id = ?", (row["id"],))
+            conn.execute("DELETE FROM files WHERE id = ?", (row["id"],))
+
+    def _store(self, path, fingerprint, extracted, error):
+        """Replace the catalog entries of one file in a single transaction."""
+        with self._connect() as conn:
+            self._delete_file(conn, path)
+            cursor = conn.execute(
+                "INSERT INTO files (path, fingerprint, size_bytes, indexed_at, error) VALUES (?, ?, ?, ?, ?)",
+                (
+                    path,
+                    fingerprint,
+                    os.path.getsize(path) if os.path.exists(path) else None,
+                    datetime.datetime.now().isoformat(timespec="seconds"),
+                    error,
+                ),
+            )
+            if extracted is None:
+                return
+            file_id = cursor.lastrowid
+
+            statistics = {(s.get("TableName"), s.get("ColumnName")): s for s in extracted.get("statistics", [])}
+            columns = []
+            for column in extracted.get("schema", []):
+                key = (column.get("TableName"), column.get("ColumnName"))
+                stats = statistics.get(key, {})
+                data_type = column.get("DataType", column.get("PandasDataType"))
+                columns.append(
+                    (
+                        file_id,
+                        key[0],
+                        key[1],
+                        data_type,
+                        stats.get("Cardinality", column.get("Cardinality")),
+                        stats.get("Dictionary"),
+                        stats.get("HashIndex"),
+                        stats.get("DataSize"),
+                    )
+                )
+            conn.executemany("INSERT INTO columns VALUES (?, ?, ?, ?, ?, ?, ?, ?)", columns)
+
+            measures = [
+                (file_id, m.get("TableName"), m.get("Name"), m.get("Expression")) for m in extracted.get("dax_measures", [])
+            ]
+            conn.executemany("INSERT INTO measures VALUES (?, ?, ?, ?)", measures)
+
+            relationships = [
+                (
+                    file_id,
+                    r.get("FromTableName"),
+                    r.get("FromColumnName"),
+                    r.get("ToTableName"),
+                    r.get("ToColumnName"),
+                    r.get("IsActive"),
+                    r.get("Cardinality"),
+                )
+                for r in extracted.get("relationships", [])
+            ]
+            conn.executemany("INSERT INTO relationships VALUES (?, ?, ?, ?, ?, ?, ?)", relationships)
+
+            queries = [(file_id, q.get("TableName"), q.get("Expression")) for q in extracted.get("power_query", [])]
+            conn.executemany("INSERT INTO power_queries VALUES (?, ?, ?)", queries)
+
+            metadata = [(file_id, m.get("Name"), _plain(m.get("Value"))) for m in extracted.get("metadata", [])]
+            conn.executemany("INSERT INTO metadata VALUES (?, ?, ?)", metadata)
+
+            search_rows = (
+                [(file_id, "measure", t, n, e) for _, t, n, e in measures]
+                + [(file_id, "column", c[1], c[2], c[3]) for c in columns]
+                + [(file_id, "power_query", t, t, e) for _, t, e in queries]
+                + [
+                    (file_id, "relationship", r[1], f"{r[1]}[{r[2]}] -> {r[3]}[{r[4]}]", f"{r[1]} {r[2]} {r[3]} {r[4]}")
+                    for r in relationships
+                ]
+                + [(file_id, "metadata", None, n, v) for _, n, v in metadata]
+            )
+            conn.executemany("INSERT INTO search VALUES (?, ?, ?, ?, ?)", search_rows)
+
+    # ---------- Queries ----------
+
+    def search(self, query, kind=None, limit=50):
+        """
+        Search names and expressions across every indexed file.
+
+        Args:
+            query: Text to look for, matched as a phrase (e.g. "Sql.Database" or a measure name)
+            kind: Optional kind to restrict to: measure, column, power_query, relationship or metadata
+            limit: Maximum number of results
+
+        Returns:
+            A list of matches with file path, kind, table, name and a content excerpt
+        """
+        params = []
+        if self.has_fts:
+            condition = "search MATCH ?"
+            params.append('"' + query.replace('"', '""') + '"')
+        else:
+            condition = "(search.name LIKE ? OR search.content LIKE ? OR search.table_name LIKE ?)"
+            params.extend([f"%{query}%"] * 3)
+        if kind:
+            condition += " AND search.kind = ?"
+            params.append(kind)
+        params.append(limit)
+
+        sql = f"""
+            SELECT files.path AS file_path, search.kind, search.table_name, search.name, search.content
+            FROM search JOIN files ON files.id = search.file_id
+            WHERE {condition}
+            ORDER BY files.path
+            LIMIT ?
+        """
+        with self._connect() as conn:
+            rows = [dict(row) for row in conn.execute(sql, params)]
+        for row in rows:
+            content = row.pop("content") or ""
+            row["excerpt"] = _excerpt(content, query)
+        return rows
+
+    def files(self):
+        """List the indexed files with their object counts."""
+        sql = """
+            SELECT files.path, files.size_bytes, files.indexed_at, files.error,
+                (SELECT COUNT(*) FROM measures WHERE measures.file_id = files.id) AS measures,
+                (SELECT COUNT(DISTINCT table_name) FROM columns WHERE columns.file_id = files.id) AS tables,
+                (SELECT COUNT(*) FROM relationships WHERE relationships.file_id = files.id) AS relationships
+            FROM files ORDER BY files.path
+        """
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(sql)]
+
+
+def _excerpt(content, query, width=80):
+    """Cut a window of text around the first occurrence of the query."""
+    content = str(content)
+    position = content.lower().find(query.lower())
+    if position < 0:
+        return content[: 2 * width]
+    start = max(0, position - width)
+    end = min(len(content), position + len(query) + width)
+    return ("..." if start else "") + content[start:end] + ("..." if end < len(content) else "")
+
+
+def main():
+    """Command line entry point for scanning directories and searching the catalog."""
+    parser = argparse.ArgumentParser(description="PBIX catalog")
+    parser.add_argument("--db", default="~/.pbixray/catalog.sqlite", help="Path of the catalog database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="Index every PBIX file below a directory")
+    scan_parser.add_argument("directory", help="Directory to scan recursively")
+    scan_parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    scan_parser.add_argument("--no-prune", action="store_true", help="Keep entries of files that no longer exist")
+
+    search_parser = subparsers.add_parser("search", help="Search measures, columns, M code and metadata")
+    search_parser.add_argument("query", help="Text to search for")
+    search_parser.add_argument("--kind", choices=SEARCH_KINDS, help="Restrict results to one kind of object")
+    search_parser.add_argument("--limit", type=int, default=50, help="Maximum number of results (default: 50)")
+
+    args = parser.parse_args()
+    catalog = PbixCatalog(args.db)
+
+    if args.command == "scan":
+
+        def report(done, total):
+            print(f"Indexed {done}/{total} changed file(s)", file=sys.stderr)
+
+        summary = catalog.scan(args.directory, workers=args.workers, prune=not args.no_prune, progress=report)
+        print(json.dumps(summary, indent=2))
+    else:
+        print(json.dumps(catalog.search(args.query, kind=args.kind, limit=args.limit), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,16 +9,39 @@ for LLM clients to interact with Power BI (.pbix) files.
 import os
 import json
 import numpy as np
+import pandas as pd
 import argparse
+import contextlib
+import contextvars
+import difflib
 import functools
+import hashlib
+import inspect
+import operator
+import re
 import sys
+import threading
+import time
+import weakref
 import anyio
 import asyncio
-from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+from urllib.parse import parse_qs, quote, unquote
 
 from mcp.server.fastmcp import FastMCP, Context
 from pbixray import PBIXRay
 
+from dax_engine import DaxError, DaxEvaluator
+from m_parser import STEP_TYPES, build_m_index
+from report_layout import read_report_fields
+from server_memory import estimate_size, model_buffer_size, process_memory, release_memory, traced_memory
+from server_metrics import ToolMetrics, start_prometheus_file_writer, start_prometheus_server
+from server_profiling import DEFAULT_PROFILE_DIR, PROFILE_FORMATS, ToolProfiler
+from server_tracing import Tracer
+from pbix_catalog import SEARCH_KINDS, PbixCatalog
+
 
 # Parse command line arguments
 def parse_args():
@@ -26,7 +49,64 @@ def parse_args():
     parser.add_argument("--disallow", nargs="+", help="Specify tools to disable", default=[])
     parser.add_argument("--max-rows", type=int, default=10, help="Maximum rows to return for table data (default: 10)")
     parser.add_argument("--page-size", type=int, default=10, help="Default page size for paginated results (default: 10)")
-    parser.add_argument("--load-file", type=str, help="Automatically load a PBIX file at startup")
+    parser.add_argument(
+        "--load-file",
+        nargs="+",
+        help="PBIX files to load in the background at startup; the first one becomes the current model",
+    )
+    parser.add_argument(
+        "--max-sample-rows", type=int, default=100, help="Maximum rows returned by sample_table (default: 100)"
+    )
+    parser.add_argument(
+        "--load-timeout",
+        type=float,
+        default=120.0,
+        help="Seconds a tool call waits for a file loading at startup (default: 120)",
+    )
+    parser.add_argument(
+        "--catalog",
+        type=str,
+        default="~/.pbixray/catalog.sqlite",
+        help="Path of the PBIX catalog database (default: ~/.pbixray/catalog.sqlite)",
+    )
+    parser.add_argument(
+        "--response-cache-size",
+        type=int,
+        default=256,
+        help="Maximum number of tool responses kept in the response cache, 0 to disable (default: 256)",
+    )
+    parser.add_argument("--metrics-file", type=str, help="Write tool metrics in Prometheus text format to this file")
+    parser.add_argument("--metrics-port", type=int, help="Serve tool metrics in Prometheus text format on this local port")
+    parser.add_argument("--trace-file", type=str, help="Append a trace of every tool call to this file as OTLP JSON lines")
+    parser.add_argument("--profile", action="store_true", help="Profile tool calls (can also be toggled with set_profiling)")
+    parser.add_argument("--profile-tools", nargs="*", default=[], help="Only profile these tools (default: all tools)")
+    parser.add_argument(
+        "--profile-threshold", type=float, default=0.0, help="Only keep profiles of calls slower than this many seconds"
+    )
+    parser.add_argument(
+        "--profile-format", choices=PROFILE_FORMATS, default="collapsed", help="Profile file format (default: collapsed)"
+    )
+    parser.add_argument(
+        "--profile-dir", type=str, default=DEFAULT_PROFILE_DIR, help=f"Directory for profiles (default: {DEFAULT_PROFILE_DIR})"
+    )
+    parser.add_argument("--transport", choices=["stdio", "http"], default="stdio", help="MCP transport (default: stdio)")
+    parser.add_argument(
+        "--host", type=str, default="127.0.0.1", help="Address the HTTP transport binds to (default: 127.0.0.1)"
+    )
+    parser.add_argument("--port", type=int, default=8000, help="Port of the HTTP transport (default: 8000)")
+    parser.add_argument(
+        "--max-models",
+        type=int,
+        default=4,
+        help="Models whose decoded tables stay cached with the HTTP transport (default: 4)",
+    )
+    parser.add_argument("--workers", type=int, help="Maximum number of tool calls running in worker threads at once")
+    parser.add_argument(
+        "--shutdown-timeout",
+        type=float,
+        default=30.0,
+        help="Seconds the HTTP transport waits for running requests on shutdown (default: 30)",
+    )
     return parser.parse_args()
 
 
@@ -36,8 +116,10 @@ def parse_args():
 args = parse_args()
 disallowed_tools = args.disallow
 MAX_ROWS = args.max_rows
+MAX_SAMPLE_ROWS = args.max_sample_rows
 PAGE_SIZE = args.page_size
 AUTO_LOAD_FILE = args.load_file
+CATALOG_PATH = args.catalog
 
 
 # Custom JSON encoder to handle NumPy arrays and other non-serializable types
@@ -51,6 +133,10 @@ class NumpyEncoder(json.JSONEncoder):
             return float(obj)
         if isinstance(obj, np.bool_):
             return bool(obj)
+        if isinstance(obj, (pd.Timestamp, np.datetime64)):
+            return pd.Timestamp(obj).isoformat()
+        if isinstance(obj, pd.Timedelta):
+            return str(obj)
         return super().default(obj)
 
 
@@ -63,11 +149,344 @@ mcp = FastMCP("PBIXRay")
 original_tool_decorator = mcp.tool
 
 
+class ResponseCache:
+    """
+    LRU cache of tool responses, keyed by tool name, normalized arguments and model fingerprint.
+
+    The cache is bounded both by number of entries and by total response size.
+    Each entry remembers the model it was computed for, so a response is never
+    served for a different model that happens to share its fingerprint.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_entries=None, max_bytes=None):
+        """Change the size bounds, evicting entries as needed."""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key, model):
+        """Return the cached response for a key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0]() is model:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, model, response):
+        """Store a response computed for a model."""
+        size = len(response)
+        if size > self.max_bytes:
+            return
+        try:
+            model_ref = weakref.ref(model) if model is not None else (lambda: None)
+        except TypeError:
+            model_ref = lambda: model  # noqa: E731
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key)[1])
+            self._entries[key] = (model_ref, response)
+            self._size += size
+            self._evict()
+
+    def _evict(self):
+        # Must be called with the lock held
+        while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+            _, (_, response) = self._entries.popitem(last=False)
+            self._size -= len(response)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached response, e.g. when another model is loaded."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        """Hit, miss and eviction counts, hit rate and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+response_cache = ResponseCache()
+
+# Relative dates make a response depend on the current time, so it is not cached
+_TIME_RELATIVE_ARGUMENT = re.compile(r"\b(?:today|now|last[_ ]\d+[_ ][a-z]+)\b", re.IGNORECASE)
+
+
+def cached_tool(func, tool_name):
+    """
+    Wrap a tool so that its responses are served from the response cache.
+
+    Error responses and calls whose arguments contain relative dates are not cached.
+    """
+    signature = inspect.signature(func)
+    context_parameters = {
+        name for name, parameter in signature.parameters.items() if parameter.annotation is Context or name == "ctx"
+    }
+
+    def cache_key(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = {name: value for name, value in bound.arguments.items() if name not in context_parameters}
+        if any(isinstance(value, str) and _TIME_RELATIVE_ARGUMENT.search(value) for value in arguments.values()):
+            return None
+        model = active_model()
+        fingerprint = get_model_fingerprint(model) if model is not None else None
+        return (tool_name, json.dumps(arguments, sort_keys=True, default=str), fingerprint)
+
+    def store(key, model, response):
+        if isinstance(response, str) and not response.startswith("Error"):
+            response_cache.put(key, model, response)
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            key = cache_key(args, kwargs) if response_cache.enabled else None
+            if key is None:
+                return await func(*args, **kwargs)
+            model = active_model()
+            response = response_cache.get(key, model)
+            if response is None:
+                response = await func(*args, **kwargs)
+                store(key, model, response)
+            return response
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = cache_key(args, kwargs) if response_cache.enabled else None
+        if key is None:
+            return func(*args, **kwargs)
+        model = active_model()
+        response = response_cache.get(key, model)
+        if response is None:
+            response = func(*args, **kwargs)
+            store(key, model, response)
+        return response
+
+    return wrapper
+
+
+# Per-tool call metrics, and the metrics of the call running in the current task
+tool_metrics = ToolMetrics()
+_current_call = contextvars.ContextVar("current_call", default=None)
+
+# Spans of the stages of tool calls, exported when --trace-file is set
+tracer = Tracer()
+
+# Profiler of selected or slow tool calls, enabled with --profile or set_profiling
+tool_profiler = ToolProfiler()
+
+
+def current_model_label():
+    """Label identifying the loaded model in metrics."""
+    model, file_path = current_snapshot()
+    if model is None:
+        return "none"
+    if file_path:
+        return os.path.basename(file_path)
+    return get_model_fingerprint(model)
+
+
+def note_rows(count):
+    """Record the number of data rows returned by the running tool call."""
+    call = _current_call.get()
+    if call is not None:
+        call["rows"] = (call["rows"] or 0) + int(count)
+
+
+# Limit of tool calls running in worker threads at once, set with --workers
+WORKERS = None
+_worker_limiter = None
+
+
+def worker_limiter():
+    """The capacity limiter of worker threads, or None to use the default of anyio."""
+    global _worker_limiter
+    if WORKERS and _worker_limiter is None:
+        # Created on first use, inside the event loop
+        _worker_limiter = anyio.CapacityLimiter(WORKERS)
+    return _worker_limiter
+
+
+async def run_in_thread(fn, *args, stage=None):
+    """
+    Run a blocking function in a worker thread, recording for the running tool call
+    how long it waited for a thread and how long it ran.
+
+    The call is traced as a span named after the stage (the function name by default),
+    with "thread.wait" and "thread.run" child spans.
+    """
+    call = _current_call.get()
+    times = {"submitted": time.perf_counter(), "submitted_ns": time.time_ns()}
+
+    profile = call["profile"] if call is not None else None
+
+    def run():
+        times["started"], times["started_ns"] = time.perf_counter(), time.time_ns()
+        try:
+            with profile.thread() if profile else contextlib.nullcontext():
+                return fn(*args)
+        finally:
+            times["finished_ns"] = time.time_ns()
+            if call is not None:
+                call["queue_time"] += times["started"] - times["submitted"]
+                call["thread_time"] += time.perf_counter() - times["started"]
+
+    with tracer.span(stage or getattr(fn, "__name__", "thread")):
+        try:
+            return await anyio.to_thread.run_sync(run, limiter=worker_limiter())
+        finally:
+            if "started_ns" in times:
+                tracer.add_span("thread.wait", times["submitted_ns"], times["started_ns"])
+                tracer.add_span("thread.run", times["started_ns"], times["finished_ns"])
+
+
+def measured_tool(func, tool_name):
+    """
+    Wrap a tool to record its latency, thread-pool times, response size, rows and errors,
+    to trace it and, when the profiler selects it, to profile it. Async tools log the
+    trace ID of the call through ctx.info.
+    """
+
+    def begin():
+        # Pin the model for the whole call; a model loaded meanwhile is used by later calls
+        snapshot = live_snapshot()
+        pin_model(snapshot.model)
+        call = {
+            "pin": _pinned_snapshot.set(snapshot),
+            "pinned_model": snapshot.model,
+            "model": current_model_label(),
+            "queue_time": 0.0,
+            "thread_time": 0.0,
+            "rows": None,
+            "profile": tool_profiler.start(tool_name),
+        }
+        return call, _current_call.set(call), time.perf_counter()
+
+    def finish(call, token, started, response, error, span):
+        _current_call.reset(token)
+        _pinned_snapshot.reset(call["pin"])
+        unpin_model(call["pinned_model"])
+        elapsed = time.perf_counter() - started
+        error = error or (isinstance(response, str) and response.startswith("Error"))
+        size = len(response.encode("utf-8")) if isinstance(response, str) else None
+        profile_path = call["profile"].stop(elapsed) if call["profile"] else None
+        if span is not None:
+            span.set_attribute("profile", profile_path)
+            span.set_attribute("response_bytes", size)
+            span.set_attribute("rows", call["rows"])
+            if error and isinstance(response, str):
+                span.set_error(response[:200])
+        tool_metrics.record(
+            tool_name,
+            call["model"],
+            elapsed,
+            response_bytes=size,
+            rows=call["rows"],
+            error=error,
+            queue_time=call["queue_time"],
+            thread_time=call["thread_time"],
+        )
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            call, token, started = begin()
+            response, error = None, True
+            with tracer.span(f"tool/{tool_name}", tool=tool_name, model=call["model"]) as span:
+                try:
+                    ctx = kwargs.get("ctx", args[0] if args else None)
+                    if span is not None and ctx is not None:
+                        await ctx.info(f"Trace ID for {tool_name}: {span.trace_id}")
+                    response = await func(*args, **kwargs)
+                    error = False
+                    return response
+                finally:
+                    finish(call, token, started, response, error, span)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        call, token, started = begin()
+        response, error = None, True
+        with tracer.span(f"tool/{tool_name}", tool=tool_name, model=call["model"]) as span:
+            try:
+                with call["profile"].thread() if call["profile"] else contextlib.nullcontext():
+                    response = func(*args, **kwargs)
+                error = False
+                return response
+            finally:
+                finish(call, token, started, response, error, span)
+
+    return wrapper
+
+
+def model_ready_tool(func):
+    """
+    Wrap a tool for MCP clients so that, while the files given with --load-file are still
+    loading, calls wait for the current model instead of failing. The wrapper is async so
+    that waiting never blocks the event loop, even for sync tools.
+    """
+
+    @functools.wraps(func)
+    async def ready_wrapper(*args, **kwargs):
+        error = await wait_for_startup_model()
+        if error:
+            return error
+        response = func(*args, **kwargs)
+        if inspect.isawaitable(response):
+            response = await response
+        return response
+
+    return ready_wrapper
+
+
 # Create a secure wrapper for tool registration
-def secure_tool(*args, **kwargs):
+def secure_tool(*args, cache=True, wait_for_model=True, **kwargs):
     """
     Decorator that wraps the original FastMCP tool decorator to check if a tool
     is allowed to run before executing it.
+
+    Responses of allowed tools are memoized in the response cache unless
+    cache=False is passed, for tools with side effects or non-deterministic output.
+    Calls from MCP clients wait for the model loading at startup unless
+    wait_for_model=False is passed, for tools that do not use the current model.
     """
     # Get the original decorator
     original_decorator = original_tool_decorator(*args, **kwargs)
@@ -87,8 +506,15 @@ def secure_tool(*args, **kwargs):
             # Register the disabled tool with the original decorator
             return original_decorator(disabled_tool)
         else:
-            # If the tool is allowed, just use the original decorator
-            return original_decorator(func)
+            # If the tool is allowed, serve repeated calls from the response cache
+            if cache:
+                func = cached_tool(func, tool_name)
+            func = measured_tool(func, tool_name)
+            if not wait_for_model:
+                return original_decorator(func)
+            # Only MCP calls wait; the module-level function stays as it is
+            original_decorator(model_ready_tool(func))
+            return func
 
     return new_decorator
 
@@ -98,9 +524,190 @@ def secure_tool(*args, **kwargs):
 
 mcp.tool = secure_tool
 
-# Global variable to store the currently loaded model
-current_model: Optional[PBIXRay] = None
-current_model_path: Optional[str] = None
+
+class ModelSnapshot(NamedTuple):
+    """An immutable pairing of a loaded model with the file it was loaded from."""
+
+    model: Optional[PBIXRay]
+    file_path: Optional[str]
+
+
+NO_MODEL = ModelSnapshot(None, None)
+
+# The server-wide model. Loading a file builds the new model first and then publishes a new
+# snapshot with a single assignment, so readers never see a model with another model's path.
+_model_snapshot = NO_MODEL
+
+# Snapshot pinned by the running tool call, so that it works on one model from start to end
+_pinned_snapshot = contextvars.ContextVar("pinned_snapshot", default=None)
+
+
+# Running tool calls per model, keyed by id(model): a model pinned by a call is still in use
+# even after another snapshot has been published
+_model_pins = {}
+_pin_lock = threading.Lock()
+
+# Released models that running calls still pin, keyed by id(model); the last call to finish closes them
+_released_models = {}
+
+
+def publish_snapshot(snapshot):
+    """Atomically replace the server-wide model snapshot."""
+    global _model_snapshot
+    _model_snapshot = snapshot
+
+
+def pin_model(model):
+    """Count a running call that works on a model, until unpin_model is called."""
+    if model is None:
+        return
+    with _pin_lock:
+        entry = _model_pins.setdefault(id(model), [model, 0])
+        entry[1] += 1
+
+
+def unpin_model(model):
+    """Release a pin taken with pin_model."""
+    if model is None:
+        return
+    released = None
+    with _pin_lock:
+        entry = _model_pins[id(model)]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _model_pins[id(model)]
+            released = _released_models.pop(id(model), None)
+    if released is not None and not model_in_use(released):
+        _close_released(released)
+
+
+# With the HTTP transport every MCP session selects its own model; sessions without a
+# selection use the server-wide model above (e.g. the one given with --load-file).
+# Sessions that load the same file share one PBIXRay instance and its caches.
+SESSION_MODELS = False
+_session_models = weakref.WeakKeyDictionary()
+_shared_models = weakref.WeakValueDictionary()
+_session_lock = threading.Lock()
+
+
+def current_session():
+    """The MCP session of the running request, when models are selected per session."""
+    if not SESSION_MODELS:
+        return None
+    try:
+        return mcp.get_context().session
+    except (LookupError, ValueError):
+        return None
+
+
+def live_snapshot():
+    """The snapshot currently selected by the calling session, or the server-wide one."""
+    session = current_session()
+    if session is not None:
+        snapshot = _session_models.get(session)
+        if snapshot is not None:
+            return snapshot
+    return _model_snapshot
+
+
+def current_snapshot():
+    """The snapshot pinned by the running tool call, or the live one outside tool calls."""
+    return _pinned_snapshot.get() or live_snapshot()
+
+
+def active_model():
+    """The model the calling session works on."""
+    return current_snapshot().model
+
+
+def active_model_path():
+    """Path of the model the calling session works on."""
+    return current_snapshot().file_path
+
+
+def select_model(model, file_path):
+    """
+    Make a model the current model of the calling session, or of the whole server outside sessions.
+
+    Returns:
+        The snapshot that was replaced
+    """
+    snapshot = ModelSnapshot(model, file_path) if model is not None else NO_MODEL
+    session = current_session()
+    if session is None:
+        previous = _model_snapshot
+        publish_snapshot(snapshot)
+    else:
+        with _session_lock:
+            previous = _session_models.get(session, NO_MODEL)
+            _session_models[session] = snapshot
+    if model is not None:
+        _shared_models[get_model_fingerprint(model)] = model
+    return previous
+
+
+def shared_model(file_path):
+    """A model already loaded by any session for this exact file version, or None."""
+    return _shared_models.get(compute_file_fingerprint(file_path))
+
+
+def _pinned_elsewhere(model):
+    # Must be called with the pin lock held; the calling tool call's own pin does not count
+    own = 1 if current_snapshot().model is model else 0
+    entry = _model_pins.get(id(model))
+    return entry is not None and entry[1] > own
+
+
+def model_selected(model):
+    """Whether the server or any session has a model selected."""
+    with _session_lock:
+        snapshots = [_model_snapshot, *_session_models.values()]
+    return any(snapshot.model is model for snapshot in snapshots)
+
+
+def model_in_use(model):
+    """Whether the server, any session or a tool call other than the calling one still works on a model."""
+    if model_selected(model):
+        return True
+    with _pin_lock:
+        return _pinned_elsewhere(model)
+
+
+def release_model(model):
+    """
+    Drop the caches of a model that is no longer selected and close it.
+
+    A model still selected by the server or another session stays open. A model
+    that other running calls still pin is closed when the last of them finishes,
+    so that no call sees its tables disappear halfway through.
+    """
+    if model is None or model_selected(model):
+        return
+    forget_startup_model(model)
+    with _session_lock:
+        for fingerprint, shared in list(_shared_models.items()):
+            if shared is model:
+                del _shared_models[fingerprint]
+    with _pin_lock:
+        if _pinned_elsewhere(model):
+            _released_models[id(model)] = model
+            return
+    _close_released(model)
+
+
+def _close_released(model):
+    model_cache.discard(model)
+    close_model(model)
+
+
+def switch_model(model, file_path):
+    """Select a model for the calling session, or the server, and release the model it replaces."""
+    previous = select_model(model, file_path)
+    if previous.model is not model:
+        if not SESSION_MODELS:
+            # Caches are shared between sessions and only trimmed for a single-model server
+            response_cache.clear()
+        release_model(previous.model)
 
 
 # Helper function for async processing of potentially slow model operations
@@ -117,8 +724,6 @@ async def run_model_operation(ctx: Context, operation_name: str, operation_fn, *
     Returns:
         The result of the operation
     """
-    import time
-
     start_time = time.time()
 
     # Log start of operation
@@ -132,7 +737,7 @@ async def run_model_operation(ctx: Context, operation_name: str, operation_fn, *
             return operation_fn(*args, **kwargs)
 
         # Execute in thread pool to avoid blocking the event loop
-        result = await anyio.to_thread.run_sync(run_operation)
+        result = await run_in_thread(run_operation)
 
         # Report completion
         elapsed_time = time.time() - start_time
@@ -146,600 +751,3698 @@ async def run_model_operation(ctx: Context, operation_name: str, operation_fn, *
         raise
 
 
-@mcp.tool()
-async def load_pbix_file(file_path: str, ctx: Context) -> str:
+# Fingerprints of loaded models, keyed by the PBIXRay instance they describe
+_model_fingerprints = weakref.WeakKeyDictionary()
+
+
+def compute_file_fingerprint(file_path):
     """
-    Load a Power BI (.pbix) file for analysis.
+    Compute a cheap fingerprint for a PBIX file from its path, size and modification time.
 
     Args:
-        file_path: Path to the .pbix file to load
+        file_path: Path to the .pbix file
 
     Returns:
-        A message confirming the file was loaded
+        A short hex string that changes whenever the file changes
     """
-    global current_model, current_model_path
-
-    file_path = os.path.expanduser(file_path)
-    if not os.path.exists(file_path):
-        return f"Error: File '{file_path}' not found."
+    try:
+        stat = os.stat(file_path)
+        key = f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    except OSError:
+        key = os.path.abspath(file_path)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
 
-    if not file_path.lower().endswith(".pbix"):
-        return f"Error: File '{file_path}' is not a .pbix file."
 
+def register_model(model, file_path):
+    """Record the fingerprint of a freshly loaded model."""
     try:
-        # Log the start of loading
-        ctx.info(f"Loading PBIX file: {file_path}")
-        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-        ctx.info(f"File size: {file_size_mb:.2f} MB")
+        _model_fingerprints[model] = compute_file_fingerprint(file_path)
+    except TypeError:
+        pass
 
-        # Report initial progress
-        await ctx.report_progress(0, 100)
 
-        # For large files, load in a separate thread to avoid blocking
-        if file_size_mb > 50:  # For files larger than 50MB
-            await ctx.info(f"Large file detected ({file_size_mb:.2f} MB). Loading asynchronously...")
+def get_model_fingerprint(model):
+    """
+    Get the fingerprint of a model.
 
-            # Create an event to track completion and a cancellation event
-            # load_complete = anyio.Event()  # Unused variable
-            cancel_progress = anyio.Event()
-            load_error = None
+    Models that were not loaded through the server (e.g. in tests) get an
+    identity-based fingerprint so that caches still keep them apart.
+    """
+    try:
+        return _model_fingerprints[model]
+    except (KeyError, TypeError):
+        return f"mem-{id(model):x}"
 
-            # Start progress reporting in the background
-            async def progress_reporter():
-                progress = 5
-                try:
-                    while not cancel_progress.is_set() and progress < 95:
-                        await ctx.report_progress(progress, 100)
-                        progress += 5 if progress < 50 else 2  # Slower progress after 50%
-                        await anyio.sleep(1)
-                except Exception as e:
-                    await ctx.info(f"Progress reporting error: {str(e)}")
 
-            # Function to run in thread pool
-            def load_pbixray():
-                nonlocal load_error
-                try:
-                    return PBIXRay(file_path)
-                except Exception as e:
-                    load_error = e
-                    return None
+class _ModelState:
+    """Decoded tables, artifacts and per-key locks of one model."""
 
-            # Start progress reporter task
-            progress_task = asyncio.create_task(progress_reporter())
+    def __init__(self, model):
+        try:
+            self.ref = weakref.ref(model)
+        except TypeError:
+            self.ref = lambda: model
+        self.tables = OrderedDict()
+        self.artifacts = {}
+        self.key_locks = {}
 
-            try:
-                # Load the file in a thread pool
-                pbix_model = await anyio.to_thread.run_sync(load_pbixray)
 
-                # Check for errors during loading
-                if load_error:
-                    await ctx.info(f"Error loading PBIX file: {str(load_error)}")
-                    return f"Error loading file: {str(load_error)}"
+class ModelCache:
+    """
+    Thread-safe cache of decoded tables and derived artifacts, per model.
+
+    Decoding a table is by far the most expensive step of every data tool, so
+    decoded frames are kept in a small LRU and reused across calls. Derived
+    artifacts (profiles, indexes, ...) are memoized next to them. Entries of up
+    to max_models models are kept; using another model evicts the least
+    recently used one, so with the default of one model the cache resets itself
+    as soon as it is used with a different model.
+    """
 
-                # Set the global model reference
-                current_model = pbix_model
-            finally:
-                # Cancel progress reporting
-                cancel_progress.set()
-                await progress_task
-        else:
-            # For smaller files, load directly
-            current_model = PBIXRay(file_path)
+    def __init__(self, max_tables=8, max_models=1):
+        self.max_tables = max_tables
+        self.max_models = max_models
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _state(self, model):
+        # Must be called with the lock held
+        state = self._models.get(id(model))
+        if state is not None and state.ref() is model:
+            self._models.move_to_end(id(model))
+            return state
+        # Drop the entries of models that were garbage collected
+        for key in [key for key, entry in self._models.items() if entry.ref() is None]:
+            del self._models[key]
+        state = self._models[id(model)] = _ModelState(model)
+        while len(self._models) > max(1, self.max_models):
+            self._models.popitem(last=False)
+        return state
+
+    def _owns(self, model, state):
+        # Must be called with the lock held; False once the model was evicted or discarded
+        return self._models.get(id(model)) is state
+
+    def _key_lock(self, model, key):
+        # Per-key lock so concurrent requests for the same entry compute it only once
+        with self._lock:
+            return self._state(model).key_locks.setdefault(key, threading.Lock())
+
+    def _decoded(self, model, key, decode_fn):
+        # Frame cached under key (a table name, or a (table, columns) projection), decoded on first use
+        with self._lock:
+            tables = self._state(model).tables
+            frame = tables.get(key)
+            if frame is not None:
+                tables.move_to_end(key)
+                return frame
+
+        with self._key_lock(model, ("table", key)):
+            with self._lock:
+                state = self._state(model)
+                frame = state.tables.get(key)
+            if frame is not None:
+                return frame
+            frame = decode_fn()
+
+            with self._lock:
+                # The model may have been evicted while this table was decoding
+                if self._owns(model, state):
+                    state.tables[key] = frame
+                    while len(state.tables) > self.max_tables:
+                        state.tables.popitem(last=False)
+        return frame
+
+    def get_table(self, model, table_name):
+        """Return the decoded frame for a table, decoding it on first use."""
+        return self._decoded(model, table_name, lambda: model.get_table(table_name))
+
+    def get_columns(self, model, table_name, columns):
+        """
+        Return a frame with only some columns of a table. Only those columns are decoded,
+        unless the whole table is already in the cache.
+        """
+        columns = list(dict.fromkeys(columns))
+        with self._lock:
+            tables = self._state(model).tables
+            frame = tables.get(table_name)
+            if frame is not None:
+                tables.move_to_end(table_name)
+                return frame[columns]
+        return self._decoded(model, (table_name, tuple(columns)), lambda: decode_columns(model, table_name, columns))
+
+    def has_table(self, model, table_name):
+        """Check whether a table is already decoded for the given model."""
+        with self._lock:
+            state = self._models.get(id(model))
+            return state is not None and state.ref() is model and table_name in state.tables
+
+    def memoize(self, model, key, compute_fn):
+        """Return a cached artifact for the model, computing it on first use."""
+        with self._lock:
+            artifacts = self._state(model).artifacts
+            if key in artifacts:
+                return artifacts[key]
+
+        with self._key_lock(model, ("artifact", key)):
+            with self._lock:
+                state = self._state(model)
+                if key in state.artifacts:
+                    return state.artifacts[key]
+            value = compute_fn()
+
+            with self._lock:
+                if self._owns(model, state):
+                    state.artifacts[key] = value
+        return value
+
+    def discard(self, model):
+        """Drop the cached tables and artifacts of one model."""
+        with self._lock:
+            state = self._models.get(id(model))
+            if state is not None and state.ref() is model:
+                del self._models[id(model)]
+
+    def clear(self):
+        """Drop every cached table and artifact."""
+        with self._lock:
+            self._models.clear()
+
+    def stats(self):
+        """Names of the decoded tables and number of memoized artifacts."""
+        with self._lock:
+            states = list(self._models.values())
+        return {
+            "tables": [table_label(key) for state in states for key in state.tables],
+            "max_tables": self.max_tables,
+            "artifacts": sum(len(state.artifacts) for state in states),
+            "models": len(states),
+        }
 
-        # Set the path and report completion
-        current_model_path = file_path
-        await ctx.report_progress(100, 100)
-        return f"Successfully loaded '{os.path.basename(file_path)}'"
-    except Exception as e:
-        ctx.info(f"Error loading PBIX file: {str(e)}")
-        return f"Error loading file: {str(e)}"
+    def memory_usage(self):
+        """Estimated bytes held by each decoded table and by each kind of memoized artifact."""
+        with self._lock:
+            states = [
+                (state.ref(), list(state.tables.items()), list(state.artifacts.items())) for state in self._models.values()
+            ]
 
+        usage = {"tables": {}, "artifacts": {}}
+        for model, tables, artifacts in states:
+            # Table names are qualified by the model once several models are cached
+            prefix = f"{get_model_fingerprint(model)}:" if len(states) > 1 else ""
+            for key, frame in tables:
+                usage["tables"][prefix + table_label(key)] = estimate_size(frame)
+            for key, value in artifacts:
+                kind = key[0] if isinstance(key, tuple) and key else str(key)
+                usage["artifacts"][kind] = usage["artifacts"].get(kind, 0) + estimate_size(value)
+        return usage
 
-@mcp.tool()
-def get_tables(ctx: Context) -> str:
-    """
-    List all tables in the model.
 
-    Returns:
-        A list of tables in the model
-    """
+# Decoded tables and derived artifacts of the loaded models
+model_cache = ModelCache()
 
-    if current_model is None:
-        return "Error: No Power BI file loaded. Please use load_pbix_file first."
 
+def table_label(key):
+    """Name of a model cache entry: the table name, followed by the columns of a projection."""
+    if isinstance(key, tuple):
+        table_name, columns = key
+        return f"{table_name}[{', '.join(columns)}]"
+    return key
+
+
+def decode_columns(model, table_name, columns):
+    """Decode some columns of a table. Models whose get_table cannot select columns decode the whole table."""
     try:
-        tables = current_model.tables
-        if isinstance(tables, (list, np.ndarray)):
-            return json.dumps(tables.tolist() if isinstance(tables, np.ndarray) else tables, indent=2)
-        else:
-            return str(tables)
-    except Exception as e:
-        ctx.info(f"Error retrieving tables: {str(e)}")
-        return f"Error retrieving tables: {str(e)}"
+        projects = "columns" in inspect.signature(model.get_table).parameters
+    except (TypeError, ValueError):
+        projects = False
+    if projects:
+        return model.get_table(table_name, columns=list(columns))
+    return model.get_table(table_name)[list(columns)]
 
 
-@mcp.tool()
-def get_metadata(ctx: Context) -> str:
-    """
-    Get metadata about the Power BI configuration used during model creation.
+def schema_columns(model, table_name):
+    """Column names of a table according to the model schema, or an empty list if unknown."""
+    schema = getattr(model, "schema", None)
+    if not isinstance(schema, pd.DataFrame) or not {"TableName", "ColumnName"} <= set(schema.columns):
+        return []
+    return schema.loc[schema["TableName"] == table_name, "ColumnName"].tolist()
 
-    Returns:
-        The metadata as a formatted string
-    """
 
-    if current_model is None:
-        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+# Supported filter operators, longest first so ">=" is not read as ">"
+FILTER_OPERATORS = [">=", "<=", "!=", "=", ">", "<"]
 
-    try:
-        # Get the metadata DataFrame
-        metadata_df = current_model.metadata
+_FILTER_FUNCTIONS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
 
-        # Create a dictionary from the name-value pairs
-        result = {}
-        for _, row in metadata_df.iterrows():
-            name = row["Name"]
-            value = row["Value"]
-            result[name] = value
 
-        # Return as formatted JSON
-        return json.dumps(result, indent=2)
-    except Exception as e:
-        ctx.info(f"Error retrieving metadata: {str(e)}")
-        return f"Error retrieving metadata: {str(e)}"
+class FilterError(ValueError):
+    """Raised when a filter expression or column selection cannot be applied. The message is user-facing."""
 
 
-@mcp.tool()
-def get_power_query(ctx: Context) -> str:
+def parse_filters(filters):
     """
-    Display all M/Power Query code used for data transformation.
+    Parse a semicolon separated filter string into conditions.
+
+    Args:
+        filters: Filter conditions such as "locationid=albacete;period>100"
 
     Returns:
-        A list of all Power Query expressions with their table names
+        A list of (condition, column, operator, raw value) tuples
     """
+    conditions = []
+    for condition in filters.split(";"):
+        for op in FILTER_OPERATORS:
+            if op in condition:
+                col_name, value = condition.split(op, 1)
+                conditions.append((condition, col_name.strip(), op, value.strip()))
+                break
+        else:
+            raise FilterError(
+                f"Error: Invalid filter condition '{condition}'. Must contain one of these operators: =, >, <, >=, <=, !="
+            )
+    return conditions
 
-    if current_model is None:
-        return "Error: No Power BI file loaded. Please use load_pbix_file first."
 
+def coerce_filter_value(value):
+    """Convert a raw filter value to int or float when possible, otherwise keep the string."""
     try:
-        # Power query returns a DataFrame with TableName and Expression columns
-        power_query = current_model.power_query
-        # Convert DataFrame to dict for JSON serialization
-        return power_query.to_json(orient="records", indent=2)
-    except Exception as e:
-        ctx.info(f"Error retrieving Power Query: {str(e)}")
-        return f"Error retrieving Power Query: {str(e)}"
+        if "." in value:
+            return float(value)
+        return int(value)
+    except ValueError:
+        return value
 
 
-@mcp.tool()
-def get_m_parameters(ctx: Context) -> str:
-    """
-    Display all M Parameters values.
+# Relative date literals such as "today", "now-12h" or "today-30d"
+_RELATIVE_DATE = re.compile(r"^(today|now)\s*(?:([+-])\s*(\d+)\s*([hdwmqy]))?$", re.IGNORECASE)
 
-    Returns:
-        A list of parameter info with names, descriptions, and expressions
-    """
+# Rolling ranges such as "last_30_days", matching the period up to the end of today (or now for hours)
+_LAST_PERIOD = re.compile(r"^last[_ ](\d+)[_ ](hour|day|week|month|quarter|year)s?$", re.IGNORECASE)
 
-    if current_model is None:
-        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+# Partial dates cover a whole day, month, quarter or year
+_DATE_PERIODS = (
+    (re.compile(r"^\d{4}-\d{1,2}-\d{1,2}$"), "D"),
+    (re.compile(r"^\d{4}-\d{1,2}$"), "M"),
+    (re.compile(r"^\d{4}-?Q[1-4]$", re.IGNORECASE), "Q"),
+    (re.compile(r"^\d{4}$"), "Y"),
+)
 
-    try:
-        m_parameters = current_model.m_parameters
-        return m_parameters.to_json(orient="records", indent=2)
-    except Exception as e:
-        ctx.info(f"Error retrieving M Parameters: {str(e)}")
-        return f"Error retrieving M Parameters: {str(e)}"
+_DATE_UNITS = {
+    "h": lambda n: pd.Timedelta(hours=n),
+    "d": lambda n: pd.Timedelta(days=n),
+    "w": lambda n: pd.Timedelta(weeks=n),
+    "m": lambda n: pd.DateOffset(months=n),
+    "q": lambda n: pd.DateOffset(months=3 * n),
+    "y": lambda n: pd.DateOffset(years=n),
+}
 
 
-@mcp.tool()
-def get_model_size(ctx: Context) -> str:
+def current_time():
+    """Return the current local time, which relative date filters are anchored on."""
+    return pd.Timestamp.now()
+
+
+def parse_date_value(value, tz=None):
     """
-    Get the model size in bytes.
+    Parse a date filter value.
+
+    Accepts ISO dates and datetimes ("2024-03-01", "2024-03-01T08:30"),
+    partial dates ("2024-03", "2024-Q1", "2024") and relative literals
+    ("today", "now", "today-30d", "now-6h", "today+1m").
+
+    Args:
+        value: The raw filter value
+        tz: Timezone of the column, if it is timezone-aware
 
     Returns:
-        The size of the model in bytes
+        A (start, end) tuple. Day literals and partial dates cover the whole
+        period [start, end); instants have end set to None.
     """
+    relative = _RELATIVE_DATE.match(value.strip())
+    if relative:
+        anchor, sign, amount, unit = relative.groups()
+        start = current_time()
+        if anchor.lower() == "today":
+            start = start.normalize()
+        if amount:
+            offset = _DATE_UNITS[unit.lower()](int(amount))
+            start = start + offset if sign == "+" else start - offset
+        end = start + pd.Timedelta(days=1) if anchor.lower() == "today" else None
+    else:
+        freq = next((freq for pattern, freq in _DATE_PERIODS if pattern.match(value.strip())), None)
+        try:
+            if freq:
+                period = pd.Period(value.strip().replace("-Q", "Q").replace("-q", "Q"), freq=freq)
+                start, end = period.start_time, (period + 1).start_time
+            else:
+                start, end = pd.Timestamp(value.strip()), None
+        except (ValueError, TypeError):
+            raise FilterError(f"Error: '{value}' is not a valid date. Use YYYY-MM-DD, an ISO datetime or today/now-Nd.")
 
-    if current_model is None:
-        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+    if tz is not None and start.tzinfo is None:
+        start = start.tz_localize(tz)
+        end = end.tz_localize(tz) if end is not None else None
+    return start, end
 
-    try:
-        size = current_model.size
-        return f"Model size: {size} bytes ({size / (1024 * 1024):.2f} MB)"
-    except Exception as e:
-        ctx.info(f"Error retrieving model size: {str(e)}")
-        return f"Error retrieving model size: {str(e)}"
 
+def build_date_mask(column, op, value):
+    """
+    Compare a datetime64 column with a date filter value as datetime64, not as text.
 
-@mcp.tool()
-def get_dax_tables(ctx: Context) -> str:
+    Day literals match the whole day, so "OrderDate=2024-03-01" matches every
+    time on that date and "OrderDate<=2024-03-01" includes it. Partial dates
+    match their whole month, quarter or year in the same way. With "=" and
+    "!=", "last_N_days" (or hours, weeks, months, quarters, years) selects a
+    rolling range ending today.
     """
-    View DAX calculated tables.
+    tz = getattr(column.dt, "tz", None)
+    rolling = _LAST_PERIOD.match(value.strip())
+    if rolling and op in ("=", "!="):
+        amount, unit = int(rolling.group(1)), rolling.group(2).lower()
+        now = current_time()
+        end = now if unit == "hour" else now.normalize() + pd.Timedelta(days=1)
+        start = end - _DATE_UNITS[unit[0]](amount)
+        if tz is not None:
+            start, end = start.tz_localize(tz), end.tz_localize(tz)
+        in_range = ((column >= start) & (column < end)).to_numpy()
+        return in_range if op == "=" else ~in_range & column.notna().to_numpy()
+
+    start, end = parse_date_value(value, tz)
+    if end is None:
+        return np.asarray(_FILTER_FUNCTIONS[op](column, start), dtype=bool)
+
+    in_period = ((column >= start) & (column < end)).to_numpy()
+    if op == "=":
+        return in_period
+    if op == "!=":
+        return ~in_period & column.notna().to_numpy()
+    if op == ">":
+        return (column >= end).to_numpy()
+    if op == ">=":
+        return (column >= start).to_numpy()
+    if op == "<":
+        return (column < start).to_numpy()
+    return (column < end).to_numpy()
+
+
+def build_filter_mask(table_contents, table_name, conditions):
+    """
+    Evaluate parsed filter conditions against a table without materializing the filtered frame.
+
+    Args:
+        table_contents: The decoded table
+        table_name: Name of the table (used in error messages)
+        conditions: Conditions returned by parse_filters
 
     Returns:
-        A list of DAX calculated tables with names and expressions
+        A boolean NumPy array with one entry per row
     """
+    mask = np.ones(len(table_contents), dtype=bool)
+    for condition, col_name, op, value in conditions:
+        if col_name not in table_contents.columns:
+            raise FilterError(f"Error: Column '{col_name}' not found in table '{table_name}'.")
+        column = table_contents[col_name]
+        try:
+            if pd.api.types.is_datetime64_any_dtype(column):
+                mask &= build_date_mask(column, op, value)
+            else:
+                mask &= np.asarray(_FILTER_FUNCTIONS[op](column, coerce_filter_value(value)), dtype=bool)
+        except FilterError:
+            raise
+        except Exception as e:
+            raise FilterError(f"Error applying filter '{condition}': {str(e)}")
+    return mask
 
-    if current_model is None:
-        return "Error: No Power BI file loaded. Please use load_pbix_file first."
 
-    try:
-        dax_tables = current_model.dax_tables
-        return dax_tables.to_json(orient="records", indent=2)
-    except Exception as e:
-        ctx.info(f"Error retrieving DAX tables: {str(e)}")
-        return f"Error retrieving DAX tables: {str(e)}"
+def count_table_rows(model, table_name, filters=None):
+    """
+    Count the rows of a table, optionally after filtering.
 
+    Only the columns the filters use are decoded (one column for an unfiltered
+    count), unless the whole table is already cached. Unfiltered counts are the
+    frame length and filtered counts are the popcount of the filter mask, so no
+    page or filtered frame is ever built.
 
-@mcp.tool()
-def get_dax_measures(ctx: Context, table_name: str = None, measure_name: str = None) -> str:
+    Returns:
+        The number of matching rows
     """
-    Access DAX measures in the model with optional filtering.
+    conditions = parse_filters(filters) if filters else []
+    known = schema_columns(model, table_name)
+    columns = list(dict.fromkeys(col_name for _, col_name, _, _ in conditions)) or known[:1]
+    if columns and set(columns) <= set(known):
+        table_contents = model_cache.get_columns(model, table_name, columns)
+    else:
+        # Unknown columns are reported by build_filter_mask against the whole table
+        table_contents = model_cache.get_table(model, table_name)
+    if not conditions:
+        return len(table_contents)
+    mask = build_filter_mask(table_contents, table_name, conditions)
+    return int(np.count_nonzero(mask))
+
+
+def parse_column_list(table_contents, table_name, columns):
+    """
+    Resolve a comma separated column list against a table.
 
     Args:
-        table_name: Optional filter for measures from a specific table
-        measure_name: Optional filter for a specific measure by name
+        table_contents: The decoded table
+        table_name: Name of the table (used in error messages)
+        columns: Column names separated by commas, or None for all columns
 
     Returns:
-        A list of DAX measures with names, expressions, and other metadata
+        A list of column names
+    """
+    if not columns:
+        return list(table_contents.columns)
+    names = [name.strip() for name in columns.split(",") if name.strip()]
+    for name in names:
+        if name not in table_contents.columns:
+            raise FilterError(f"Error: Column '{name}' not found in table '{table_name}'.")
+    return names
+
+
+def _allocate_strata(strata_sizes, sample_size):
+    """Split a sample size across strata proportionally, using largest remainders for the leftover rows."""
+    total = strata_sizes.sum()
+    exact = strata_sizes * (sample_size / total)
+    allocation = np.minimum(np.floor(exact).astype(np.int64), strata_sizes)
+    leftover = sample_size - allocation.sum()
+    if leftover > 0:
+        spare = strata_sizes - allocation
+        order = np.argsort(-(exact - allocation), kind="stable")
+        for idx in order:
+            if leftover == 0:
+                break
+            if spare[idx] > 0:
+                allocation[idx] += 1
+                leftover -= 1
+    return allocation
+
+
+def sample_row_positions(table_contents, sample_size, seed, candidates=None, stratify_by=None):
     """
+    Pick the row positions of a random sample without touching the other rows.
 
-    if current_model is None:
-        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+    Args:
+        table_contents: The decoded table
+        sample_size: Number of rows to draw (capped at the number of candidates)
+        seed: Seed for the random generator, so samples can be reproduced
+        candidates: Optional sorted positions to sample from (e.g. rows matching a filter)
+        stratify_by: Optional column; rows are drawn from each of its values in proportion to their frequency
 
-    try:
-        # Get all measures
-        dax_measures = current_model.dax_measures
+    Returns:
+        A sorted array of row positions
+    """
+    rng = np.random.default_rng(seed)
+    population = len(table_contents) if candidates is None else len(candidates)
+    sample_size = min(sample_size, population)
+    if sample_size == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if stratify_by is None:
+        picked = rng.choice(population, size=sample_size, replace=False)
+    else:
+        values = table_contents[stratify_by].to_numpy()
+        if candidates is not None:
+            values = values[candidates]
+        # Nulls get code -1, shift so they form their own stratum
+        codes = pd.factorize(values)[0] + 1
+        order = np.argsort(codes, kind="stable")
+        strata_sizes = np.bincount(codes)
+        allocation = _allocate_strata(strata_sizes, sample_size)
+        bounds = np.concatenate(([0], np.cumsum(strata_sizes)))
+        picked = np.concatenate(
+            [
+                order[bounds[i] + rng.choice(size, size=allocation[i], replace=False)]
+                for i, size in enumerate(strata_sizes)
+                if allocation[i] > 0
+            ]
+        )
 
-        # Apply table filter if specified
-        if table_name:
-            dax_measures = dax_measures[dax_measures["TableName"] == table_name]
+    positions = picked if candidates is None else candidates[picked]
+    return np.sort(positions)
 
-        # Apply measure name filter if specified
+
+# Above this many values quantiles are computed on a fixed-seed subsample
+PROFILE_QUANTILE_SAMPLE = 1_000_000
+
+
+def is_infinite(value):
+    """Return True for a positive or negative infinite float"""
+    return isinstance(value, (float, np.floating)) and np.isinf(value)
+
+
+def profile_series(series, top_k=5, bins=10):
+    """
+    Compute a statistical profile of one column with vectorized operations.
+
+    Args:
+        series: The decoded column
+        top_k: Number of most frequent values to report
+        bins: Number of histogram bins for numeric and datetime columns
+
+    Returns:
+        A dictionary with null and distinct counts, range, mean, quantiles,
+        most frequent values and a histogram where applicable
+    """
+    profile = {"dtype": str(series.dtype), "row_count": len(series)}
+    nulls = series.isna().to_numpy()
+    values = series[~nulls]
+    profile["null_count"] = int(nulls.sum())
+
+    # One factorization gives distinct count and frequencies in a single pass
+    codes, uniques = pd.factorize(values)
+    frequencies = np.bincount(codes, minlength=len(uniques)) if len(codes) else np.zeros(0, dtype=np.int64)
+    profile["distinct_count"] = len(uniques)
+    if len(uniques):
+        top = np.argsort(-frequencies, kind="stable")[:top_k]
+        # JSON has no infinity, so infinite values are reported by name
+        profile["top_values"] = [
+            {"value": str(uniques[i]) if is_infinite(uniques[i]) else uniques[i], "count": int(frequencies[i])} for i in top
+        ]
+    else:
+        profile["top_values"] = []
+
+    if len(values) == 0:
+        return profile
+
+    is_datetime = pd.api.types.is_datetime64_any_dtype(series)
+    is_numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+    if is_numeric or is_datetime:
+        if is_datetime:
+            if getattr(values.dtype, "tz", None) is not None:
+                # Timezone-aware values are profiled as UTC instants
+                values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+            numbers = values.to_numpy().astype("datetime64[ns]").view(np.int64)
+        else:
+            numbers = values.to_numpy().astype(np.float64)
+            # Infinite values have no place in quantiles or histogram bins
+            finite = np.isfinite(numbers)
+            profile["non_finite_count"] = int((~finite).sum())
+            numbers = numbers[finite]
+            if len(numbers) == 0:
+                return profile
+
+        to_value = (lambda x: pd.Timestamp(int(x))) if is_datetime else float
+        profile["min"] = to_value(numbers.min())
+        profile["max"] = to_value(numbers.max())
+        profile["mean"] = to_value(numbers.mean())
+
+        sample = numbers
+        if len(numbers) > PROFILE_QUANTILE_SAMPLE:
+            rng = np.random.default_rng(0)
+            sample = numbers[rng.choice(len(numbers), size=PROFILE_QUANTILE_SAMPLE, replace=False)]
+        quantiles = np.quantile(sample, [0.05, 0.25, 0.5, 0.75, 0.95])
+        profile["quantiles"] = {label: to_value(q) for label, q in zip(["p05", "p25", "p50", "p75", "p95"], quantiles)}
+        profile["quantiles_approximate"] = len(numbers) > PROFILE_QUANTILE_SAMPLE
+
+        counts, edges = np.histogram(numbers, bins=bins)
+        profile["histogram"] = [
+            {"from": to_value(edges[i]), "to": to_value(edges[i + 1]), "count": int(counts[i])} for i in range(len(counts))
+        ]
+    else:
+        try:
+            profile["min"] = min(uniques)
+            profile["max"] = max(uniques)
+        except TypeError:
+            # Mixed types cannot be ordered
+            pass
+
+    return profile
+
+
+def profile_table_columns(model, table_name, columns=None, top_k=5, bins=10):
+    """
+    Profile the columns of a table, reusing cached profiles of the loaded model.
+
+    With a column list, only those columns are decoded when the schema knows
+    them; otherwise the whole table is decoded once through the model cache.
+    Every column profile is memoized, so repeated or overlapping requests are free.
+
+    Returns:
+        A dictionary mapping column names to their profiles
+    """
+    known = schema_columns(model, table_name)
+    if columns and known:
+        selected = [name.strip() for name in columns.split(",") if name.strip()]
+        for name in selected:
+            if name not in known:
+                raise FilterError(f"Error: Column '{name}' not found in table '{table_name}'.")
+        table_contents = model_cache.get_columns(model, table_name, selected)
+    else:
+        table_contents = model_cache.get_table(model, table_name)
+        selected = parse_column_list(table_contents, table_name, columns)
+    return {
+        name: model_cache.memoize(
+            model,
+            ("profile", table_name, name, top_k, bins),
+            lambda name=name: profile_series(table_contents[name], top_k, bins),
+        )
+        for name in selected
+    }
+
+
+def _decode_column_dictionary(model, table_name, column_name):
+    # Reuse the decoded table when it is already cached; otherwise ask PBIXRay
+    # for just this column as a categorical, whose categories are the VertiPaq
+    # dictionary and whose codes are the encoded data IDs.
+    column = None
+    if not model_cache.has_table(model, table_name):
+        try:
+            projected = model.get_table(table_name, columns=[column_name], strings_as_categorical=True)
+            column = projected[column_name]
+        except (TypeError, KeyError, ValueError):
+            # Older PBIXRay releases only decode whole tables
+            column = None
+    if column is None:
+        table_contents = model_cache.get_table(model, table_name)
+        parse_column_list(table_contents, table_name, column_name)
+        column = table_contents[column_name]
+
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes = column.cat.codes.to_numpy()
+        values = pd.Index(column.cat.categories)
+    else:
+        codes, values = pd.factorize(column)
+        values = pd.Index(values)
+
+    valid = codes >= 0
+    return {
+        "values": values,
+        "counts": np.bincount(codes[valid], minlength=len(values)),
+        "null_count": int(len(codes) - valid.sum()),
+    }
+
+
+def get_column_dictionary(model, table_name, column_name):
+    """
+    Get the dictionary of a column: its distinct values and how often each occurs.
+
+    Dictionaries are memoized per model, so each column is read at most once.
+
+    Returns:
+        A dictionary with "values" (pd.Index), "counts" (one count per value) and "null_count"
+    """
+    return model_cache.memoize(
+        model,
+        ("dictionary", table_name, column_name),
+        lambda: _decode_column_dictionary(model, table_name, column_name),
+    )
+
+
+# Worker threads used to search column dictionaries in parallel
+SEARCH_WORKERS = min(8, os.cpu_count() or 1)
+
+VALUE_MATCH_MODES = ("exact", "prefix", "contains")
+
+
+def list_model_columns(model, tables=None):
+    """
+    List the (table, column) pairs of a model from its schema, without decoding any data.
+
+    Args:
+        model: The loaded model
+        tables: Optional list of table names to restrict the listing to
+
+    Returns:
+        A list of (table name, column name) tuples
+    """
+    schema = model.schema
+    if tables:
+        schema = schema[schema["TableName"].isin(tables)]
+    return list(zip(schema["TableName"], schema["ColumnName"]))
+
+
+def _dictionary_text(model, table_name, column_name):
+    # Lower-cased string form of a column dictionary, memoized for repeated searches
+    def compute():
+        values = get_column_dictionary(model, table_name, column_name)["values"]
+        return np.asarray(values.astype(str).str.lower(), dtype=object)
+
+    return model_cache.memoize(model, ("dictionary_text", table_name, column_name), compute)
+
+
+def search_column_dictionary(model, table_name, column_name, value, match="exact"):
+    """
+    Search one column dictionary for a value (case-insensitive).
+
+    Returns:
+        A tuple of (row occurrences, matching dictionary values)
+    """
+    text = _dictionary_text(model, table_name, column_name)
+    needle = value.lower()
+    if match == "exact":
+        hits = text == needle
+    elif match == "prefix":
+        hits = np.fromiter((t.startswith(needle) for t in text), dtype=bool, count=len(text))
+    else:
+        hits = np.fromiter((needle in t for t in text), dtype=bool, count=len(text))
+    positions = np.flatnonzero(hits)
+    dictionary = get_column_dictionary(model, table_name, column_name)
+    return int(dictionary["counts"][positions].sum()), [dictionary["values"][i] for i in positions]
+
+
+def find_value_in_model(model, value, tables=None, match="exact", max_examples=5):
+    """
+    Find the tables and columns whose dictionaries contain a value.
+
+    Dictionaries are looked up in parallel across columns and cached, so raw
+    rows are never scanned.
+
+    Returns:
+        A tuple of (columns searched, list of matches, list of per-column errors)
+    """
+    columns = list_model_columns(model, tables)
+
+    def search(pair):
+        table_name, column_name = pair
+        try:
+            occurrences, values = search_column_dictionary(model, table_name, column_name, value, match)
+            return pair, occurrences, values, None
+        except Exception as e:
+            return pair, 0, [], str(e)
+
+    matches = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+        for (table_name, column_name), occurrences, values, error in executor.map(search, columns):
+            if error:
+                errors.append({"table_name": table_name, "column_name": column_name, "error": error})
+            elif values:
+                matches.append(
+                    {
+                        "table_name": table_name,
+                        "column_name": column_name,
+                        "occurrences": occurrences,
+                        "matching_values": len(values),
+                        "examples": values[:max_examples],
+                    }
+                )
+    matches.sort(key=lambda m: -m["occurrences"])
+    return len(columns), matches, errors
+
+
+# DAX-style qualified column reference, e.g. Product[Color]
+_QUALIFIED_COLUMN = re.compile(r"^\s*'?(.+?)'?\[(.+)\]\s*$")
+
+
+def split_column_reference(reference, default_table):
+    """Split "Table[Column]" into (table, column); bare column names belong to default_table."""
+    match = _QUALIFIED_COLUMN.match(reference)
+    if match:
+        return match.group(1).strip(), match.group(2).strip()
+    return default_table, reference.strip()
+
+
+def _is_active(value):
+    # IsActive may be missing or null on some models; treat those relationships as active
+    return value is None or (isinstance(value, float) and np.isnan(value)) or bool(value)
+
+
+def find_relationship_paths(relationships, from_table, targets):
+    """
+    Find the chain of active relationships from a table to each target table.
+
+    Relationships are followed from their many side (From) to their one side
+    (To), so snowflaked dimensions are reached through intermediate tables.
+
+    Args:
+        relationships: The model relationships DataFrame
+        from_table: The table to start from, usually a fact table
+        targets: Names of the tables to reach
+
+    Returns:
+        A dictionary mapping each target to its list of
+        (from table, from column, to table, to column) steps
+    """
+    edges = {}
+    for rel in relationships.to_dict("records"):
+        if not _is_active(rel.get("IsActive")):
+            continue
+        step = (rel["FromTableName"], rel["FromColumnName"], rel["ToTableName"], rel["ToColumnName"])
+        edges.setdefault(rel["FromTableName"], []).append(step)
+
+    paths = {from_table: []}
+    queue = [from_table]
+    while queue:
+        table = queue.pop(0)
+        for step in edges.get(table, []):
+            if step[2] not in paths:
+                paths[step[2]] = paths[table] + [step]
+                queue.append(step[2])
+
+    missing = [target for target in targets if target not in paths]
+    if missing:
+        raise FilterError(f"Error: No active relationship path from '{from_table}' to: {', '.join(repr(t) for t in missing)}.")
+    return {target: paths[target] for target in targets}
+
+
+def get_key_index(model, table_name, column_name):
+    """
+    Get a hash index over the key column of a table, memoized per model.
+
+    Returns:
+        A tuple of (pd.Index of unique keys, row position of each key, number of duplicate keys)
+    """
+
+    def compute():
+        keys = model_cache.get_table(model, table_name)[column_name]
+        duplicated = keys.duplicated().to_numpy()
+        first = ~duplicated
+        return pd.Index(keys.to_numpy()[first]), np.flatnonzero(first), int(duplicated.sum())
+
+    return model_cache.memoize(model, ("key_index", table_name, column_name), compute)
+
+
+def lookup_rows(model, table_name, column_name, keys):
+    """
+    Vectorized hash join: map each key to the row position holding it in a table (-1 when missing or blank).
+    """
+    index, positions, _ = get_key_index(model, table_name, column_name)
+    found = index.get_indexer(keys)
+    rows = np.where(found >= 0, positions[np.maximum(found, 0)], -1)
+    rows[np.asarray(pd.isna(keys), dtype=bool)] = -1
+    return rows
+
+
+def map_related_rows(model, from_table, to_table):
+    """
+    Map every row of a table to its related row in another table, following the active relationship path.
+
+    The mapping is memoized per model, so joins and filter propagation reuse it.
+
+    Returns:
+        An array with the row position in to_table for each row of from_table (-1 when
+        there is no related row), or None when the tables are not related
+    """
+
+    def compute():
+        try:
+            path = find_relationship_paths(model.relationships, from_table, [to_table])[to_table]
+        except FilterError:
+            return None
+        rows = np.arange(len(model_cache.get_table(model, from_table)))
+        for step_from, step_from_column, step_to, step_to_column in path:
+            keys = model_cache.get_table(model, step_from)[step_from_column].to_numpy()[np.maximum(rows, 0)]
+            next_rows = lookup_rows(model, step_to, step_to_column, keys)
+            next_rows[rows < 0] = -1
+            rows = next_rows
+        return rows
+
+    return model_cache.memoize(model, ("row_map", from_table, to_table), compute)
+
+
+def join_related_rows(model, table_name, dimensions, filters=None, columns=None, limit=10):
+    """
+    Join the rows of a table with the tables it relates to through the model relationships.
+
+    Filters are evaluated on each table before joining (dimension filters act
+    as semi-joins) and only the first `limit` matching rows of the requested
+    columns are materialized.
+
+    Returns:
+        A dictionary with the joins used, the number of matching rows, warnings and the joined rows
+    """
+    paths = find_relationship_paths(model.relationships, table_name, dimensions)
+    joined_tables = [table_name]
+    steps = []
+    for path in paths.values():
+        for step in path:
+            if step[2] not in joined_tables:
+                joined_tables.append(step[2])
+                steps.append(step)
+    frames = {name: model_cache.get_table(model, name) for name in joined_tables}
+
+    # Group filter conditions by table
+    conditions_by_table = {}
+    for condition, col_name, op, value in parse_filters(filters) if filters else []:
+        filter_table, filter_column = split_column_reference(col_name, table_name)
+        if filter_table not in frames:
+            raise FilterError(f"Error: Table '{filter_table}' in filter '{condition}' is not part of the join.")
+        conditions_by_table.setdefault(filter_table, []).append((condition, filter_column, op, value))
+
+    # Rows of the base table that survive its own filters
+    fact = frames[table_name]
+    if table_name in conditions_by_table:
+        candidates = np.flatnonzero(build_filter_mask(fact, table_name, conditions_by_table[table_name]))
+    else:
+        candidates = np.arange(len(fact))
+
+    # Map every candidate row to its row in each joined table
+    row_maps = {table_name: candidates}
+    warnings = []
+    for from_table, from_column, to_table, to_column in steps:
+        row_maps[to_table] = map_related_rows(model, table_name, to_table)[candidates]
+        duplicates = get_key_index(model, to_table, to_column)[2]
+        if duplicates:
+            warnings.append(f"{duplicates} duplicate key(s) in {to_table}[{to_column}]; the first matching row is used.")
+
+    # Dimension filters keep only the rows whose related row matches
+    keep = np.ones(len(candidates), dtype=bool)
+    for filter_table, conditions in conditions_by_table.items():
+        if filter_table == table_name:
+            continue
+        mask = build_filter_mask(frames[filter_table], filter_table, conditions)
+        rows = row_maps[filter_table]
+        keep &= (rows >= 0) & mask[np.maximum(rows, 0)]
+    selected = np.flatnonzero(keep)
+
+    # Resolve the output columns
+    if columns:
+        references = [split_column_reference(ref, table_name) for ref in columns.split(",") if ref.strip()]
+    else:
+        references = [(name, column) for name in joined_tables for column in frames[name].columns]
+    for ref_table, ref_column in references:
+        if ref_table not in frames:
+            raise FilterError(f"Error: Table '{ref_table}' is not part of the join.")
+        if ref_column not in frames[ref_table].columns:
+            raise FilterError(f"Error: Column '{ref_column}' not found in table '{ref_table}'.")
+
+    # Only the rows of the page are gathered from each table
+    page = selected[:limit]
+    data = pd.DataFrame(
+        {
+            f"{ref_table}[{ref_column}]": frames[ref_table][ref_column]
+            .reset_index(drop=True)
+            .reindex(row_maps[ref_table][page])
+            .to_numpy()
+            for ref_table, ref_column in references
+        }
+    )
+
+    return {
+        "joins": [f"{f}[{fc}] -> {t}[{tc}]" for f, fc, t, tc in steps],
+        "total_rows": len(selected),
+        "warnings": warnings,
+        "data": json.loads(data.to_json(orient="records")),
+    }
+
+
+def _blank_key_count(dictionary):
+    # Nulls plus empty or whitespace-only text keys, which Power BI treats as blank
+    values = dictionary["values"]
+    if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+        text = pd.Series(values.astype(str), dtype=object).str.strip()
+        blank_positions = np.flatnonzero((text == "").to_numpy())
+        return dictionary["null_count"] + int(dictionary["counts"][blank_positions].sum())
+    return dictionary["null_count"]
+
+
+def check_relationship_integrity(model, relationship, max_examples=5):
+    """
+    Validate the keys of one relationship using set operations on the column dictionaries.
+
+    Args:
+        model: The loaded model
+        relationship: A relationship record with From/To table and column names
+        max_examples: Number of orphan keys to include as examples
+
+    Returns:
+        A dictionary with orphan, duplicate and blank key counts for the relationship
+    """
+    from_table, from_column = relationship["FromTableName"], relationship["FromColumnName"]
+    to_table, to_column = relationship["ToTableName"], relationship["ToColumnName"]
+
+    def compute():
+        many = get_column_dictionary(model, from_table, from_column)
+        one = get_column_dictionary(model, to_table, to_column)
+
+        # Orphans: keys on the many side with no match on the one side
+        orphan_positions = np.flatnonzero(~many["values"].isin(one["values"]))
+        duplicate_positions = np.flatnonzero(one["counts"] > 1)
+
+        cardinality = relationship.get("Cardinality")
+        result = {
+            "from": f"{from_table}[{from_column}]",
+            "to": f"{to_table}[{to_column}]",
+            "is_active": relationship.get("IsActive"),
+            "cardinality": cardinality,
+            "many_side_distinct_keys": len(many["values"]),
+            "one_side_distinct_keys": len(one["values"]),
+            "orphan_keys": len(orphan_positions),
+            "orphan_rows": int(many["counts"][orphan_positions].sum()),
+            "orphan_examples": [many["values"][i] for i in orphan_positions[:max_examples]],
+            "one_side_duplicate_keys": len(duplicate_positions),
+            "duplicate_examples": [one["values"][i] for i in duplicate_positions[:max_examples]],
+            "blank_keys_many_side": _blank_key_count(many),
+            "blank_keys_one_side": _blank_key_count(one),
+        }
+        # Duplicates are expected on many-to-many relationships
+        duplicates_are_issue = cardinality != "M:M" and result["one_side_duplicate_keys"] > 0
+        has_issues = duplicates_are_issue or result["orphan_keys"] > 0 or result["blank_keys_many_side"] > 0
+        result["status"] = "issues" if has_issues else "ok"
+        return result
+
+    key = ("relationship_check", from_table, from_column, to_table, to_column, max_examples)
+    return model_cache.memoize(model, key, compute)
+
+
+def check_model_relationships(model, from_table=None, to_table=None, max_examples=5):
+    """
+    Validate the keys of every relationship of the model in parallel.
+
+    Returns:
+        A list with one result per relationship, in model order
+    """
+    relationships = model.relationships
+    if from_table:
+        relationships = relationships[relationships["FromTableName"] == from_table]
+    if to_table:
+        relationships = relationships[relationships["ToTableName"] == to_table]
+
+    def check(relationship):
+        try:
+            return check_relationship_integrity(model, relationship, max_examples)
+        except Exception as e:
+            return {
+                "from": f"{relationship['FromTableName']}[{relationship['FromColumnName']}]",
+                "to": f"{relationship['ToTableName']}[{relationship['ToColumnName']}]",
+                "status": "error",
+                "error": str(e),
+            }
+
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as executor:
+        return list(executor.map(check, relationships.to_dict("records")))
+
+
+def get_dax_evaluator(model):
+    """
+    Get the local DAX evaluator of a model.
+
+    Tables come from the model cache, filters propagate through the memoized
+    relationship row maps and parsed expressions are memoized per model.
+    Filter masks and measure values are dropped after each evaluation.
+    """
+
+    def build():
+        measures = model.dax_measures
+        return DaxEvaluator(
+            get_table=lambda table_name: model_cache.get_table(model, table_name),
+            measures=dict(zip(measures["Name"], measures["Expression"])),
+            map_rows=lambda from_table, to_table: map_related_rows(model, from_table, to_table),
+            memoize=lambda key, compute_fn: model_cache.memoize(model, key, compute_fn),
+        )
+
+    return model_cache.memoize(model, ("dax_evaluator",), build)
+
+
+def parse_dax_filters(filters):
+    """
+    Parse "Table[Column]=value;..." filters into a DAX filter context.
+
+    Returns:
+        A list of (table, column, operator, value) tuples
+    """
+    context = []
+    for condition, reference, op, value in parse_filters(filters):
+        match = _QUALIFIED_COLUMN.match(reference)
+        if not match:
+            raise FilterError(f"Error: Filter '{condition}' must reference a column as Table[Column].")
+        dax_op = "<>" if op == "!=" else op
+        context.append((match.group(1).strip(), match.group(2).strip(), dax_op, coerce_filter_value(value)))
+    return context
+
+
+def evaluate_dax(model, measure_name=None, expression=None, filters=None, group_by=None, max_groups=100):
+    """
+    Evaluate a measure or DAX expression locally, optionally once per value of a column.
+
+    Returns:
+        A dictionary with the overall value and, when grouping, one value per group
+    """
+    evaluator = get_dax_evaluator(model)
+    context = parse_dax_filters(filters) if filters else []
+
+    def run(extra=()):
         if measure_name:
-            dax_measures = dax_measures[dax_measures["Name"] == measure_name]
+            return evaluator.evaluate_measure(measure_name, context + list(extra))
+        return evaluator.evaluate(expression, context + list(extra))
+
+    result = {"value": run()}
+    if group_by:
+        group_table, group_column = split_column_reference(group_by, None)
+        if group_table is None:
+            raise FilterError("Error: group_by must reference a column as Table[Column].")
+        dictionary = get_column_dictionary(model, group_table, group_column)
+        values = dictionary["values"]
+        try:
+            order = values.argsort()
+        except TypeError:
+            order = values.astype(str).argsort()
+        groups = [values[i] for i in order[:max_groups]]
+        result["groups"] = [{"group": g, "value": run([(group_table, group_column, "==", g)])} for g in groups]
+        result["groups_truncated"] = len(values) > max_groups
+    return result
+
+
+# Period frequencies for time bucketing; weeks start on Monday
+TIME_BUCKETS = {"day": "D", "week": "W-SUN", "month": "M", "quarter": "Q", "year": "Y"}
+
+TIME_AGGREGATIONS = ("count", "sum", "mean", "min", "max", "distinct_count")
+
+
+def aggregate_time_buckets(
+    model, table_name, date_column, value_column=None, aggregation="count", granularity="month", filters=None
+):
+    """
+    Aggregate a table into day, week, month, quarter or year buckets of a date column.
 
-        # Return message if no measures match the filters
-        if len(dax_measures) == 0:
-            filters = []
+    Filters are applied as a mask and the bucketing and aggregation are
+    vectorized over the cached table.
+
+    Returns:
+        A list of buckets with their label, start date and aggregated value
+    """
+    table_contents = model_cache.get_table(model, table_name)
+    parse_column_list(table_contents, table_name, date_column)
+    if value_column:
+        parse_column_list(table_contents, table_name, value_column)
+    elif aggregation != "count":
+        raise FilterError(f"Error: Aggregation '{aggregation}' needs a value_column.")
+
+    dates = table_contents[date_column]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors="coerce")
+
+    mask = np.array(dates.notna(), dtype=bool)
+    if filters:
+        mask &= build_filter_mask(table_contents, table_name, parse_filters(filters))
+
+    selected = dates[mask]
+    if getattr(selected.dt, "tz", None) is not None:
+        selected = selected.dt.tz_localize(None)
+    freq = TIME_BUCKETS[granularity]
+    # Group on the integer period ordinals rather than on Period objects
+    ordinals = selected.dt.to_period(freq).array.asi8
+
+    if value_column:
+        values = table_contents[value_column][mask].to_numpy()
+    else:
+        values = np.ones(len(ordinals), dtype=np.int64)
+    grouped = pd.Series(values).groupby(ordinals, sort=True)
+
+    if aggregation == "count":
+        result = grouped.count() if value_column else grouped.size()
+    elif aggregation == "distinct_count":
+        result = grouped.nunique()
+    else:
+        result = grouped.agg(aggregation)
+
+    periods = pd.PeriodIndex.from_ordinals(result.index.to_numpy(), freq=freq)
+    return [
+        {"bucket": str(period), "start": period.start_time.isoformat(), "value": value}
+        for period, value in zip(periods, result)
+    ]
+
+
+# Thresholds of the model size advisor
+HIGH_CARDINALITY_TEXT = 100_000
+# A date-only column has at most one distinct value per day: 100 years of dates
+DATE_ONLY_CARDINALITY = 36_525
+SECONDS_PER_DAY = 86_400
+
+# DAX column references: 'Table Name'[Column], Table[Column] or [Column]
+_DAX_COLUMN_REFERENCE = re.compile(r"(?:'((?:[^']|'')+)'|([A-Za-z_][A-Za-z0-9_]*))?\[((?:[^\]]|\]\])+)\]")
+
+
+def _frame_or_none(model, property_name):
+    # Optional model properties (e.g. rls) are missing from older PBIXRay releases
+    try:
+        return getattr(model, property_name)
+    except Exception:
+        return None
+
+
+def _frame_or_empty(model, property_name):
+    frame = _frame_or_none(model, property_name)
+    return frame if frame is not None else pd.DataFrame()
+
+
+def _column_kind(data_type):
+    data_type = str(data_type).lower()
+    if data_type.startswith("datetime") or data_type in ("date", "datetime"):
+        return "datetime"
+    if data_type in ("string", "str", "object", "text", "wchar"):
+        return "text"
+    return "other"
+
+
+def find_referenced_columns(model, file_path=None):
+    """
+    Find the columns that DAX expressions, row-level security, relationships,
+    hierarchy levels, sort-by settings or report visuals use.
+
+    Bare [Column] references in DAX count for every column with that name, so a
+    column is only reported as unused when nothing could possibly refer to it.
+
+    Returns:
+        The set of referenced (table, column) pairs and a dictionary telling
+        whether the report visuals, hierarchies and sort-by columns were read
+    """
+    columns = list_model_columns(model)
+    by_name = {}
+    for table_name, column_name in columns:
+        by_name.setdefault(column_name, []).append((table_name, column_name))
+    known = set(columns)
+
+    referenced = set()
+    expressions = []
+    for property_name, column in (
+        ("dax_measures", "Expression"),
+        ("dax_columns", "Expression"),
+        ("dax_tables", "Expression"),
+        ("rls", "FilterExpression"),
+    ):
+        frame = _frame_or_empty(model, property_name)
+        if column in frame.columns:
+            expressions.extend(frame[column].dropna().astype(str))
+
+    for expression in expressions:
+        for quoted, plain, name in _DAX_COLUMN_REFERENCE.findall(expression):
+            table_name = quoted.replace("''", "'") if quoted else plain
+            name = name.replace("]]", "]")
             if table_name:
-                filters.append(f"table '{table_name}'")
-            if measure_name:
-                filters.append(f"name '{measure_name}'")
-            filter_text = " and ".join(filters)
-            return f"No measures found with {filter_text}."
+                referenced.add((table_name, name))
+            else:
+                referenced.update(by_name.get(name, []))
+
+    relationships = _frame_or_empty(model, "relationships")
+    if len(relationships):
+        referenced.update(zip(relationships["FromTableName"], relationships["FromColumnName"]))
+        referenced.update(zip(relationships["ToTableName"], relationships["ToColumnName"]))
+
+    levels = _frame_or_none(model, "tmschema_levels")
+    hierarchies_checked = levels is not None and {"TableName", "ColumnName"} <= set(levels.columns)
+    if hierarchies_checked:
+        referenced.update(zip(levels["TableName"], levels["ColumnName"]))
+
+    # A column used as another column's sort order is needed by that column
+    model_columns = _frame_or_none(model, "tmschema_columns")
+    sort_by_checked = model_columns is not None and {"ID", "TableName", "Name", "SortByColumnID"} <= set(model_columns.columns)
+    if sort_by_checked:
+        by_id = dict(zip(model_columns["ID"], zip(model_columns["TableName"], model_columns["Name"])))
+        referenced.update(by_id[sort_id] for sort_id in model_columns["SortByColumnID"].dropna() if sort_id in by_id)
+
+    visual_fields = read_report_fields(file_path) if file_path else None
+    if visual_fields:
+        referenced.update(visual_fields)
+
+    checked = {
+        "report_visuals": visual_fields is not None,
+        "hierarchies": hierarchies_checked,
+        "sort_by_columns": sort_by_checked,
+    }
+    return referenced & known, checked
+
+
+def analyze_model_storage(model, file_path=None, top_n=10):
+    """
+    Rank tables and columns by storage cost and recommend fixes with estimated savings.
 
-        return dax_measures.to_json(orient="records", indent=2)
+    Column costs come from the VertiPaq statistics (dictionary, hash index and data
+    sizes). Each column gets at most one recommendation, the one saving the most.
+
+    Returns:
+        A dictionary with the total size, the largest tables and columns and the recommendations
+    """
+    statistics = model.statistics.copy()
+    for column in ("Dictionary", "HashIndex", "DataSize", "Cardinality"):
+        if column not in statistics.columns:
+            statistics[column] = 0
+        statistics[column] = pd.to_numeric(statistics[column], errors="coerce").fillna(0).astype(np.int64)
+    statistics["TotalSize"] = statistics["Dictionary"] + statistics["HashIndex"] + statistics["DataSize"]
+    total_size = int(statistics["TotalSize"].sum())
+
+    schema = model.schema
+    type_column = next((c for c in ("PandasDataType", "DataType") if c in schema.columns), None)
+    data_types = dict(zip(zip(schema["TableName"], schema["ColumnName"]), schema[type_column])) if type_column else {}
+
+    def share(size):
+        return round(100.0 * size / total_size, 2) if total_size else 0.0
+
+    tables = statistics.groupby("TableName", sort=False)["TotalSize"].agg(["sum", "count"])
+    tables = tables.sort_values("sum", ascending=False).head(top_n)
+    largest_tables = [
+        {"table": table_name, "size_bytes": int(row["sum"]), "share_percent": share(row["sum"]), "columns": int(row["count"])}
+        for table_name, row in tables.iterrows()
+    ]
+
+    largest_columns = [
+        {
+            "table": row.TableName,
+            "column": row.ColumnName,
+            "data_type": data_types.get((row.TableName, row.ColumnName)),
+            "cardinality": int(row.Cardinality),
+            "dictionary_bytes": int(row.Dictionary),
+            "hash_index_bytes": int(row.HashIndex),
+            "data_bytes": int(row.DataSize),
+            "size_bytes": int(row.TotalSize),
+            "share_percent": share(row.TotalSize),
+        }
+        for row in statistics.sort_values("TotalSize", ascending=False).head(top_n).itertuples()
+    ]
+
+    referenced, checked = find_referenced_columns(model, file_path)
+    # Without hierarchy or sort-by metadata an unreferenced column may still be needed
+    unchecked = [name.replace("_", " ") for name in ("hierarchies", "sort_by_columns") if not checked[name]]
+
+    recommendations = []
+    for row in statistics.itertuples():
+        key = (row.TableName, row.ColumnName)
+        kind = _column_kind(data_types.get(key))
+        candidates = []
+        if key not in referenced and not str(row.ColumnName).startswith("RowNumber"):
+            detail = (
+                "No measure, calculated column or table, security role, relationship"
+                + (", hierarchy" if checked["hierarchies"] else "")
+                + (", sort-by setting" if checked["sort_by_columns"] else "")
+                + (" or visual" if checked["report_visuals"] else "")
+                + " references this column"
+            )
+            if unchecked:
+                detail += f"; {' and '.join(unchecked)} could not be read, so check them before removing it."
+            else:
+                detail += "; remove it from the model."
+            candidates.append(("unused_column", detail, int(row.TotalSize)))
+        if kind == "text" and row.Cardinality >= HIGH_CARDINALITY_TEXT:
+            candidates.append(
+                (
+                    "high_cardinality_text",
+                    f"Text column with {row.Cardinality:,} distinct values; remove it, trim it or replace it by a key.",
+                    int(row.Dictionary + row.HashIndex),
+                )
+            )
+        if kind == "datetime" and row.Cardinality > DATE_ONLY_CARDINALITY:
+            # Split into a date and a time column, whose dictionaries are bounded by days and seconds
+            split_cardinality = min(row.Cardinality, DATE_ONLY_CARDINALITY) + min(row.Cardinality, SECONDS_PER_DAY)
+            saving = (row.Dictionary + row.HashIndex) * max(0.0, 1.0 - split_cardinality / row.Cardinality)
+            if saving > 0:
+                candidates.append(
+                    (
+                        "split_datetime",
+                        f"Date/time column with {row.Cardinality:,} distinct values; split it into a date "
+                        "and a time column, or drop the time part.",
+                        int(saving),
+                    )
+                )
+        if candidates:
+            issue, detail, saving = max(candidates, key=lambda candidate: candidate[2])
+            recommendations.append(
+                {
+                    "table": row.TableName,
+                    "column": row.ColumnName,
+                    "issue": issue,
+                    "detail": detail,
+                    "size_bytes": int(row.TotalSize),
+                    "estimated_savings_bytes": saving,
+                    "verified": issue != "unused_column" or not unchecked,
+                }
+            )
+
+    recommendations.sort(key=lambda item: item["estimated_savings_bytes"], reverse=True)
+    estimated_savings = sum(item["estimated_savings_bytes"] for item in recommendations)
+    return {
+        "total_size_bytes": total_size,
+        "largest_tables": largest_tables,
+        "largest_columns": largest_columns,
+        "recommendations": recommendations,
+        "estimated_total_savings_bytes": estimated_savings,
+        "estimated_total_savings_percent": share(estimated_savings),
+        "report_visuals_checked": checked["report_visuals"],
+        "hierarchies_checked": checked["hierarchies"],
+        "sort_by_columns_checked": checked["sort_by_columns"],
+    }
+
+
+def validate_pbix_path(file_path):
+    """Return an error message if a path is not an existing .pbix file, otherwise None."""
+    if not os.path.exists(file_path):
+        return f"Error: File '{file_path}' not found."
+    if not file_path.lower().endswith(".pbix"):
+        return f"Error: File '{file_path}' is not a .pbix file."
+    return None
+
+
+# Step types that find_m_steps accepts
+M_STEP_TYPES = sorted(set(STEP_TYPES.values()) | {"source", "other"})
+
+
+def get_m_index(model):
+    """
+    Get the parsed Power Query (M) index of a model, parsing every query once per model.
+
+    Returns:
+        A dictionary with the parsed "queries" and the M "parameters" values (see m_parser.build_m_index)
+    """
+
+    def build():
+        power_query = model.power_query
+        m_parameters = model.m_parameters
+        queries = {}
+        if power_query is not None and len(power_query):
+            queries = dict(zip(power_query["TableName"], power_query["Expression"]))
+        shared = {}
+        if m_parameters is not None and len(m_parameters):
+            shared = dict(zip(m_parameters["ParameterName"], m_parameters["Expression"]))
+        return build_m_index(queries, shared)
+
+    return model_cache.memoize(model, ("m_index",), build)
+
+
+def _matches_function(function, pattern):
+    # Sql.Database matches "Sql.Database" and the namespace "Sql", case-insensitively
+    function, pattern = function.lower(), pattern.lower()
+    return function == pattern or function.startswith(pattern + ".")
+
+
+def search_m_sources(model, function=None, argument=None):
+    """List the data sources of every M query, optionally filtered by connector and argument text."""
+    found = []
+    for query in get_m_index(model)["queries"]:
+        for source in query["sources"]:
+            if function and not _matches_function(source["function"], function):
+                continue
+            if argument and argument.lower() not in json.dumps(source["arguments"], cls=NumpyEncoder).lower():
+                continue
+            found.append({"query": query["name"], "kind": query["kind"], **source})
+    return found
+
+
+def search_m_steps(model, function=None, step_type=None, query_name=None):
+    """List the M steps calling a function or of a step type, optionally within one query."""
+    found = []
+    for query in get_m_index(model)["queries"]:
+        if query_name and query["name"] != query_name:
+            continue
+        for step in query["steps"]:
+            if function and not any(_matches_function(f, function) for f in step["functions"]):
+                continue
+            if step_type and step_type not in step["types"]:
+                continue
+            found.append({"query": query["name"], "kind": query["kind"], **step})
+    return found
+
+
+# Models opened for comparison, keyed by file fingerprint (most recently used last)
+COMPARISON_MODEL_LIMIT = 2
+_comparison_models = OrderedDict()
+_comparison_lock = threading.Lock()
+
+
+def open_comparison_model(file_path):
+    """
+    Open a PBIX file for comparison with another one.
+
+    The currently loaded model is reused when it is the same file, and the most
+    recently compared files are kept open so that repeated diffs do not reload them.
+    The returned model is pinned; release it with unpin_model when the diff is done.
+    """
+    fingerprint = compute_file_fingerprint(file_path)
+    model = active_model()
+    if model is not None and get_model_fingerprint(model) == fingerprint:
+        pin_model(model)
+        return model
+
+    with _comparison_lock:
+        if fingerprint in _comparison_models:
+            _comparison_models.move_to_end(fingerprint)
+            model = _comparison_models[fingerprint]
+            # Pinned under the lock, so clear_caches cannot close it before the diff starts
+            pin_model(model)
+            return model
+
+    loaded = PBIXRay(file_path)
+    register_model(loaded, file_path)
+    evicted = []
+    with _comparison_lock:
+        if fingerprint in _comparison_models:
+            # Another diff opened the same file meanwhile; keep its model and drop this copy
+            _comparison_models.move_to_end(fingerprint)
+            model = _comparison_models[fingerprint]
+            evicted.append(loaded)
+        else:
+            model = loaded
+            _comparison_models[fingerprint] = model
+            while len(_comparison_models) > COMPARISON_MODEL_LIMIT:
+                evicted.append(_comparison_models.popitem(last=False)[1])
+        pin_model(model)
+    # Evicted models are closed now, or by the last diff still running on them
+    for evicted_model in evicted:
+        release_model(evicted_model)
+    return model
+
+
+def open_comparison_models(old_path, new_path):
+    """Open two PBIX files concurrently. Both models are pinned, see open_comparison_model."""
+    if compute_file_fingerprint(old_path) == compute_file_fingerprint(new_path):
+        model = open_comparison_model(old_path)
+        pin_model(model)
+        return model, model
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(open_comparison_model, path) for path in (old_path, new_path)]
+    failed = [future for future in futures if future.exception() is not None]
+    if failed:
+        for future in futures:
+            if future not in failed:
+                unpin_model(future.result())
+        raise failed[0].exception()
+    return tuple(future.result() for future in futures)
+
+
+# Object types compared by diff_models: (model property, key fields, definition fields)
+MODEL_OBJECT_TYPES = {
+    "measures": ("dax_measures", ("TableName", "Name"), ("Expression", "DisplayFolder", "Description")),
+    "columns": ("schema", ("TableName", "ColumnName"), ("DataType", "PandasDataType")),
+    "calculated_columns": ("dax_columns", ("TableName", "ColumnName"), ("Expression",)),
+    "calculated_tables": ("dax_tables", ("TableName",), ("Expression",)),
+    "relationships": (
+        "relationships",
+        ("FromTableName", "FromColumnName", "ToTableName", "ToColumnName"),
+        ("IsActive", "Cardinality", "CrossFilteringBehavior"),
+    ),
+    "power_queries": ("power_query", ("TableName",), ("Expression",)),
+    "m_parameters": ("m_parameters", ("ParameterName",), ("Expression", "Description")),
+}
+
+
+def _object_name(key):
+    # Table[Name] for table objects, From[Column] -> To[Column] for relationships
+    if len(key) == 4:
+        return f"{key[0]}[{key[1]}] -> {key[2]}[{key[3]}]"
+    if len(key) == 2:
+        return f"{key[0]}[{key[1]}]"
+    return str(key[0])
+
+
+def hash_model_objects(model, object_type):
+    """
+    Hash the definition of every object of one type in a model.
+
+    Returns:
+        A dictionary mapping each object key to its definition hash and definition
+    """
+    property_name, key_fields, definition_fields = MODEL_OBJECT_TYPES[object_type]
+    frame = getattr(model, property_name)
+    if frame is None or len(frame) == 0:
+        return {}
+
+    fields = [field for field in definition_fields if field in frame.columns]
+    hashed = {}
+    for record in frame.to_dict("records"):
+        key = tuple(record.get(field) for field in key_fields)
+        definition = {field: None if pd.isna(record[field]) else record[field] for field in fields}
+        digest = hashlib.sha1(json.dumps(definition, sort_keys=True, default=str).encode("utf-8"))
+        hashed[key] = (digest.hexdigest(), definition)
+    return hashed
+
+
+def diff_model_objects(old_model, new_model, object_types=None, context_lines=3):
+    """
+    Compare the objects of two models by key.
+
+    Objects whose definition hashes match are skipped; modified objects list the
+    changed fields, with a unified diff for expressions.
+
+    Returns:
+        Per object type, the added, removed and modified objects and the unchanged count
+    """
+    result = {}
+    for object_type in object_types or MODEL_OBJECT_TYPES:
+        old_objects = hash_model_objects(old_model, object_type)
+        new_objects = hash_model_objects(new_model, object_type)
+
+        added = [_object_name(key) for key in new_objects if key not in old_objects]
+        removed = [_object_name(key) for key in old_objects if key not in new_objects]
+        modified = []
+        unchanged = 0
+        for key in old_objects.keys() & new_objects.keys():
+            old_hash, old_definition = old_objects[key]
+            new_hash, new_definition = new_objects[key]
+            if old_hash == new_hash:
+                unchanged += 1
+                continue
+
+            changes = {}
+            for field in old_definition.keys() | new_definition.keys():
+                before, after = old_definition.get(field), new_definition.get(field)
+                if before == after:
+                    continue
+                if field == "Expression":
+                    diff = difflib.unified_diff(
+                        str(before or "").splitlines(),
+                        str(after or "").splitlines(),
+                        fromfile="old",
+                        tofile="new",
+                        n=context_lines,
+                        lineterm="",
+                    )
+                    changes[field] = {"diff": "\n".join(diff)}
+                else:
+                    changes[field] = {"old": before, "new": after}
+            modified.append({"name": _object_name(key), "changes": changes})
+
+        result[object_type] = {
+            "added": sorted(added),
+            "removed": sorted(removed),
+            "modified": sorted(modified, key=lambda item: item["name"]),
+            "unchanged": unchanged,
+        }
+    return result
+
+
+# Rows hashed per chunk by diff_table_data, bounding memory on very large tables
+HASH_CHUNK_ROWS = 1_000_000
+
+
+def iter_table_chunks(model, table_name, columns, chunk_size=HASH_CHUNK_ROWS):
+    """
+    Iterate over projected columns of a table in chunks of rows.
+
+    Uses PBIXRay's chunked decoder when available, the model cache for the loaded
+    model, and otherwise slices a projected decode.
+
+    Yields:
+        (position of the first row, DataFrame chunk) pairs
+    """
+    if model is active_model() and model_cache.has_table(model, table_name):
+        table_contents = model_cache.get_table(model, table_name)[columns]
+    elif hasattr(model, "iter_table"):
+        position = 0
+        for chunk in model.iter_table(table_name, columns=columns, chunk_size=chunk_size):
+            yield position, chunk
+            position += len(chunk)
+        return
+    else:
+        try:
+            table_contents = model.get_table(table_name, columns=columns)
+        except TypeError:
+            # Older PBIXRay releases only decode whole tables
+            table_contents = model.get_table(table_name)[columns]
+
+    for start in range(0, len(table_contents), chunk_size):
+        yield start, table_contents.iloc[start : start + chunk_size]
+
+
+def hash_table_rows(model, table_name, key_columns, value_columns, chunk_size=HASH_CHUNK_ROWS):
+    """
+    Hash the key and the values of every row of a table, one chunk at a time.
+
+    Returns:
+        Two uint64 arrays: the key hash and the value hash of each row
+    """
+    key_hashes, row_hashes = [], []
+    for _, chunk in iter_table_chunks(model, table_name, key_columns + value_columns, chunk_size):
+        key_hashes.append(pd.util.hash_pandas_object(chunk[key_columns], index=False).to_numpy())
+        if value_columns:
+            row_hashes.append(pd.util.hash_pandas_object(chunk[value_columns], index=False).to_numpy())
+        else:
+            row_hashes.append(np.zeros(len(chunk), dtype=np.uint64))
+    if not key_hashes:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint64)
+    return np.concatenate(key_hashes), np.concatenate(row_hashes)
+
+
+def fetch_table_rows(model, table_name, columns, positions, chunk_size=HASH_CHUNK_ROWS):
+    """
+    Fetch the rows at the given positions of a table, indexed by position.
+
+    Decoding stops at the chunk holding the last requested position.
+    """
+    positions = np.unique(np.asarray(positions, dtype=np.int64))
+    selected = []
+    if len(positions):
+        for start, chunk in iter_table_chunks(model, table_name, columns, chunk_size):
+            wanted = positions[(positions >= start) & (positions < start + len(chunk))]
+            if len(wanted):
+                rows = chunk.iloc[wanted - start]
+                selected.append(rows.set_axis(wanted, axis=0))
+            if start + len(chunk) > positions[-1]:
+                break
+    if not selected:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(selected)
+
+
+def _table_columns(model, table_name, label):
+    columns = [column for _, column in list_model_columns(model, [table_name])]
+    if not columns:
+        raise FilterError(f"Error: Table '{table_name}' not found in the {label} model.")
+    return columns
+
+
+def _same_value(old, new):
+    if pd.isna(old) and pd.isna(new):
+        return True
+    return old == new
+
+
+def diff_table_rows(old_model, new_model, table_name, key_columns, columns=None, max_examples=5):
+    """
+    Compare the rows of one table in two models by key.
+
+    Rows are hashed in chunks over the projected columns. The example rows are
+    then fetched in one more pass per model, which stops at the last example.
+
+    Returns:
+        Counts and examples of inserted, deleted and changed rows
+    """
+    old_columns = _table_columns(old_model, table_name, "old")
+    new_columns = _table_columns(new_model, table_name, "new")
+    common = [column for column in new_columns if column in old_columns]
+
+    for column in key_columns + (columns or []):
+        if column not in common:
+            raise FilterError(f"Error: Column '{column}' not found in both versions of table '{table_name}'.")
+    value_columns = [column for column in (columns or common) if column not in key_columns]
+    projected = key_columns + value_columns
+
+    old_keys, old_rows = hash_table_rows(old_model, table_name, key_columns, value_columns)
+    new_keys, new_rows = hash_table_rows(new_model, table_name, key_columns, value_columns)
+
+    # Keep the first row of each key; duplicate keys are reported separately
+    old_positions = np.flatnonzero(~pd.Index(old_keys).duplicated())
+    new_positions = np.flatnonzero(~pd.Index(new_keys).duplicated())
+    old_unique = pd.Index(old_keys[old_positions])
+    new_unique = pd.Index(new_keys[new_positions])
+
+    in_old = old_unique.get_indexer(new_unique)
+    matched = in_old >= 0
+    inserted = new_positions[~matched]
+    deleted = old_positions[new_unique.get_indexer(old_unique) < 0]
+    matched_old = old_positions[in_old[matched]]
+    matched_new = new_positions[matched]
+    changed = old_rows[matched_old] != new_rows[matched_new]
+
+    # All example rows of a model are fetched in a single pass
+    max_examples = max(max_examples, 0)
+    old_sample = matched_old[changed][:max_examples]
+    new_sample = matched_new[changed][:max_examples]
+    old_examples = fetch_table_rows(old_model, table_name, projected, np.concatenate([deleted[:max_examples], old_sample]))
+    new_examples = fetch_table_rows(new_model, table_name, projected, np.concatenate([inserted[:max_examples], new_sample]))
+
+    def records(examples, positions):
+        return examples.loc[positions[:max_examples]].to_dict("records")
+
+    changed_examples = []
+    if len(old_sample):
+        for old_position, new_position in zip(old_sample, new_sample):
+            old_row, new_row = old_examples.loc[old_position], new_examples.loc[new_position]
+            changed_examples.append(
+                {
+                    "key": {column: new_row[column] for column in key_columns},
+                    "changes": {
+                        column: {"old": old_row[column], "new": new_row[column]}
+                        for column in value_columns
+                        if not _same_value(old_row[column], new_row[column])
+                    },
+                }
+            )
+
+    return {
+        "key_columns": key_columns,
+        "compared_columns": value_columns,
+        "columns_only_in_old": [column for column in old_columns if column not in new_columns],
+        "columns_only_in_new": [column for column in new_columns if column not in old_columns],
+        "old_rows": len(old_keys),
+        "new_rows": len(new_keys),
+        "duplicate_keys": {"old": len(old_keys) - len(old_positions), "new": len(new_keys) - len(new_positions)},
+        "inserted": {"count": len(inserted), "examples": records(new_examples, inserted)},
+        "deleted": {"count": len(deleted), "examples": records(old_examples, deleted)},
+        "changed": {"count": int(changed.sum()), "examples": changed_examples},
+        "unchanged": int(len(changed) - changed.sum()),
+    }
+
+
+# Files given with --load-file, in the order given, keyed by absolute path. They are loaded in
+# background threads while the server already answers; the first one that loads successfully
+# becomes the current model.
+LOAD_TIMEOUT = 120.0
+_startup_loads = OrderedDict()
+_startup_lock = threading.Lock()
+
+
+def start_background_loads(file_paths):
+    """
+    Start loading PBIX files in parallel background threads.
+
+    Args:
+        file_paths: Paths of the .pbix files to load
+
+    Returns:
+        The load entries, which get_load_status reports
+    """
+    with _startup_lock:
+        for file_path in file_paths:
+            file_path = os.path.abspath(os.path.expanduser(file_path))
+            entry = {"path": file_path, "status": "pending", "size_mb": None, "error": None, "model": None}
+            entry["started"] = entry["finished"] = entry["thread"] = None
+            # Set once the load is finished, successfully or not
+            entry["done"] = threading.Event()
+            if not os.path.exists(file_path):
+                entry.update(status="failed", error=f"File '{file_path}' not found.")
+                entry["done"].set()
+            elif not file_path.lower().endswith(".pbix"):
+                entry.update(status="failed", error=f"File '{file_path}' is not a .pbix file.")
+                entry["done"].set()
+            else:
+                entry["size_mb"] = round(os.path.getsize(file_path) / (1024 * 1024), 2)
+            _startup_loads.setdefault(file_path, entry)
+        pending = [entry for entry in _startup_loads.values() if entry["status"] == "pending" and entry["thread"] is None]
+        for entry in pending:
+            entry["thread"] = threading.Thread(target=_load_in_background, args=(entry,), name="pbix-load", daemon=True)
+
+    for entry in pending:
+        entry["thread"].start()
+    return list(_startup_loads.values())
+
+
+def _load_in_background(entry):
+    entry.update(status="loading", started=time.time())
+    print(f"Loading PBIX file in the background: {entry['path']} ({entry['size_mb']:.2f} MB)", file=sys.stderr)
+    try:
+        model = PBIXRay(entry["path"])
+        register_model(model, entry["path"])
+        _shared_models[get_model_fingerprint(model)] = model
+        entry.update(model=model, status="loaded")
+        print(f"Loaded '{os.path.basename(entry['path'])}'", file=sys.stderr)
     except Exception as e:
-        ctx.info(f"Error retrieving DAX measures: {str(e)}")
-        return f"Error retrieving DAX measures: {str(e)}"
+        entry.update(status="failed", error=str(e))
+        print(f"Error loading PBIX file {entry['path']}: {str(e)}", file=sys.stderr)
+    finally:
+        entry["finished"] = time.time()
+        _publish_startup_model()
+        entry["done"].set()
+
+
+def startup_default():
+    """The startup load providing the current model: the first given file whose load did not fail."""
+    with _startup_lock:
+        return next((entry for entry in _startup_loads.values() if entry["status"] != "failed"), None)
+
+
+def _publish_startup_model():
+    # Publish the first file once it is loaded, unless a model was loaded by hand meanwhile
+    with _startup_lock:
+        entry = next((entry for entry in _startup_loads.values() if entry["status"] != "failed"), None)
+        if entry is None or entry["status"] != "loaded" or entry.get("published"):
+            return
+        entry["published"] = True
+        if _model_snapshot.model is None:
+            select_model(entry["model"], entry["path"])
+
+
+async def wait_for_load(entry):
+    """
+    Wait up to LOAD_TIMEOUT seconds for a startup load to finish.
+
+    Returns:
+        An error message if the load failed or is still running at the deadline, otherwise None
+    """
+    # Block a thread of its own on the event, so waiting calls do not hold the workers that run tools
+    done = entry["done"]
+    if not done.is_set() and not await anyio.to_thread.run_sync(
+        done.wait, LOAD_TIMEOUT, abandon_on_cancel=True, limiter=anyio.CapacityLimiter(1)
+    ):
+        return (
+            f"Error: '{os.path.basename(entry['path'])}' is still loading after {LOAD_TIMEOUT:g} seconds. "
+            "Use get_load_status to follow the load."
+        )
+    if entry["status"] == "failed":
+        return f"Error loading file: {entry['error']}"
+    return None
+
+
+async def wait_for_startup_model():
+    """Wait for the current model while it is still loading at startup. Returns an error message or None."""
+    if live_snapshot().model is not None:
+        return None
+    entry = startup_default()
+    if entry is None or entry["status"] not in ("pending", "loading"):
+        return None
+    return await wait_for_load(entry)
+
+
+def forget_startup_model(model):
+    """Drop the reference a startup load keeps to a model that is being closed."""
+    with _startup_lock:
+        for entry in _startup_loads.values():
+            if entry["model"] is model:
+                entry.update(model=None, status="unloaded")
+
+
+@mcp.tool(cache=False, wait_for_model=False)
+async def load_pbix_file(file_path: str, ctx: Context) -> str:
+    """
+    Load a Power BI (.pbix) file for analysis.
+
+    Args:
+        file_path: Path to the .pbix file to load
+
+    Returns:
+        A message confirming the file was loaded
+    """
+    file_path = os.path.expanduser(file_path)
+    if not os.path.exists(file_path):
+        return f"Error: File '{file_path}' not found."
+
+    if not file_path.lower().endswith(".pbix"):
+        return f"Error: File '{file_path}' is not a .pbix file."
+
+    # Files given with --load-file are taken from the background load, waiting for it if needed
+    with _startup_lock:
+        startup = _startup_loads.get(os.path.abspath(file_path))
+    if startup is not None and startup["status"] in ("pending", "loading", "loaded"):
+        error = await wait_for_load(startup)
+        if error:
+            return error
+        model = startup["model"]
+        if model is not None and get_model_fingerprint(model) == compute_file_fingerprint(file_path):
+            switch_model(model, file_path)
+            return f"Successfully loaded '{os.path.basename(file_path)}'"
+
+    # Another session may already have loaded this version of the file
+    model = shared_model(file_path) if SESSION_MODELS else None
+    if model is not None:
+        switch_model(model, file_path)
+        return f"Successfully loaded '{os.path.basename(file_path)}' (shared with other sessions)"
+
+    try:
+        # Log the start of loading
+        ctx.info(f"Loading PBIX file: {file_path}")
+        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+        ctx.info(f"File size: {file_size_mb:.2f} MB")
+
+        # Report initial progress
+        await ctx.report_progress(0, 100)
+
+        # For large files, load in a separate thread to avoid blocking
+        if file_size_mb > 50:  # For files larger than 50MB
+            await ctx.info(f"Large file detected ({file_size_mb:.2f} MB). Loading asynchronously...")
+
+            # Create an event to track completion and a cancellation event
+            # load_complete = anyio.Event()  # Unused variable
+            cancel_progress = anyio.Event()
+            load_error = None
+
+            # Start progress reporting in the background
+            async def progress_reporter():
+                progress = 5
+                try:
+                    while not cancel_progress.is_set() and progress < 95:
+                        await ctx.report_progress(progress, 100)
+                        progress += 5 if progress < 50 else 2  # Slower progress after 50%
+                        await anyio.sleep(1)
+                except Exception as e:
+                    await ctx.info(f"Progress reporting error: {str(e)}")
+
+            # Function to run in thread pool
+            def load_pbixray():
+                nonlocal load_error
+                try:
+                    return PBIXRay(file_path)
+                except Exception as e:
+                    load_error = e
+                    return None
+
+            # Start progress reporter task
+            progress_task = asyncio.create_task(progress_reporter())
+
+            try:
+                # Load the file in a thread pool
+                pbix_model = await run_in_thread(load_pbixray, stage="load")
+
+                # Check for errors during loading
+                if load_error:
+                    await ctx.info(f"Error loading PBIX file: {str(load_error)}")
+                    return f"Error loading file: {str(load_error)}"
+
+                model = pbix_model
+            finally:
+                # Cancel progress reporting
+                cancel_progress.set()
+                await progress_task
+        else:
+            # Smaller files are loaded in a worker thread too, so other calls keep running
+            model = await run_in_thread(PBIXRay, file_path, stage="load")
+
+        # Publish the new model; calls already running finish on the model they started with
+        register_model(model, file_path)
+        switch_model(model, file_path)
+        await ctx.report_progress(100, 100)
+        return f"Successfully loaded '{os.path.basename(file_path)}'"
+    except Exception as e:
+        ctx.info(f"Error loading PBIX file: {str(e)}")
+        return f"Error loading file: {str(e)}"
+
+
+@mcp.tool()
+def get_tables(ctx: Context) -> str:
+    """
+    List all tables in the model.
+
+    Returns:
+        A list of tables in the model
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        tables = active_model().tables
+        if isinstance(tables, (list, np.ndarray)):
+            return json.dumps(tables.tolist() if isinstance(tables, np.ndarray) else tables, indent=2)
+        else:
+            return str(tables)
+    except Exception as e:
+        ctx.info(f"Error retrieving tables: {str(e)}")
+        return f"Error retrieving tables: {str(e)}"
+
+
+@mcp.tool()
+def get_metadata(ctx: Context) -> str:
+    """
+    Get metadata about the Power BI configuration used during model creation.
+
+    Returns:
+        The metadata as a formatted string
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        # Get the metadata DataFrame
+        metadata_df = active_model().metadata
+
+        # Create a dictionary from the name-value pairs
+        result = {}
+        for _, row in metadata_df.iterrows():
+            name = row["Name"]
+            value = row["Value"]
+            result[name] = value
+
+        # Return as formatted JSON
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        ctx.info(f"Error retrieving metadata: {str(e)}")
+        return f"Error retrieving metadata: {str(e)}"
+
+
+@mcp.tool()
+def get_power_query(ctx: Context) -> str:
+    """
+    Display all M/Power Query code used for data transformation.
+
+    Returns:
+        A list of all Power Query expressions with their table names
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        # Power query returns a DataFrame with TableName and Expression columns
+        power_query = active_model().power_query
+        # Convert DataFrame to dict for JSON serialization
+        return power_query.to_json(orient="records", indent=2)
+    except Exception as e:
+        ctx.info(f"Error retrieving Power Query: {str(e)}")
+        return f"Error retrieving Power Query: {str(e)}"
+
+
+@mcp.tool()
+def get_m_parameters(ctx: Context) -> str:
+    """
+    Display all M Parameters values.
+
+    Returns:
+        A list of parameter info with names, descriptions, and expressions
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        m_parameters = active_model().m_parameters
+        return m_parameters.to_json(orient="records", indent=2)
+    except Exception as e:
+        ctx.info(f"Error retrieving M Parameters: {str(e)}")
+        return f"Error retrieving M Parameters: {str(e)}"
+
+
+@mcp.tool()
+def get_model_size(ctx: Context) -> str:
+    """
+    Get the model size in bytes.
+
+    Returns:
+        The size of the model in bytes
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        size = active_model().size
+        return f"Model size: {size} bytes ({size / (1024 * 1024):.2f} MB)"
+    except Exception as e:
+        ctx.info(f"Error retrieving model size: {str(e)}")
+        return f"Error retrieving model size: {str(e)}"
+
+
+@mcp.tool()
+def get_dax_tables(ctx: Context) -> str:
+    """
+    View DAX calculated tables.
+
+    Returns:
+        A list of DAX calculated tables with names and expressions
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        dax_tables = active_model().dax_tables
+        return dax_tables.to_json(orient="records", indent=2)
+    except Exception as e:
+        ctx.info(f"Error retrieving DAX tables: {str(e)}")
+        return f"Error retrieving DAX tables: {str(e)}"
+
+
+@mcp.tool()
+def get_dax_measures(ctx: Context, table_name: str = None, measure_name: str = None) -> str:
+    """
+    Access DAX measures in the model with optional filtering.
+
+    Args:
+        table_name: Optional filter for measures from a specific table
+        measure_name: Optional filter for a specific measure by name
+
+    Returns:
+        A list of DAX measures with names, expressions, and other metadata
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        # Get all measures
+        dax_measures = active_model().dax_measures
+
+        # Apply table filter if specified
+        if table_name:
+            dax_measures = dax_measures[dax_measures["TableName"] == table_name]
+
+        # Apply measure name filter if specified
+        if measure_name:
+            dax_measures = dax_measures[dax_measures["Name"] == measure_name]
+
+        # Return message if no measures match the filters
+        if len(dax_measures) == 0:
+            filters = []
+            if table_name:
+                filters.append(f"table '{table_name}'")
+            if measure_name:
+                filters.append(f"name '{measure_name}'")
+            filter_text = " and ".join(filters)
+            return f"No measures found with {filter_text}."
+
+        return dax_measures.to_json(orient="records", indent=2)
+    except Exception as e:
+        ctx.info(f"Error retrieving DAX measures: {str(e)}")
+        return f"Error retrieving DAX measures: {str(e)}"
+
+
+@mcp.tool()
+def get_dax_columns(ctx: Context, table_name: str = None, column_name: str = None) -> str:
+    """
+    Access calculated column DAX expressions with optional filtering.
+
+    Args:
+        table_name: Optional filter for columns from a specific table
+        column_name: Optional filter for a specific column by name
+
+    Returns:
+        A list of calculated columns with names and expressions
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        # Get all calculated columns
+        dax_columns = active_model().dax_columns
+
+        # Apply table filter if specified
+        if table_name:
+            dax_columns = dax_columns[dax_columns["TableName"] == table_name]
+
+        # Apply column name filter if specified
+        if column_name:
+            dax_columns = dax_columns[dax_columns["ColumnName"] == column_name]
+
+        # Return message if no columns match the filters
+        if len(dax_columns) == 0:
+            filters = []
+            if table_name:
+                filters.append(f"table '{table_name}'")
+            if column_name:
+                filters.append(f"name '{column_name}'")
+            filter_text = " and ".join(filters)
+            return f"No calculated columns found with {filter_text}."
+
+        return dax_columns.to_json(orient="records", indent=2)
+    except Exception as e:
+        ctx.info(f"Error retrieving DAX columns: {str(e)}")
+        return f"Error retrieving DAX columns: {str(e)}"
+
+
+@mcp.tool()
+def get_schema(ctx: Context, table_name: str = None, column_name: str = None) -> str:
+    """
+    Get details about the data model schema and column types with optional filtering.
+
+    Args:
+        table_name: Optional filter for columns from a specific table
+        column_name: Optional filter for a specific column by name
+
+    Returns:
+        A description of the schema with table names, column names, and data types
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        # Get the complete schema
+        schema = active_model().schema
+
+        # Apply table filter if specified
+        if table_name:
+            schema = schema[schema["TableName"] == table_name]
+
+        # Apply column filter if specified
+        if column_name:
+            schema = schema[schema["ColumnName"] == column_name]
+
+        # Return message if no columns match the filters
+        if len(schema) == 0:
+            filters = []
+            if table_name:
+                filters.append(f"table '{table_name}'")
+            if column_name:
+                filters.append(f"column '{column_name}'")
+            filter_text = " and ".join(filters)
+            return f"No schema entries found with {filter_text}."
+
+        return schema.to_json(orient="records", indent=2)
+    except Exception as e:
+        ctx.info(f"Error retrieving schema: {str(e)}")
+        return f"Error retrieving schema: {str(e)}"
+
+
+@mcp.tool()
+async def get_relationships(ctx: Context, from_table: str = None, to_table: str = None) -> str:
+    """
+    Get the details about the data model relationships with optional filtering.
+
+    Args:
+        from_table: Optional filter for relationships from a specific table
+        to_table: Optional filter for relationships to a specific table
+
+    Returns:
+        A description of the relationships between tables in the model
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        # Define the operation to get relationships
+        def get_filtered_relationships():
+            # Access the model selected by the session
+            model = active_model()
+            # Get all relationships
+            relationships = model.relationships
+
+            # Apply from_table filter if specified
+            if from_table:
+                relationships = relationships[relationships["FromTableName"] == from_table]
+
+            # Apply to_table filter if specified
+            if to_table:
+                relationships = relationships[relationships["ToTableName"] == to_table]
+
+            return relationships
+
+        # Run the potentially slow operation asynchronously
+        operation_name = "relationship retrieval"
+        if from_table or to_table:
+            filters = []
+            if from_table:
+                filters.append(f"from '{from_table}'")
+            if to_table:
+                filters.append(f"to '{to_table}'")
+            filter_text = " and ".join(filters)
+            operation_name += f" ({filter_text})"
+
+        relationships = await run_model_operation(ctx, operation_name, get_filtered_relationships)
+
+        # Return message if no relationships match the filters
+        if len(relationships) == 0:
+            filters = []
+            if from_table:
+                filters.append(f"from table '{from_table}'")
+            if to_table:
+                filters.append(f"to table '{to_table}'")
+            filter_text = " and ".join(filters)
+            return f"No relationships found {filter_text}."
+
+        return relationships.to_json(orient="records", indent=2)
+    except Exception as e:
+        await ctx.info(f"Error retrieving relationships: {str(e)}")
+        return f"Error retrieving relationships: {str(e)}"
+
+
+@mcp.tool()
+async def get_table_contents(
+    ctx: Context, table_name: str, filters: str = None, page: int = 1, page_size: int = None, count_only: bool = False
+) -> str:
+    """
+    Retrieve the contents of a specified table with optional filtering and pagination.
+
+    Args:
+        table_name: Name of the table to retrieve
+        filters: Optional filter conditions separated by semicolons (;)
+                Examples:
+                - "locationid=albacete"
+                - "period>100;period<200"
+                - "locationid=albacete;period>100;period<200"
+                - "OrderDate>=2024-01-01;OrderDate<2024-04-01"
+                - "OrderDate>=today-30d" or "OrderDate=last_3_months"
+        page: Page number to retrieve (starting from 1)
+        page_size: Number of rows per page (defaults to value from --page-size)
+        count_only: Only return the number of matching rows and pages, without any data
+
+    Returns:
+        The table contents in JSON format with pagination metadata
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        import time
+
+        start_time = time.time()
+        model = active_model()
+
+        # Use command-line page size if not specified
+        if page_size is None:
+            page_size = PAGE_SIZE
+
+        # Validate pagination parameters
+        if page < 1:
+            return "Error: Page number must be 1 or greater."
+        if page_size < 1:
+            return "Error: Page size must be 1 or greater."
+
+        # Parse filters up front so syntax errors do not cost a table decode
+        try:
+            conditions = parse_filters(filters) if filters else None
+        except FilterError as e:
+            return str(e)
+
+        # Log for large tables
+        if filters:
+            await ctx.info(f"Retrieving filtered data from table '{table_name}'...")
+        else:
+            await ctx.info(f"Retrieving page {page} from table '{table_name}'...")
+
+        # Report initial progress
+        await ctx.report_progress(0, 100)
+
+        # Counts decode only the filter columns, like count_rows
+        if count_only:
+            try:
+                total_rows = await run_in_thread(count_table_rows, model, table_name, filters, stage="count")
+            except FilterError as e:
+                return str(e)
+            await ctx.report_progress(100, 100)
+            response = {
+                "table_name": table_name,
+                "filters": filters,
+                "total_rows": total_rows,
+                "total_pages": (total_rows + page_size - 1) // page_size,
+                "page_size": page_size,
+            }
+            return json.dumps(response, indent=2, cls=NumpyEncoder)
+
+        # Fetch the table data (decoded once per model and then served from the cache)
+        def fetch_table():
+            return model_cache.get_table(model, table_name)
+
+        # Run the table fetching in a thread pool
+        table_contents = await run_in_thread(fetch_table, stage="decode")
+
+        # Report progress after fetching table
+        await ctx.report_progress(25, 100)
+
+        # Apply filters if provided. Only the positions of matching rows are
+        # computed; the filtered frame itself is never built.
+        row_positions = None
+        if conditions:
+            await ctx.info(f"Applying filters: {filters}")
+
+            def compute_positions():
+                return np.flatnonzero(build_filter_mask(table_contents, table_name, conditions))
+
+            try:
+                row_positions = await run_in_thread(compute_positions, stage="filter")
+            except FilterError as e:
+                return str(e)
+
+        # Report progress after filtering
+        await ctx.report_progress(50, 100)
+
+        # Get total rows after filtering
+        total_rows = len(table_contents) if row_positions is None else len(row_positions)
+        total_pages = (total_rows + page_size - 1) // page_size
+
+        if total_rows > 10000:
+            if filters:
+                await ctx.info(f"Large result set: {total_rows} rows after filtering")
+            else:
+                await ctx.info(f"Large table detected: '{table_name}' has {total_rows} rows")
+
+        # Calculate indices for requested page
+        start_idx = (page - 1) * page_size
+        end_idx = min(start_idx + page_size, total_rows)
+
+        # Check if requested page exists
+        if start_idx >= total_rows:
+            if filters:
+                return f"Error: Page {page} does not exist. The filtered table has {total_pages} page(s)."
+            else:
+                return f"Error: Page {page} does not exist. The table has {total_pages} page(s)."
+
+        # Get the requested page of data
+        with tracer.span("slice", start_row=start_idx, end_row=end_idx):
+            if row_positions is None:
+                page_data = table_contents.iloc[start_idx:end_idx]
+            else:
+                page_data = table_contents.iloc[row_positions[start_idx:end_idx]]
+
+        # Report progress before JSON conversion
+        await ctx.report_progress(75, 100)
+
+        # For very large tables, this serialization step can be slow
+        # Run in thread pool for better responsiveness
+        def serialize_data():
+            return json.loads(page_data.to_json(orient="records"))
+
+        serialized_data = await run_in_thread(serialize_data, stage="serialize")
+        note_rows(len(serialized_data))
+
+        # Create response with pagination metadata
+        response = {
+            "pagination": {
+                "total_rows": total_rows,
+                "total_pages": total_pages,
+                "current_page": page,
+                "page_size": page_size,
+                "showing_rows": len(page_data),
+            },
+            "data": serialized_data,
+        }
+
+        # Report completion
+        await ctx.report_progress(100, 100)
+
+        elapsed_time = time.time() - start_time
+        if elapsed_time > 1.0:  # Only log if it took more than a second
+            if filters:
+                await ctx.info(
+                    f"Retrieved filtered data from '{table_name}' ({total_rows} rows after filtering) in {elapsed_time:.2f} seconds"
+                )
+            else:
+                await ctx.info(f"Retrieved data from '{table_name}' ({total_rows} rows) in {elapsed_time:.2f} seconds")
+
+        return json.dumps(response, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error retrieving table contents: {str(e)}")
+        return f"Error retrieving table contents: {str(e)}"
+
+
+@mcp.tool()
+async def count_rows(ctx: Context, table_name: str, filters: str = None) -> str:
+    """
+    Count the rows of a table, optionally after filtering, without retrieving any data.
+
+    Args:
+        table_name: Name of the table to count
+        filters: Optional filter conditions separated by semicolons (;), using the
+                same syntax as get_table_contents (e.g. "period>100;period<200")
+
+    Returns:
+        The row count in JSON format
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        model = active_model()
+
+        if filters:
+            try:
+                parse_filters(filters)
+            except FilterError as e:
+                return str(e)
+
+        await ctx.report_progress(0, 100)
+
+        try:
+            total_rows = await run_in_thread(count_table_rows, model, table_name, filters)
+        except FilterError as e:
+            return str(e)
+
+        await ctx.report_progress(100, 100)
+
+        return json.dumps({"table_name": table_name, "filters": filters, "row_count": total_rows}, indent=2)
+    except Exception as e:
+        await ctx.info(f"Error counting rows: {str(e)}")
+        return f"Error counting rows: {str(e)}"
+
+
+@mcp.tool(cache=False)
+async def sample_table(
+    ctx: Context,
+    table_name: str,
+    sample_size: int = None,
+    filters: str = None,
+    seed: int = None,
+    stratify_by: str = None,
+    columns: str = None,
+) -> str:
+    """
+    Retrieve a random sample of rows from a table, which is usually more representative than the first page.
+
+    Args:
+        table_name: Name of the table to sample
+        sample_size: Number of rows to return (defaults to --max-rows, capped by
+                --max-sample-rows)
+        filters: Optional filter conditions separated by semicolons (;), using the
+                same syntax as get_table_contents; rows are sampled from the matches
+        seed: Optional random seed; the same seed always returns the same rows
+        stratify_by: Optional column name; each of its values is represented in
+                proportion to its frequency
+        columns: Optional comma separated list of columns to return
+
+    Returns:
+        The sampled rows in JSON format with sampling metadata
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        model = active_model()
+
+        if sample_size is None:
+            sample_size = min(MAX_ROWS, MAX_SAMPLE_ROWS)
+        if sample_size < 1:
+            return "Error: Sample size must be 1 or greater."
+        sample_size = min(sample_size, MAX_SAMPLE_ROWS)
+
+        try:
+            conditions = parse_filters(filters) if filters else None
+        except FilterError as e:
+            return str(e)
+
+        # Draw a seed when none is given so the sample can still be reproduced
+        if seed is None:
+            seed = int(np.random.default_rng().integers(2**31))
+
+        await ctx.info(f"Sampling {sample_size} rows from table '{table_name}'...")
+        await ctx.report_progress(0, 100)
+
+        def draw_sample():
+            # With a column list, only the returned, filtered and stratifying columns are decoded
+            table_contents = None
+            if columns:
+                needed = [name.strip() for name in columns.split(",") if name.strip()]
+                needed += [col_name for _, col_name, _, _ in conditions or []] + ([stratify_by] if stratify_by else [])
+                if set(needed) <= set(schema_columns(model, table_name)):
+                    table_contents = model_cache.get_columns(model, table_name, needed)
+            if table_contents is None:
+                table_contents = model_cache.get_table(model, table_name)
+            selected = parse_column_list(table_contents, table_name, columns)
+            if stratify_by and stratify_by not in table_contents.columns:
+                raise FilterError(f"Error: Column '{stratify_by}' not found in table '{table_name}'.")
+
+            candidates = None
+            if conditions:
+                candidates = np.flatnonzero(build_filter_mask(table_contents, table_name, conditions))
+            population = len(table_contents) if candidates is None else len(candidates)
+
+            # Positions are chosen first; only those rows of the selected columns are taken
+            positions = sample_row_positions(table_contents, sample_size, seed, candidates, stratify_by)
+            column_positions = [table_contents.columns.get_loc(name) for name in selected]
+            sample = table_contents.iloc[positions, column_positions]
+            return population, positions, json.loads(sample.to_json(orient="records"))
+
+        try:
+            population, positions, data = await run_in_thread(draw_sample)
+        except FilterError as e:
+            return str(e)
+        note_rows(len(data))
+
+        await ctx.report_progress(100, 100)
+
+        response = {
+            "sampling": {
+                "method": "stratified" if stratify_by else "uniform",
+                "stratify_by": stratify_by,
+                "seed": seed,
+                "filters": filters,
+                "population_rows": population,
+                "sample_rows": len(positions),
+                "row_positions": positions,
+            },
+            "data": data,
+        }
+        return json.dumps(response, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error sampling table: {str(e)}")
+        return f"Error sampling table: {str(e)}"
+
+
+@mcp.tool()
+async def profile_columns(ctx: Context, table_name: str, columns: str = None, top_k: int = 5, bins: int = 10) -> str:
+    """
+    Profile the data in the columns of a table.
+
+    Args:
+        table_name: Name of the table to profile
+        columns: Optional comma separated list of columns (defaults to all columns)
+        top_k: Number of most frequent values to report per column
+        bins: Number of histogram bins for numeric and date columns
+
+    Returns:
+        Per-column null count, distinct count, min, max, mean, approximate
+        quantiles, most frequent values and histogram in JSON format
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    if top_k < 1:
+        return "Error: top_k must be 1 or greater."
+    if bins < 1:
+        return "Error: bins must be 1 or greater."
+
+    try:
+        model = active_model()
+
+        await ctx.info(f"Profiling columns of table '{table_name}'...")
+        await ctx.report_progress(0, 100)
+
+        try:
+            profiles = await run_in_thread(profile_table_columns, model, table_name, columns, top_k, bins)
+        except FilterError as e:
+            return str(e)
+
+        await ctx.report_progress(100, 100)
+
+        return json.dumps({"table_name": table_name, "columns": profiles}, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error profiling columns: {str(e)}")
+        return f"Error profiling columns: {str(e)}"
+
+
+@mcp.tool()
+async def get_distinct_values(
+    ctx: Context,
+    table_name: str,
+    column_name: str,
+    prefix: str = None,
+    order_by: str = "value",
+    page: int = 1,
+    page_size: int = None,
+) -> str:
+    """
+    List the distinct values of a column with their row counts.
+
+    Args:
+        table_name: Name of the table
+        column_name: Name of the column
+        prefix: Optional case-insensitive prefix the values must start with
+        order_by: Sort order of the values, either "value" or "count" (most frequent first)
+        page: Page number to retrieve (starting from 1)
+        page_size: Number of values per page (defaults to value from --page-size)
+
+    Returns:
+        The distinct values and their counts in JSON format with pagination metadata
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    if page_size is None:
+        page_size = PAGE_SIZE
+    if page < 1:
+        return "Error: Page number must be 1 or greater."
+    if page_size < 1:
+        return "Error: Page size must be 1 or greater."
+    if order_by not in ("value", "count"):
+        return "Error: order_by must be 'value' or 'count'."
+
+    try:
+        model = active_model()
+
+        await ctx.report_progress(0, 100)
+
+        try:
+            dictionary = await run_in_thread(get_column_dictionary, model, table_name, column_name)
+        except FilterError as e:
+            return str(e)
+
+        values = dictionary["values"]
+        counts = dictionary["counts"]
+
+        positions = np.arange(len(values))
+        if prefix:
+            matches = values.astype(str).str.lower().str.startswith(prefix.lower())
+            positions = positions[np.asarray(matches, dtype=bool)]
+
+        if order_by == "count":
+            positions = positions[np.argsort(-counts[positions], kind="stable")]
+        else:
+            try:
+                positions = positions[values[positions].argsort()]
+            except TypeError:
+                # Mixed types cannot be ordered, fall back to their string form
+                positions = positions[values[positions].astype(str).argsort()]
+
+        total_values = len(positions)
+        total_pages = (total_values + page_size - 1) // page_size
+        start_idx = (page - 1) * page_size
+        if total_values and start_idx >= total_values:
+            return f"Error: Page {page} does not exist. The column has {total_pages} page(s) of values."
+        page_positions = positions[start_idx : start_idx + page_size]
+        note_rows(len(page_positions))
+
+        await ctx.report_progress(100, 100)
+
+        response = {
+            "table_name": table_name,
+            "column_name": column_name,
+            "distinct_count": len(values),
+            "null_count": dictionary["null_count"],
+            "pagination": {
+                "total_values": total_values,
+                "total_pages": total_pages,
+                "current_page": page,
+                "page_size": page_size,
+                "showing_values": len(page_positions),
+            },
+            "data": [{"value": values[i], "count": int(counts[i])} for i in page_positions],
+        }
+        return json.dumps(response, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error retrieving distinct values: {str(e)}")
+        return f"Error retrieving distinct values: {str(e)}"
+
+
+@mcp.tool()
+async def find_value(ctx: Context, value: str, tables: str = None, match: str = "exact") -> str:
+    """
+    Find which tables and columns contain a value, e.g. a customer key or product code.
+
+    Args:
+        value: The value to look for (compared case-insensitively as text)
+        tables: Optional comma separated list of tables to search (defaults to all tables)
+        match: How to compare values: "exact", "prefix" or "contains"
+
+    Returns:
+        The matching tables and columns with occurrence counts in JSON format
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    if match not in VALUE_MATCH_MODES:
+        return f"Error: match must be one of: {', '.join(VALUE_MATCH_MODES)}."
+
+    try:
+        model = active_model()
+        table_list = [name.strip() for name in tables.split(",") if name.strip()] if tables else None
+
+        await ctx.info(f"Searching for '{value}' in column dictionaries...")
+        await ctx.report_progress(0, 100)
+
+        columns_searched, matches, errors = await run_in_thread(find_value_in_model, model, value, table_list, match)
+
+        await ctx.report_progress(100, 100)
+
+        response = {
+            "value": value,
+            "match": match,
+            "columns_searched": columns_searched,
+            "matches": matches,
+        }
+        if errors:
+            response["errors"] = errors
+        return json.dumps(response, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error searching for value: {str(e)}")
+        return f"Error searching for value: {str(e)}"
+
+
+@mcp.tool()
+async def get_joined_rows(
+    ctx: Context, table_name: str, dimensions: str, filters: str = None, columns: str = None, limit: int = None
+) -> str:
+    """
+    Retrieve rows of a table joined with related tables by following the model relationships.
+
+    Args:
+        table_name: Name of the table to start from, usually a fact table
+        dimensions: Comma separated list of related tables to join (e.g. "Product,Customer")
+        filters: Optional filter conditions separated by semicolons (;). Columns of
+                joined tables are written as Table[Column]
+                Examples:
+                - "Quantity>5"
+                - "Product[Color]=Red;Customer[Country]=Spain"
+        columns: Optional comma separated list of columns to return, written as
+                Table[Column] (bare names refer to table_name)
+        limit: Maximum number of rows to return (defaults to value from --page-size)
+
+    Returns:
+        The joined rows in JSON format, with columns named Table[Column]
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    if limit is None:
+        limit = PAGE_SIZE
+    if limit < 1:
+        return "Error: Limit must be 1 or greater."
+    limit = min(limit, MAX_ROWS)
+
+    try:
+        model = active_model()
+        dimension_list = [name.strip() for name in dimensions.split(",") if name.strip()]
+        if not dimension_list:
+            return "Error: At least one dimension table must be specified."
+
+        await ctx.info(f"Joining '{table_name}' with {', '.join(dimension_list)}...")
+        await ctx.report_progress(0, 100)
+
+        try:
+            result = await run_in_thread(join_related_rows, model, table_name, dimension_list, filters, columns, limit)
+        except FilterError as e:
+            return str(e)
+        note_rows(len(result["data"]))
+
+        await ctx.report_progress(100, 100)
+
+        response = {
+            "table_name": table_name,
+            "joins": result["joins"],
+            "total_rows": result["total_rows"],
+            "showing_rows": len(result["data"]),
+            "data": result["data"],
+        }
+        if result["warnings"]:
+            response["warnings"] = result["warnings"]
+        return json.dumps(response, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error retrieving joined rows: {str(e)}")
+        return f"Error retrieving joined rows: {str(e)}"
+
+
+@mcp.tool()
+async def check_relationships(ctx: Context, from_table: str = None, to_table: str = None, max_examples: int = 5) -> str:
+    """
+    Check the referential integrity of the model relationships.
+
+    For every relationship, counts keys on the many side with no match on the
+    one side (orphans), duplicate keys on the one side and blank keys.
+
+    Args:
+        from_table: Optional filter for relationships from a specific table
+        to_table: Optional filter for relationships to a specific table
+        max_examples: Number of example orphan and duplicate keys to report per relationship
+
+    Returns:
+        The integrity check results in JSON format
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        model = active_model()
+
+        await ctx.info("Checking relationship integrity...")
+        await ctx.report_progress(0, 100)
+
+        results = await run_in_thread(check_model_relationships, model, from_table, to_table, max_examples)
+
+        await ctx.report_progress(100, 100)
+
+        if not results:
+            return "No relationships found to check."
+
+        response = {
+            "relationships_checked": len(results),
+            "relationships_with_issues": sum(1 for r in results if r["status"] != "ok"),
+            "results": results,
+        }
+        return json.dumps(response, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error checking relationships: {str(e)}")
+        return f"Error checking relationships: {str(e)}"
+
+
+@mcp.tool()
+async def evaluate_measure(
+    ctx: Context, measure_name: str = None, expression: str = None, filters: str = None, group_by: str = None
+) -> str:
+    """
+    Evaluate a DAX measure or expression locally against the loaded model, without the Power BI service.
+
+    Supports SUM, AVERAGE, MIN, MAX, COUNT, DISTINCTCOUNT, COUNTROWS, DIVIDE,
+    arithmetic, references to other measures and CALCULATE with simple column
+    filters (plus ALL / REMOVEFILTERS). Filters propagate across relationships.
+
+    Args:
+        measure_name: Name of a measure from get_dax_measures
+        expression: A DAX expression to evaluate instead, e.g. "SUM(Sales[Amount])"
+        filters: Optional filter context separated by semicolons (;)
+                Example: "Product[Color]=Red;Date[Year]>=2020"
+        group_by: Optional column written as Table[Column]; the measure is evaluated for each of its values
+
+    Returns:
+        The result in JSON format
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    if bool(measure_name) == bool(expression):
+        return "Error: Specify either measure_name or expression."
+
+    try:
+        model = active_model()
+
+        await ctx.info(f"Evaluating {measure_name or expression} locally...")
+        await ctx.report_progress(0, 100)
+
+        try:
+            result = await run_in_thread(evaluate_dax, model, measure_name, expression, filters, group_by, MAX_ROWS)
+        except (FilterError, DaxError) as e:
+            return str(e)
+
+        await ctx.report_progress(100, 100)
+
+        response = {"measure_name": measure_name, "expression": expression, "filters": filters, **result}
+        return json.dumps(response, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error evaluating measure: {str(e)}")
+        return f"Error evaluating measure: {str(e)}"
+
+
+@mcp.tool()
+async def aggregate_by_time(
+    ctx: Context,
+    table_name: str,
+    date_column: str,
+    value_column: str = None,
+    aggregation: str = "count",
+    granularity: str = "month",
+    filters: str = None,
+) -> str:
+    """
+    Aggregate a table over time, e.g. a monthly trend of sales amounts.
+
+    Args:
+        table_name: Name of the table
+        date_column: Date or datetime column to bucket by
+        value_column: Column to aggregate (not needed to count rows)
+        aggregation: One of count, sum, mean, min, max, distinct_count
+        granularity: Bucket size: day, week, month, quarter or year
+        filters: Optional filter conditions separated by semicolons (;), using the
+                same syntax as get_table_contents (e.g. "OrderDate>=today-365d")
+
+    Returns:
+        One aggregated value per time bucket in JSON format
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    if granularity not in TIME_BUCKETS:
+        return f"Error: granularity must be one of: {', '.join(TIME_BUCKETS)}."
+    if aggregation not in TIME_AGGREGATIONS:
+        return f"Error: aggregation must be one of: {', '.join(TIME_AGGREGATIONS)}."
+
+    try:
+        model = active_model()
+
+        await ctx.info(f"Aggregating '{table_name}' by {granularity}...")
+        await ctx.report_progress(0, 100)
+
+        try:
+            buckets = await run_in_thread(
+                aggregate_time_buckets, model, table_name, date_column, value_column, aggregation, granularity, filters
+            )
+        except FilterError as e:
+            return str(e)
+
+        await ctx.report_progress(100, 100)
+
+        response = {
+            "table_name": table_name,
+            "date_column": date_column,
+            "value_column": value_column,
+            "aggregation": aggregation,
+            "granularity": granularity,
+            "filters": filters,
+            "buckets": buckets,
+        }
+        return json.dumps(response, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error aggregating by time: {str(e)}")
+        return f"Error aggregating by time: {str(e)}"
+
+
+@mcp.tool(cache=False, wait_for_model=False)
+async def build_catalog(ctx: Context, directory: str, catalog_path: str = None, workers: int = None) -> str:
+    """
+    Index every PBIX file below a directory into the persistent catalog.
+
+    Files are loaded in parallel worker processes; files that have not changed since
+    the last scan are skipped, so re-running this is cheap.
+
+    Args:
+        directory: Directory to scan recursively for .pbix files
+        catalog_path: Optional path of the catalog database (defaults to the --catalog option)
+        workers: Optional number of worker processes (defaults to one per CPU)
+
+    Returns:
+        Number of files found, indexed, skipped, failed and removed in JSON format
+    """
+
+    if not os.path.isdir(os.path.expanduser(directory)):
+        return f"Error: Directory '{directory}' not found."
+
+    try:
+        await ctx.info(f"Indexing PBIX files under '{directory}'...")
+        await ctx.report_progress(0, 100)
+
+        catalog = await run_in_thread(PbixCatalog, catalog_path or CATALOG_PATH)
+        summary = await run_in_thread(functools.partial(catalog.scan, directory, workers=workers))
+
+        await ctx.report_progress(100, 100)
+
+        return json.dumps({"catalog_path": catalog.db_path, **summary}, indent=2)
+    except Exception as e:
+        await ctx.info(f"Error building catalog: {str(e)}")
+        return f"Error building catalog: {str(e)}"
+
+
+@mcp.tool(cache=False, wait_for_model=False)
+async def search_catalog(ctx: Context, query: str, kind: str = None, catalog_path: str = None, limit: int = 50) -> str:
+    """
+    Search measures, columns, Power Query code, relationships and metadata across every
+    PBIX file in the catalog, e.g. to find which reports use a data source or a measure.
+
+    Args:
+        query: Text to search for, matched as a phrase (e.g. "Sql.Database" or "Total Sales")
+        kind: Optional kind of object: measure, column, power_query, relationship or metadata
+        catalog_path: Optional path of the catalog database (defaults to the --catalog option)
+        limit: Maximum number of results (default: 50)
+
+    Returns:
+        Matching objects with their file paths in JSON format
+    """
+
+    if kind is not None and kind not in SEARCH_KINDS:
+        return f"Error: kind must be one of: {', '.join(SEARCH_KINDS)}."
+
+    try:
+        catalog = await run_in_thread(PbixCatalog, catalog_path or CATALOG_PATH)
+        matches = await run_in_thread(functools.partial(catalog.search, query, kind=kind, limit=limit))
+
+        if not matches:
+            return f"No catalog entries match '{query}'."
+
+        return json.dumps({"query": query, "kind": kind, "matches": matches}, indent=2)
+    except Exception as e:
+        await ctx.info(f"Error searching catalog: {str(e)}")
+        return f"Error searching catalog: {str(e)}"
+
+
+@mcp.tool(cache=False, wait_for_model=False)
+async def diff_models(ctx: Context, old_file_path: str, new_file_path: str, object_types: str = None) -> str:
+    """
+    Compare the structure of two PBIX files, e.g. two versions of a report.
+
+    Args:
+        old_file_path: Path to the original .pbix file
+        new_file_path: Path to the new .pbix file
+        object_types: Optional comma-separated list of object types to compare: measures, columns,
+                      calculated_columns, calculated_tables, relationships, power_queries, m_parameters
+
+    Returns:
+        Added, removed and modified objects per type, with expression diffs, in JSON format
+    """
+
+    paths = [os.path.expanduser(old_file_path), os.path.expanduser(new_file_path)]
+    for file_path in paths:
+        error = validate_pbix_path(file_path)
+        if error:
+            return error
+
+    selected_types = None
+    if object_types:
+        selected_types = [object_type.strip() for object_type in object_types.split(",") if object_type.strip()]
+        unknown = [object_type for object_type in selected_types if object_type not in MODEL_OBJECT_TYPES]
+        if unknown:
+            return f"Error: Unknown object type(s): {', '.join(unknown)}. Use: {', '.join(MODEL_OBJECT_TYPES)}."
+
+    try:
+        await ctx.info(f"Comparing '{os.path.basename(paths[0])}' with '{os.path.basename(paths[1])}'...")
+        await ctx.report_progress(0, 100)
+
+        old_model, new_model = await run_in_thread(open_comparison_models, *paths)
+        await ctx.report_progress(50, 100)
+
+        try:
+            differences = await run_in_thread(diff_model_objects, old_model, new_model, selected_types)
+        finally:
+            unpin_model(old_model)
+            unpin_model(new_model)
+        await ctx.report_progress(100, 100)
+
+        response = {
+            "old_file": paths[0],
+            "new_file": paths[1],
+            "identical": all(not (d["added"] or d["removed"] or d["modified"]) for d in differences.values()),
+            "differences": differences,
+        }
+        return json.dumps(response, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error comparing models: {str(e)}")
+        return f"Error comparing models: {str(e)}"
+
+
+@mcp.tool(cache=False, wait_for_model=False)
+async def diff_table_data(
+    ctx: Context,
+    old_file_path: str,
+    new_file_path: str,
+    table_name: str,
+    key_columns: str,
+    columns: str = None,
+    max_examples: int = 5,
+) -> str:
+    """
+    Compare the rows of a table in two PBIX files, e.g. two snapshots of a fact table.
+
+    Args:
+        old_file_path: Path to the original .pbix file
+        new_file_path: Path to the new .pbix file
+        table_name: Name of the table to compare
+        key_columns: Comma-separated list of the columns identifying a row
+        columns: Optional comma-separated list of the columns to compare (defaults to all
+                 columns present in both versions)
+        max_examples: Maximum number of example rows per kind of difference (default: 5)
+
+    Returns:
+        Counts and examples of inserted, deleted and changed rows in JSON format
+    """
+
+    paths = [os.path.expanduser(old_file_path), os.path.expanduser(new_file_path)]
+    for file_path in paths:
+        error = validate_pbix_path(file_path)
+        if error:
+            return error
+
+    keys = [column.strip() for column in key_columns.split(",") if column.strip()]
+    if not keys:
+        return "Error: key_columns must name at least one column."
+    selected = [column.strip() for column in columns.split(",") if column.strip()] if columns else None
+
+    try:
+        await ctx.info(f"Comparing rows of '{table_name}'...")
+        await ctx.report_progress(0, 100)
+
+        old_model, new_model = await run_in_thread(open_comparison_models, *paths)
+        await ctx.report_progress(30, 100)
+
+        try:
+            differences = await run_in_thread(
+                diff_table_rows, old_model, new_model, table_name, keys, selected, min(max_examples, MAX_ROWS)
+            )
+        except FilterError as e:
+            return str(e)
+        finally:
+            unpin_model(old_model)
+            unpin_model(new_model)
+
+        await ctx.report_progress(100, 100)
+
+        response = {"old_file": paths[0], "new_file": paths[1], "table_name": table_name, **differences}
+        return json.dumps(response, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error comparing table data: {str(e)}")
+        return f"Error comparing table data: {str(e)}"
+
+
+@mcp.tool()
+async def get_m_sources(ctx: Context, function: str = None, argument: str = None) -> str:
+    """
+    List the data sources of the Power Query (M) queries without returning the M code,
+    e.g. all tables loaded from a given SQL server.
+
+    Args:
+        function: Optional connector to filter by, either a function (e.g. "Sql.Database")
+                  or a namespace (e.g. "Sql" or "SharePoint")
+        argument: Optional text that an argument must contain, such as a server name, a file path
+                  or a URL; M parameters are resolved to their current values
+
+    Returns:
+        The matching sources with their query, step and arguments in JSON format
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    try:
+        model = active_model()
+        sources = await run_in_thread(search_m_sources, model, function, argument)
+
+        if not sources:
+            return "No Power Query sources match the given filters."
+
+        return json.dumps(sources, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error retrieving Power Query sources: {str(e)}")
+        return f"Error retrieving Power Query sources: {str(e)}"
+
+
+@mcp.tool()
+async def find_m_steps(ctx: Context, function: str = None, step_type: str = None, query_name: str = None) -> str:
+    """
+    Find Power Query (M) steps by function or step type, e.g. the queries using Table.Buffer
+    or merging tables.
+
+    Args:
+        function: Optional function (e.g. "Table.Buffer") or namespace (e.g. "Table") the step calls
+        step_type: Optional step type: source, merge, append, grouping, custom_column, buffer,
+                   filter, sort, distinct, pivot, unpivot, expand, native_query, ... or other
+        query_name: Optional name of the query to search in
+
+    Returns:
+        The matching steps with their query, types, called functions and dependencies in JSON format
+    """
+
+    if active_model() is None:
+        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+
+    if step_type and step_type not in M_STEP_TYPES:
+        return f"Error: step_type must be one of: {', '.join(M_STEP_TYPES)}."
+
+    try:
+        model = active_model()
+        steps = await run_in_thread(search_m_steps, model, function, step_type, query_name)
+
+        if not steps:
+            return "No Power Query steps match the given filters."
+
+        return json.dumps(steps, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error finding Power Query steps: {str(e)}")
+        return f"Error finding Power Query steps: {str(e)}"
 
 
 @mcp.tool()
-def get_dax_columns(ctx: Context, table_name: str = None, column_name: str = None) -> str:
+async def get_m_query_structure(ctx: Context, query_name: str) -> str:
     """
-    Access calculated column DAX expressions with optional filtering.
+    Get the parsed structure of one Power Query (M) query: its steps, sources, referenced
+    queries and parameters, and the queries that reference it, without the M code.
 
     Args:
-        table_name: Optional filter for columns from a specific table
-        column_name: Optional filter for a specific column by name
+        query_name: Name of the query (the table name for queries loaded to the model)
 
     Returns:
-        A list of calculated columns with names and expressions
+        The structure of the query in JSON format
     """
 
-    if current_model is None:
+    if active_model() is None:
         return "Error: No Power BI file loaded. Please use load_pbix_file first."
 
     try:
-        # Get all calculated columns
-        dax_columns = current_model.dax_columns
-
-        # Apply table filter if specified
-        if table_name:
-            dax_columns = dax_columns[dax_columns["TableName"] == table_name]
-
-        # Apply column name filter if specified
-        if column_name:
-            dax_columns = dax_columns[dax_columns["ColumnName"] == column_name]
+        model = active_model()
+        index = await run_in_thread(get_m_index, model)
 
-        # Return message if no columns match the filters
-        if len(dax_columns) == 0:
-            filters = []
-            if table_name:
-                filters.append(f"table '{table_name}'")
-            if column_name:
-                filters.append(f"name '{column_name}'")
-            filter_text = " and ".join(filters)
-            return f"No calculated columns found with {filter_text}."
+        query = next((q for q in index["queries"] if q["name"] == query_name), None)
+        if query is None:
+            return f"Error: Query '{query_name}' not found."
 
-        return dax_columns.to_json(orient="records", indent=2)
+        referenced_by = [q["name"] for q in index["queries"] if query_name in q["referenced_queries"]]
+        return json.dumps({**query, "referenced_by": referenced_by}, indent=2, cls=NumpyEncoder)
     except Exception as e:
-        ctx.info(f"Error retrieving DAX columns: {str(e)}")
-        return f"Error retrieving DAX columns: {str(e)}"
+        await ctx.info(f"Error parsing Power Query: {str(e)}")
+        return f"Error parsing Power Query: {str(e)}"
 
 
 @mcp.tool()
-def get_schema(ctx: Context, table_name: str = None, column_name: str = None) -> str:
+async def analyze_model_size(ctx: Context, top_n: int = 10) -> str:
     """
-    Get details about the data model schema and column types with optional filtering.
+    Find what makes the model big and how to shrink it: ranks the largest tables and
+    columns by bytes and recommends removing unused columns, reducing high-cardinality
+    text columns and splitting date/time columns, with estimated savings.
 
     Args:
-        table_name: Optional filter for columns from a specific table
-        column_name: Optional filter for a specific column by name
+        top_n: Number of largest tables and columns to list (default: 10)
 
     Returns:
-        A description of the schema with table names, column names, and data types
+        Largest tables and columns and recommendations with estimated savings in JSON format
     """
 
-    if current_model is None:
+    if active_model() is None:
         return "Error: No Power BI file loaded. Please use load_pbix_file first."
 
     try:
-        # Get the complete schema
-        schema = current_model.schema
+        model, file_path = current_snapshot()
 
-        # Apply table filter if specified
-        if table_name:
-            schema = schema[schema["TableName"] == table_name]
+        await ctx.info("Analyzing model size...")
+        await ctx.report_progress(0, 100)
 
-        # Apply column filter if specified
-        if column_name:
-            schema = schema[schema["ColumnName"] == column_name]
+        analysis = await run_in_thread(
+            model_cache.memoize,
+            model,
+            ("size_analysis", top_n),
+            lambda: analyze_model_storage(model, file_path, top_n),
+        )
 
-        # Return message if no columns match the filters
-        if len(schema) == 0:
-            filters = []
-            if table_name:
-                filters.append(f"table '{table_name}'")
-            if column_name:
-                filters.append(f"column '{column_name}'")
-            filter_text = " and ".join(filters)
-            return f"No schema entries found with {filter_text}."
+        await ctx.report_progress(100, 100)
 
-        return schema.to_json(orient="records", indent=2)
+        return json.dumps(analysis, indent=2, cls=NumpyEncoder)
     except Exception as e:
-        ctx.info(f"Error retrieving schema: {str(e)}")
-        return f"Error retrieving schema: {str(e)}"
+        await ctx.info(f"Error analyzing model size: {str(e)}")
+        return f"Error analyzing model size: {str(e)}"
 
 
-@mcp.tool()
-async def get_relationships(ctx: Context, from_table: str = None, to_table: str = None) -> str:
+@mcp.tool(cache=False, wait_for_model=False)
+def get_cache_stats(ctx: Context) -> str:
     """
-    Get the details about the data model relationships with optional filtering.
+    Get hit rates and sizes of the server caches.
 
-    Args:
-        from_table: Optional filter for relationships from a specific table
-        to_table: Optional filter for relationships to a specific table
+    Returns:
+        Response cache hits, misses, evictions and hit rate, and the number of decoded
+        tables and memoized artifacts of the loaded model, in JSON format
+    """
+
+    try:
+        stats = {"response_cache": response_cache.stats(), "model_cache": model_cache.stats()}
+        return json.dumps(stats, indent=2)
+    except Exception as e:
+        ctx.info(f"Error retrieving cache statistics: {str(e)}")
+        return f"Error retrieving cache statistics: {str(e)}"
+
+
+@mcp.tool(cache=False, wait_for_model=False)
+async def get_memory_report(ctx: Context) -> str:
+    """
+    Get a breakdown of the memory used by the server.
 
     Returns:
-        A description of the relationships between tables in the model
+        Resident and peak resident memory of the process, tracemalloc totals when tracing
+        is enabled, and the estimated bytes held by the loaded model, the models opened for
+        comparison, each decoded table, each kind of index and the response cache, in JSON format
     """
 
-    if current_model is None:
-        return "Error: No Power BI file loaded. Please use load_pbix_file first."
+    def build_report():
+        with _comparison_lock:
+            comparison_models = list(_comparison_models.items())
+        cache_usage = model_cache.memory_usage()
+        model_bytes = model_buffer_size(active_model()) if active_model() is not None else None
+        components = {
+            "model": model_bytes or 0,
+            "comparison_models": sum(model_buffer_size(model) or 0 for _, model in comparison_models),
+            "decoded_tables": sum(cache_usage["tables"].values()),
+            "indexes": sum(cache_usage["artifacts"].values()),
+            "response_cache": response_cache.stats()["size_bytes"],
+        }
+        return {
+            "process": process_memory(),
+            "tracemalloc": traced_memory() or "disabled (start the server with PYTHONTRACEMALLOC=1 to enable)",
+            "model": (
+                {"file": current_model_label(), "data_model_bytes": model_bytes} if active_model() is not None else None
+            ),
+            "comparison_models": [
+                {"fingerprint": fingerprint, "data_model_bytes": model_buffer_size(model)}
+                for fingerprint, model in comparison_models
+            ],
+            "decoded_tables": cache_usage["tables"],
+            "indexes": cache_usage["artifacts"],
+            "components_bytes": components,
+            "total_accounted_bytes": sum(components.values()),
+        }
 
     try:
-        # Define the operation to get relationships
-        def get_filtered_relationships():
-            # Access the global model
-            # We need to capture current_model from the outer scope
-            model = current_model
-            # Get all relationships
-            relationships = model.relationships
-
-            # Apply from_table filter if specified
-            if from_table:
-                relationships = relationships[relationships["FromTableName"] == from_table]
+        report = await run_in_thread(build_report)
+        return json.dumps(report, indent=2, cls=NumpyEncoder)
+    except Exception as e:
+        await ctx.info(f"Error building memory report: {str(e)}")
+        return f"Error building memory report: {str(e)}"
 
-            # Apply to_table filter if specified
-            if to_table:
-                relationships = relationships[relationships["ToTableName"] == to_table]
 
-            return relationships
+def close_model(model):
+    """Release the OS resources (memory maps, temporary files) of a PBIXRay instance."""
+    close = getattr(model, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception as e:
+            print(f"Error closing model: {str(e)}", file=sys.stderr)
 
-        # Run the potentially slow operation asynchronously
-        operation_name = "relationship retrieval"
-        if from_table or to_table:
-            filters = []
-            if from_table:
-                filters.append(f"from '{from_table}'")
-            if to_table:
-                filters.append(f"to '{to_table}'")
-            filter_text = " and ".join(filters)
-            operation_name += f" ({filter_text})"
 
-        relationships = await run_model_operation(ctx, operation_name, get_filtered_relationships)
+@mcp.tool(cache=False)
+def unload_model(ctx: Context) -> str:
+    """
+    Unload the current Power BI model and release its memory.
 
-        # Return message if no relationships match the filters
-        if len(relationships) == 0:
-            filters = []
-            if from_table:
-                filters.append(f"from table '{from_table}'")
-            if to_table:
-                filters.append(f"to table '{to_table}'")
-            filter_text = " and ".join(filters)
-            return f"No relationships found {filter_text}."
+    Returns:
+        The unloaded file and the resident memory before and after, in JSON format
+    """
+    model = active_model()
+    if model is None:
+        return "Error: No Power BI file loaded."
 
-        return relationships.to_json(orient="records", indent=2)
+    try:
+        name = current_model_label()
+        select_model(None, None)
+        # A model shared with other sessions stays loaded for them
+        release_model(model)
+        if not SESSION_MODELS:
+            response_cache.clear()
+        del model
+
+        return json.dumps({"unloaded": name, **release_memory()}, indent=2)
     except Exception as e:
-        await ctx.info(f"Error retrieving relationships: {str(e)}")
-        return f"Error retrieving relationships: {str(e)}"
+        ctx.info(f"Error unloading model: {str(e)}")
+        return f"Error unloading model: {str(e)}"
 
 
-@mcp.tool()
-async def get_table_contents(ctx: Context, table_name: str, filters: str = None, page: int = 1, page_size: int = None) -> str:
+@mcp.tool(cache=False, wait_for_model=False)
+def get_loaded_models(ctx: Context) -> str:
     """
-    Retrieve the contents of a specified table with optional filtering and pagination.
+    List the models loaded in the server and the one used by this session.
 
-    Args:
-        table_name: Name of the table to retrieve
-        filters: Optional filter conditions separated by semicolons (;)
-                Examples:
-                - "locationid=albacete"
-                - "period>100;period<200"
-                - "locationid=albacete;period>100;period<200"
-        page: Page number to retrieve (starting from 1)
-        page_size: Number of rows per page (defaults to value from --page-size)
+    With the HTTP transport every session loads and selects its own model; sessions
+    loading the same file share one copy of it.
 
     Returns:
-        The table contents in JSON format with pagination metadata
+        The file and fingerprint of each loaded model, in JSON format
     """
 
-    if current_model is None:
-        return "Error: No Power BI file loaded. Please use load_pbix_file first."
-
     try:
-        import time
-
-        start_time = time.time()
-
-        # Use command-line page size if not specified
-        if page_size is None:
-            page_size = PAGE_SIZE
+        selected, server = active_model(), _model_snapshot
+        with _session_lock:
+            sessions = list(_session_models.values())
+        models = {get_model_fingerprint(server.model): server} if server.model else {}
+        for model, file_path in sessions:
+            if model is not None:
+                models[get_model_fingerprint(model)] = (model, file_path)
+        loaded = [
+            {
+                "fingerprint": fingerprint,
+                "file": os.path.basename(file_path) if file_path else None,
+                "sessions": sum(1 for model_in_session, _ in sessions if model_in_session is model),
+                "selected": model is selected,
+            }
+            for fingerprint, (model, file_path) in models.items()
+        ]
+        return json.dumps({"models": loaded, "session_models": SESSION_MODELS}, indent=2)
+    except Exception as e:
+        ctx.info(f"Error listing loaded models: {str(e)}")
+        return f"Error listing loaded models: {str(e)}"
 
-        # Validate pagination parameters
-        if page < 1:
-            return "Error: Page number must be 1 or greater."
-        if page_size < 1:
-            return "Error: Page size must be 1 or greater."
 
-        # Log for large tables
-        if filters:
-            await ctx.info(f"Retrieving filtered data from table '{table_name}'...")
-        else:
-            await ctx.info(f"Retrieving page {page} from table '{table_name}'...")
+@mcp.tool(cache=False, wait_for_model=False)
+def get_load_status(ctx: Context) -> str:
+    """
+    Get the progress of the files given with --load-file, which load in the background.
 
-        # Report initial progress
-        await ctx.report_progress(0, 100)
+    Returns:
+        The status (pending, loading, loaded, failed or unloaded), size, load time and error of
+        each file, and whether all loads are finished, in JSON format
+    """
 
-        # Fetch the table data
-        def fetch_table():
-            return current_model.get_table(table_name)
+    try:
+        now = time.time()
+        with _startup_lock:
+            entries = list(_startup_loads.values())
+        loads = [
+            {
+                "file": os.path.basename(entry["path"]),
+                "path": entry["path"],
+                "status": entry["status"],
+                "size_mb": entry["size_mb"],
+                "elapsed_seconds": (
+                    round((entry["finished"] or now) - entry["started"], 2) if entry["started"] is not None else None
+                ),
+                "error": entry["error"],
+            }
+            for entry in entries
+        ]
+        default = startup_default()
+        return json.dumps(
+            {
+                "loads": loads,
+                "ready": all(entry["status"] not in ("pending", "loading") for entry in entries),
+                "current_model": os.path.basename(default["path"]) if default else None,
+            },
+            indent=2,
+        )
+    except Exception as e:
+        ctx.info(f"Error retrieving load status: {str(e)}")
+        return f"Error retrieving load status: {str(e)}"
 
-        # Run the table fetching in a thread pool
-        table_contents = await anyio.to_thread.run_sync(fetch_table)
 
-        # Report progress after fetching table
-        await ctx.report_progress(25, 100)
+@mcp.tool(cache=False, wait_for_model=False)
+def clear_caches(ctx: Context) -> str:
+    """
+    Drop the decoded tables, indexes and cached responses, close the models opened for
+    comparison, and release the memory. The loaded model stays loaded.
 
-        # Apply filters if provided
-        if filters:
-            await ctx.info(f"Applying filters: {filters}")
+    Returns:
+        What was cleared and the resident memory before and after, in JSON format
+    """
 
-            # Split the filters by semicolon
-            filter_conditions = filters.split(";")
-
-            # Process each filter condition
-            for condition in filter_conditions:
-                # Find the operator in the condition
-                for op in [">=", "<=", "!=", "=", ">", "<"]:
-                    if op in condition:
-                        col_name, value = condition.split(op, 1)
-                        col_name = col_name.strip()
-                        value = value.strip()
-
-                        # Check if column exists
-                        if col_name not in table_contents.columns:
-                            return f"Error: Column '{col_name}' not found in table '{table_name}'."
-
-                        # Apply the filter based on the operator
-                        try:
-                            # Try to convert value to numeric if possible
-                            try:
-                                if "." in value:
-                                    numeric_value = float(value)
-                                else:
-                                    numeric_value = int(value)
-                                value = numeric_value
-                            except ValueError:
-                                # Keep as string if not numeric
-                                pass
-
-                            # Apply the appropriate filter
-                            if op == "=":
-                                table_contents = table_contents[table_contents[col_name] == value]
-                            elif op == ">":
-                                table_contents = table_contents[table_contents[col_name] > value]
-                            elif op == "<":
-                                table_contents = table_contents[table_contents[col_name] < value]
-                            elif op == ">=":
-                                table_contents = table_contents[table_contents[col_name] >= value]
-                            elif op == "<=":
-                                table_contents = table_contents[table_contents[col_name] <= value]
-                            elif op == "!=":
-                                table_contents = table_contents[table_contents[col_name] != value]
-                        except Exception as e:
-                            return f"Error applying filter '{condition}': {str(e)}"
-
-                        break
-                else:
-                    return f"Error: Invalid filter condition '{condition}'. Must contain one of these operators: =, >, <, >=, <=, !="
+    try:
+        cache_stats = model_cache.stats()
+        cleared = {
+            "decoded_tables": len(cache_stats["tables"]),
+            "artifacts": cache_stats["artifacts"],
+            "responses": response_cache.stats()["entries"],
+        }
+        model_cache.clear()
+        response_cache.clear()
+        with _comparison_lock:
+            comparison_models = list(_comparison_models.values())
+            _comparison_models.clear()
+        cleared["comparison_models"] = len(comparison_models)
+        for model in comparison_models:
+            # Diffs still running on a model close it when they finish
+            release_model(model)
+        del comparison_models
+
+        return json.dumps({"cleared": cleared, **release_memory()}, indent=2)
+    except Exception as e:
+        ctx.info(f"Error clearing caches: {str(e)}")
+        return f"Error clearing caches: {str(e)}"
 
-        # Report progress after filtering
-        await ctx.report_progress(50, 100)
 
-        # Get total rows after filtering
-        total_rows = len(table_contents)
-        total_pages = (total_rows + page_size - 1) // page_size
+@mcp.tool(cache=False, wait_for_model=False)
+def set_profiling(ctx: Context, enabled: bool, tools: str = None, threshold_seconds: float = None, format: str = None) -> str:
+    """
+    Turn profiling of tool calls on or off without restarting the server.
 
-        if total_rows > 10000:
-            if filters:
-                await ctx.info(f"Large result set: {total_rows} rows after filtering")
-            else:
-                await ctx.info(f"Large table detected: '{table_name}' has {total_rows} rows")
+    Profiles are written to the profile directory, one file per call, named after
+    the tool and the time of the call.
 
-        # Calculate indices for requested page
-        start_idx = (page - 1) * page_size
-        end_idx = min(start_idx + page_size, total_rows)
+    Args:
+        enabled: Whether to profile tool calls
+        tools: Optional comma separated list of tools to profile ("all" for every tool)
+        threshold_seconds: Only keep profiles of calls that took at least this many seconds
+        format: "collapsed" (sampled stacks for flame graphs) or "pstats" (cProfile statistics)
 
-        # Check if requested page exists
-        if start_idx >= total_rows:
-            if filters:
-                return f"Error: Page {page} does not exist. The filtered table has {total_pages} page(s)."
-            else:
-                return f"Error: Page {page} does not exist. The table has {total_pages} page(s)."
+    Returns:
+        The profiling settings in JSON format
+    """
 
-        # Get the requested page of data
-        page_data = table_contents.iloc[start_idx:end_idx]
+    try:
+        tool_list = None
+        if tools is not None:
+            tool_list = [] if tools.strip() == "all" else [name.strip() for name in tools.split(",") if name.strip()]
+        tool_profiler.configure(enabled=enabled, tools=tool_list, threshold=threshold_seconds, format=format)
+        return json.dumps(tool_profiler.settings(), indent=2)
+    except ValueError as e:
+        return f"Error: {str(e)}"
+    except Exception as e:
+        ctx.info(f"Error configuring profiling: {str(e)}")
+        return f"Error configuring profiling: {str(e)}"
 
-        # Report progress before JSON conversion
-        await ctx.report_progress(75, 100)
 
-        # For very large tables, this serialization step can be slow
-        # Run in thread pool for better responsiveness
-        def serialize_data():
-            return json.loads(page_data.to_json(orient="records"))
+@mcp.tool(cache=False, wait_for_model=False)
+def get_server_metrics(ctx: Context, tool_name: str = None, format: str = "json") -> str:
+    """
+    Get per-tool call metrics: call and error counts, latency, thread-pool wait and run
+    times, response sizes and row counts, labelled by tool and model.
 
-        serialized_data = await anyio.to_thread.run_sync(serialize_data)
+    Args:
+        tool_name: Optional tool to report on
+        format: "json" for summaries with approximate quantiles, or "prometheus" for the
+                Prometheus text exposition format
 
-        # Create response with pagination metadata
-        response = {
-            "pagination": {
-                "total_rows": total_rows,
-                "total_pages": total_pages,
-                "current_page": page,
-                "page_size": page_size,
-                "showing_rows": len(page_data),
-            },
-            "data": serialized_data,
-        }
+    Returns:
+        The metrics in the requested format
+    """
 
-        # Report completion
-        await ctx.report_progress(100, 100)
+    if format not in ("json", "prometheus"):
+        return "Error: format must be 'json' or 'prometheus'."
 
-        elapsed_time = time.time() - start_time
-        if elapsed_time > 1.0:  # Only log if it took more than a second
-            if filters:
-                await ctx.info(
-                    f"Retrieved filtered data from '{table_name}' ({total_rows} rows after filtering) in {elapsed_time:.2f} seconds"
-                )
-            else:
-                await ctx.info(f"Retrieved data from '{table_name}' ({total_rows} rows) in {elapsed_time:.2f} seconds")
+    try:
+        if format == "prometheus":
+            return tool_metrics.to_prometheus()
 
-        return json.dumps(response, indent=2, cls=NumpyEncoder)
+        metrics = {
+            "uptime_seconds": round(time.time() - tool_metrics.started, 1),
+            "response_cache": response_cache.stats(),
+            "tools": tool_metrics.snapshot(tool_name),
+        }
+        return json.dumps(metrics, indent=2)
     except Exception as e:
-        await ctx.info(f"Error retrieving table contents: {str(e)}")
-        return f"Error retrieving table contents: {str(e)}"
+        ctx.info(f"Error retrieving server metrics: {str(e)}")
+        return f"Error retrieving server metrics: {str(e)}"
 
 
 @mcp.tool()
@@ -755,12 +4458,12 @@ def get_statistics(ctx: Context, table_name: str = None, column_name: str = None
         Statistics about column cardinality and byte sizes
     """
 
-    if current_model is None:
+    if active_model() is None:
         return "Error: No Power BI file loaded. Please use load_pbix_file first."
 
     try:
         # Get all statistics
-        statistics = current_model.statistics
+        statistics = active_model().statistics
 
         # Apply table filter if specified
         if table_name:
@@ -795,7 +4498,8 @@ async def get_model_summary(ctx: Context) -> str:
         A summary of the model with key metrics and information
     """
 
-    if current_model is None:
+    model, model_path = active_model(), active_model_path()
+    if model is None:
         return "Error: No Power BI file loaded. Please use load_pbix_file first."
 
     try:
@@ -807,33 +4511,27 @@ async def get_model_summary(ctx: Context) -> str:
 
         # First, get the basic info
         summary = {
-            "file_path": current_model_path,
-            "file_name": os.path.basename(current_model_path),
-            "size_bytes": current_model.size,
-            "size_mb": round(current_model.size / (1024 * 1024), 2),
+            "file_path": model_path,
+            "file_name": os.path.basename(model_path),
+            "size_bytes": model.size,
+            "size_mb": round(model.size / (1024 * 1024), 2),
         }
 
         await ctx.report_progress(25, 100)
 
         # Now add tables info
-        summary["tables_count"] = len(current_model.tables)
-        summary["tables"] = (
-            current_model.tables.tolist() if isinstance(current_model.tables, np.ndarray) else current_model.tables
-        )
+        summary["tables_count"] = len(model.tables)
+        summary["tables"] = model.tables.tolist() if isinstance(model.tables, np.ndarray) else model.tables
 
         await ctx.report_progress(50, 100)
 
         # Add measures info
-        summary["measures_count"] = (
-            len(current_model.dax_measures) if hasattr(current_model.dax_measures, "__len__") else "Unknown"
-        )
+        summary["measures_count"] = len(model.dax_measures) if hasattr(model.dax_measures, "__len__") else "Unknown"
 
         await ctx.report_progress(75, 100)
 
         # Add relationships info
-        summary["relationships_count"] = (
-            len(current_model.relationships) if hasattr(current_model.relationships, "__len__") else "Unknown"
-        )
+        summary["relationships_count"] = len(model.relationships) if hasattr(model.relationships, "__len__") else "Unknown"
 
         # Report completion
         await ctx.report_progress(100, 100)
@@ -844,38 +4542,188 @@ async def get_model_summary(ctx: Context) -> str:
         return f"Error creating model summary: {str(e)}"
 
 
-def load_file_sync(file_path):
+# Model artifacts exposed as resources: pbix://<fingerprint>/<artifact>
+MODEL_RESOURCES = {
+    "schema": "schema",
+    "measures": "dax_measures",
+    "calculated_columns": "dax_columns",
+    "calculated_tables": "dax_tables",
+    "relationships": "relationships",
+    "power_query": "power_query",
+    "m_parameters": "m_parameters",
+    "statistics": "statistics",
+}
+
+
+def model_resource_uri(model, path):
+    """Build the content-addressed URI of a model artifact."""
+    return f"pbix://{get_model_fingerprint(model)}/{path}"
+
+
+def _resource_model(fingerprint):
+    # Resources are only served for the loaded model; other fingerprints are stale URIs
+    model = active_model()
+    if model is None:
+        raise ValueError("No Power BI file loaded. Please use load_pbix_file first.")
+    current = get_model_fingerprint(model)
+    if fingerprint != current:
+        raise ValueError(
+            f"Model '{fingerprint}' is not loaded (current model: '{current}'). Read pbix://model for current URIs."
+        )
+    return model
+
+
+def render_resource(model, path, build_json, bounded=False):
     """
-    Load a PBIX file synchronously.
+    Serialize a model artifact once per model.
+
+    The payload carries the URI and an ETag derived from the model fingerprint and
+    the content hash, so clients can cache it for as long as the URI is valid.
 
     Args:
-        file_path: Path to the PBIX file to load
+        model: The loaded model
+        path: Path of the artifact within the model URI (e.g. "schema" or "tables/Sales?page=2")
+        build_json: Function returning the JSON text of the artifact
+        bounded: Keep the payload in the size-bounded response cache instead of
+            memoizing it for the lifetime of the model. Used for table pages,
+            of which there can be any number.
 
     Returns:
-        A message indicating success or failure
+        The JSON payload of the resource
     """
-    global current_model, current_model_path
 
-    file_path = os.path.expanduser(file_path)
-    if not os.path.exists(file_path):
-        return f"Error: File '{file_path}' not found."
+    def compute():
+        content = build_json()
+        digest = hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+        etag = f'"{get_model_fingerprint(model)}-{digest}"'
+        uri = model_resource_uri(model, path)
+        return f'{{"uri": {json.dumps(uri)}, "etag": {json.dumps(etag)}, "content": {content}}}'
+
+    if not bounded:
+        return model_cache.memoize(model, ("resource", path), compute)
+
+    key = ("resource", get_model_fingerprint(model), path)
+    payload = response_cache.get(key, model)
+    if payload is None:
+        payload = compute()
+        response_cache.put(key, model, payload)
+    return payload
+
+
+def render_table_page(model, table_name, page, page_size):
+    """Serialize one page of a table, with the same pagination metadata as get_table_contents."""
+    table_contents = model_cache.get_table(model, table_name)
+    total_rows = len(table_contents)
+    total_pages = max(1, (total_rows + page_size - 1) // page_size)
+    if page > total_pages:
+        raise ValueError(f"Page {page} does not exist. The table has {total_pages} page(s).")
+
+    page_data = table_contents.iloc[(page - 1) * page_size : page * page_size]
+    pagination = {
+        "total_rows": total_rows,
+        "total_pages": total_pages,
+        "current_page": page,
+        "page_size": page_size,
+        "showing_rows": len(page_data),
+    }
+    next_page = None
+    if page < total_pages:
+        next_page = model_resource_uri(model, f"tables/{quote(table_name)}?page={page + 1}&page_size={page_size}")
+    return (
+        f'{{"pagination": {json.dumps(pagination)}, "next": {json.dumps(next_page)}, '
+        f'"data": {page_data.to_json(orient="records", date_format="iso")}}}'
+    )
+
+
+@mcp.resource("pbix://model", mime_type="application/json")
+def model_resource_index() -> str:
+    """The fingerprint of the loaded model and the URIs of its artifacts."""
+    model = active_model()
+    if model is None:
+        raise ValueError("No Power BI file loaded. Please use load_pbix_file first.")
+    index = {
+        "fingerprint": get_model_fingerprint(model),
+        "file": active_model_path(),
+        "resources": [model_resource_uri(model, name) for name in MODEL_RESOURCES]
+        + [model_resource_uri(model, "tables")]
+        + [model_resource_uri(model, f"tables/{quote(name)}") for name in model.tables],
+    }
+    return json.dumps(index, indent=2, cls=NumpyEncoder)
+
+
+@mcp.resource("pbix://{fingerprint}/{artifact}", mime_type="application/json")
+async def model_artifact_resource(fingerprint: str, artifact: str) -> str:
+    """
+    A model artifact: schema, measures, calculated_columns, calculated_tables, relationships,
+    power_query, m_parameters, statistics, or tables (the list of table names).
+    """
+    model = _resource_model(fingerprint)
 
-    if not file_path.lower().endswith(".pbix"):
-        return f"Error: File '{file_path}' is not a .pbix file."
+    if artifact == "tables":
+        return render_resource(model, artifact, lambda: json.dumps(list(model.tables), cls=NumpyEncoder))
+    if artifact not in MODEL_RESOURCES:
+        raise ValueError(f"Unknown artifact '{artifact}'. Use one of: {', '.join(MODEL_RESOURCES)}, tables.")
 
-    try:
-        print(f"Loading PBIX file: {file_path}", file=sys.stderr)
-        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-        print(f"File size: {file_size_mb:.2f} MB", file=sys.stderr)
+    def build_json():
+        return getattr(model, MODEL_RESOURCES[artifact]).to_json(orient="records", date_format="iso")
 
-        # Load the file
-        current_model = PBIXRay(file_path)
-        current_model_path = file_path
+    return await run_in_thread(render_resource, model, artifact, build_json)
 
-        return f"Successfully loaded '{os.path.basename(file_path)}'"
-    except Exception as e:
-        print(f"Error loading PBIX file: {str(e)}", file=sys.stderr)
-        return f"Error loading file: {str(e)}"
+
+@mcp.resource("pbix://{fingerprint}/tables/{table}", mime_type="application/json")
+async def table_page_resource(fingerprint: str, table: str) -> str:
+    """A page of table rows, e.g. pbix://<fingerprint>/tables/Sales?page=3&page_size=50."""
+    model = _resource_model(fingerprint)
+
+    table_name, _, query = table.partition("?")
+    table_name = unquote(table_name)
+    params = parse_qs(query)
+    try:
+        page = int(params.get("page", ["1"])[0])
+        page_size = int(params.get("page_size", [str(PAGE_SIZE)])[0])
+    except ValueError:
+        raise ValueError("page and page_size must be integers.")
+    if page < 1 or page_size < 1:
+        raise ValueError("page and page_size must be positive.")
+    page_size = min(page_size, MAX_ROWS)
+
+    # Normalize the path so equivalent URIs share one cached payload
+    path = f"tables/{quote(table_name)}?page={page}&page_size={page_size}"
+    return await run_in_thread(
+        render_resource, model, path, lambda: render_table_page(model, table_name, page, page_size), True
+    )
+
+
+def run_http_server():
+    """
+    Serve MCP sessions over the streamable HTTP transport until interrupted.
+
+    On shutdown the server stops accepting connections, waits up to --shutdown-timeout
+    seconds for running requests and then closes the loaded models.
+    """
+    import uvicorn
+
+    mcp.settings.host, mcp.settings.port = args.host, args.port
+    security = mcp.settings.transport_security
+    if security is not None and args.host not in ("127.0.0.1", "localhost", "::1"):
+        security.allowed_hosts.append(f"{args.host}:*")
+
+    config = uvicorn.Config(
+        mcp.streamable_http_app(),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+        timeout_graceful_shutdown=args.shutdown_timeout,
+    )
+    print(f"Serving MCP over HTTP on http://{args.host}:{args.port}{mcp.settings.streamable_http_path}", file=sys.stderr)
+    try:
+        anyio.run(uvicorn.Server(config).serve)
+    finally:
+        models = {id(model): model for model in [_model_snapshot.model, *_shared_models.values()] if model is not None}
+        model_cache.clear()
+        for model in models.values():
+            close_model(model)
+        print("PBIXRay MCP Server stopped", file=sys.stderr)
 
 
 def main():
@@ -891,25 +4739,53 @@ def main():
     if disallowed_tools:
         print(f"Security: Disallowed tools: {', '.join(disallowed_tools)}", file=sys.stderr)
 
+    global SESSION_MODELS, WORKERS, LOAD_TIMEOUT
+
+    response_cache.configure(max_entries=args.response_cache_size)
+    WORKERS = args.workers
+    LOAD_TIMEOUT = args.load_timeout
+    if args.transport == "http":
+        # Every session selects its own model; the caches are shared between sessions
+        SESSION_MODELS = True
+        model_cache.max_models = args.max_models
+
+    if args.metrics_file:
+        start_prometheus_file_writer(tool_metrics, os.path.expanduser(args.metrics_file))
+        print(f"Writing tool metrics to {args.metrics_file}", file=sys.stderr)
+    if args.metrics_port:
+        start_prometheus_server(tool_metrics, args.metrics_port)
+        print(f"Serving tool metrics on http://127.0.0.1:{args.metrics_port}/metrics", file=sys.stderr)
+    if args.trace_file:
+        tracer.configure(os.path.expanduser(args.trace_file))
+        print(f"Writing tool call traces to {args.trace_file}", file=sys.stderr)
+
+    tool_profiler.configure(
+        enabled=args.profile,
+        tools=args.profile_tools,
+        threshold=args.profile_threshold,
+        format=args.profile_format,
+        output_dir=os.path.expanduser(args.profile_dir),
+    )
+    if args.profile:
+        print(f"Writing tool call profiles to {tool_profiler.output_dir}", file=sys.stderr)
+
     # Configure server options to handle large PBIX files
     # The default FastMCP timeout is around 30 seconds which can be too short for large PBIX files
     # Set a higher default timeout for all operations
     print("Configuring extended timeouts for large file handling...", file=sys.stderr)
 
-    # Check if we need to auto-load a file
+    # Load the files given with --load-file in the background so that the client can connect right away
     if AUTO_LOAD_FILE:
-        file_path = os.path.expanduser(AUTO_LOAD_FILE)
-        if os.path.exists(file_path):
-            print(f"Auto-load file specified: {file_path}", file=sys.stderr)
-            # Load the file before starting the server
-            result = load_file_sync(file_path)
-            print(f"Auto-load result: {result}", file=sys.stderr)
-        else:
-            print(f"Warning: Auto-load file not found: {file_path}", file=sys.stderr)
+        for entry in start_background_loads(AUTO_LOAD_FILE):
+            if entry["status"] == "failed":
+                print(f"Warning: Cannot load {entry['path']}: {entry['error']}", file=sys.stderr)
 
-    # Run the server with stdio transport
     try:
-        mcp.run(transport="stdio")
+        if args.transport == "http":
+            run_http_server()
+        else:
+            # Run the server with stdio transport
+            mcp.run(transport="stdio")
     except Exception as e:
         print(f"PBIXRay MCP Server error: {str(e)}", file=sys.stderr)
         sys.exit(1)
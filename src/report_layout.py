@@ -0,0 +1,87 @@
+"""
+Report layout reader
+
+Reads the report pages stored in a .pbix file (the legacy "Report/Layout"
+document or the JSON files of the enhanced report format) and lists the
+model fields that the visuals and filters use.
+
+Visual configurations are JSON documents nested as strings inside the
+layout. Field references appear as {"Expression": {"SourceRef": ...},
+"Property": name}, where the source is either an entity (table) name or an
+alias declared in the "From" clause of the visual's query.
+"""
+
+import json
+import zipfile
+
+
+def _decode(data):
+    # The legacy layout is UTF-16 LE; the enhanced report format uses UTF-8
+    if data[:2] in (b"\xff\xfe", b"\xfe\xff") or (len(data) > 1 and data[1:2] == b"\x00"):
+        return data.decode("utf-16")
+    return data.decode("utf-8-sig")
+
+
+def _layout_documents(file_path):
+    with zipfile.ZipFile(file_path) as archive:
+        for name in archive.namelist():
+            if name == "Report/Layout" or (name.startswith("Report/definition/") and name.endswith(".json")):
+                try:
+                    yield json.loads(_decode(archive.read(name)))
+                except (ValueError, UnicodeDecodeError):
+                    continue
+
+
+def _collect(node, aliases, found):
+    if isinstance(node, str):
+        text = node.strip()
+        if text[:1] in ("{", "["):
+            try:
+                _collect(json.loads(text), aliases, found)
+            except ValueError:
+                pass
+        return
+    if isinstance(node, list):
+        for item in node:
+            _collect(item, aliases, found)
+        return
+    if not isinstance(node, dict):
+        return
+
+    if isinstance(node.get("From"), list):
+        aliases = dict(aliases)
+        for source in node["From"]:
+            if isinstance(source, dict) and source.get("Name") and source.get("Entity"):
+                aliases[source["Name"]] = source["Entity"]
+
+    expression = node.get("Expression")
+    if isinstance(node.get("Property"), str) and isinstance(expression, dict):
+        source = expression.get("SourceRef")
+        if isinstance(source, dict):
+            entity = source.get("Entity") or aliases.get(source.get("Source"))
+            if entity:
+                found.add((entity, node["Property"]))
+
+    for value in node.values():
+        _collect(value, aliases, found)
+
+
+def read_report_fields(file_path):
+    """
+    List the model fields used by the report pages of a .pbix file.
+
+    Args:
+        file_path: Path to the .pbix file
+
+    Returns:
+        A set of (table, column or measure) pairs, or None when the file has no report layout
+    """
+    found = set()
+    has_layout = False
+    try:
+        for document in _layout_documents(file_path):
+            has_layout = True
+            _collect(document, {}, found)
+    except (OSError, zipfile.BadZipFile):
+        return None
+    return found if has_layout else None
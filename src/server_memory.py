@@ -0,0 +1,121 @@
+"""
+Memory accounting
+
+Estimates the memory held by models, decoded tables and cached artifacts,
+reads the resident memory of the process, and returns freed memory to the
+operating system. Only the standard library is used, so resident memory is
+reported on Linux and macOS and left out elsewhere.
+"""
+
+import ctypes
+import ctypes.util
+import gc
+import sys
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+
+def estimate_size(obj, _seen=None):
+    """
+    Estimate the memory held by an object and everything it references.
+
+    pandas objects report their deep memory usage and numpy arrays their buffer
+    size. Containers are walked recursively, counting shared objects once.
+    """
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        size = obj.nbytes
+        if obj.dtype == object:
+            size += sum(estimate_size(item, seen) for item in obj.ravel())
+        return size
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(key, seen) + estimate_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, seen) for item in obj)
+    return size
+
+
+def model_buffer_size(model):
+    """Size of the decompressed data model a PBIXRay instance holds in memory, or None if unknown."""
+    data_model = getattr(model, "_data_model", None)
+    buffer = getattr(data_model, "decompressed_data", None)
+    if isinstance(buffer, (bytes, bytearray, memoryview)):
+        return len(buffer)
+    # Memory-mapped models are paged in by the OS and not counted
+    return None
+
+
+def process_memory():
+    """
+    Resident memory of the process.
+
+    Returns:
+        A dict with rss_bytes and peak_rss_bytes, None where the platform does not report them
+    """
+    rss = peak = None
+    if resource is None:
+        return {"rss_bytes": rss, "peak_rss_bytes": peak}
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    peak = peak if sys.platform == "darwin" else peak * 1024
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        pass
+    return {"rss_bytes": rss, "peak_rss_bytes": peak}
+
+
+def traced_memory():
+    """Current and peak memory traced by tracemalloc, or None when tracing is off (see PYTHONTRACEMALLOC)."""
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    return {"current_bytes": current, "peak_bytes": peak}
+
+
+def _malloc_trim():
+    # glibc keeps freed memory in its arenas until asked to hand it back
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        return bool(libc.malloc_trim(0))
+    except (OSError, AttributeError):
+        return False
+
+
+def release_memory():
+    """
+    Collect garbage and return freed memory to the operating system where the allocator allows it.
+
+    Returns:
+        A dict with the resident memory before and after, and the bytes released
+    """
+    before = process_memory()["rss_bytes"]
+    gc.collect()
+    trimmed = _malloc_trim()
+    after = process_memory()["rss_bytes"]
+    return {
+        "rss_before_bytes": before,
+        "rss_after_bytes": after,
+        "released_bytes": before - after if before is not None and after is not None else None,
+        "malloc_trim": trimmed,
+    }
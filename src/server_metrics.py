@@ -0,0 +1,238 @@
+"""
+Server metrics
+
+Per-tool latency, thread-pool, payload, row and error metrics, labelled by
+tool and model. Metrics are kept in memory as fixed-bucket histograms and
+counters and can be exported in the Prometheus text format, either to a file
+rewritten periodically or on a local HTTP port.
+"""
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+class Histogram:
+    """Cumulative fixed-bucket histogram, as in Prometheus."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (None when empty, inf above the last bucket)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def _summary(self, q):
+        # JSON has no infinity, so quantiles above the last bucket read e.g. ">60"
+        value = self.quantile(q)
+        return f">{self.buckets[-1]:g}" if value == float("inf") else value
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs, ending with +Inf."""
+        pairs, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            pairs.append((bound, cumulative))
+        return pairs
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self._summary(0.5),
+            "p95": self._summary(0.95),
+            "p99": self._summary(0.99),
+        }
+
+
+class _Series:
+    # All metrics of one (tool, model) pair
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queue_time = Histogram(LATENCY_BUCKETS)
+        self.thread_time = Histogram(LATENCY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.rows = Histogram(ROW_BUCKETS)
+
+
+class ToolMetrics:
+    """Thread-safe registry of per-tool metrics."""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def record(self, tool, model, latency, response_bytes=None, rows=None, error=False, queue_time=None, thread_time=None):
+        """
+        Record one tool call.
+
+        Args:
+            tool: Tool name
+            model: Model label (e.g. the loaded file name)
+            latency: Wall-clock duration of the call in seconds
+            response_bytes: Size of the response in bytes
+            rows: Number of data rows returned, if the tool returns rows
+            error: Whether the call failed or returned an error
+            queue_time: Seconds spent waiting for a worker thread
+            thread_time: Seconds spent running in worker threads
+        """
+        with self._lock:
+            series = self._series.setdefault((tool, model), _Series())
+            series.calls += 1
+            series.errors += 1 if error else 0
+            series.latency.observe(latency)
+            if response_bytes is not None:
+                series.response_bytes.observe(response_bytes)
+            if rows is not None:
+                series.rows.observe(rows)
+            if queue_time:
+                series.queue_time.observe(queue_time)
+            if thread_time:
+                series.thread_time.observe(thread_time)
+
+    def reset(self):
+        """Forget every recorded call."""
+        with self._lock:
+            self._series.clear()
+            self.started = time.time()
+
+    def snapshot(self, tool=None):
+        """
+        Summarize the recorded metrics.
+
+        Returns:
+            A list with, per tool and model, call and error counts and latency, thread-pool,
+            response size and row count summaries (count, sum, mean and bucket-based quantiles)
+        """
+        with self._lock:
+            return [
+                {
+                    "tool": tool_name,
+                    "model": model,
+                    "calls": series.calls,
+                    "errors": series.errors,
+                    "latency_seconds": series.latency.snapshot(),
+                    "queue_seconds": series.queue_time.snapshot(),
+                    "thread_seconds": series.thread_time.snapshot(),
+                    "response_bytes": series.response_bytes.snapshot(),
+                    "rows": series.rows.snapshot(),
+                }
+                for (tool_name, model), series in sorted(self._series.items(), key=lambda item: (item[0][0], str(item[0][1])))
+                if tool is None or tool_name == tool
+            ]
+
+    def to_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        histograms = (
+            ("pbixray_tool_latency_seconds", "Tool call latency in seconds", "latency"),
+            ("pbixray_tool_queue_seconds", "Time spent waiting for a worker thread", "queue_time"),
+            ("pbixray_tool_thread_seconds", "Time spent running in worker threads", "thread_time"),
+            ("pbixray_tool_response_bytes", "Tool response size in bytes", "response_bytes"),
+            ("pbixray_tool_rows", "Data rows returned per call", "rows"),
+        )
+        with self._lock:
+            items = sorted(self._series.items(), key=lambda item: (item[0][0], str(item[0][1])))
+            lines = [
+                "# HELP pbixray_tool_calls_total Tool calls",
+                "# TYPE pbixray_tool_calls_total counter",
+            ]
+            for (tool, model), series in items:
+                lines.append(f"pbixray_tool_calls_total{{{_labels(tool, model)}}} {series.calls}")
+            lines += ["# HELP pbixray_tool_errors_total Tool calls that failed", "# TYPE pbixray_tool_errors_total counter"]
+            for (tool, model), series in items:
+                lines.append(f"pbixray_tool_errors_total{{{_labels(tool, model)}}} {series.errors}")
+
+            for name, description, attribute in histograms:
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+                for (tool, model), series in items:
+                    histogram = getattr(series, attribute)
+                    labels = _labels(tool, model)
+                    for bound, count in histogram.cumulative():
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum:g}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(tool, model):
+    return f'tool="{_escape(tool)}",model="{_escape(model)}"'
+
+
+def write_prometheus_file(metrics, path):
+    """Write the metrics to a file atomically, so scrapers never read a partial file."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(metrics.to_prometheus())
+    os.replace(temporary, path)
+
+
+def start_prometheus_file_writer(metrics, path, interval=15.0):
+    """Rewrite the metrics file every interval seconds in a daemon thread."""
+
+    def run():
+        while True:
+            try:
+                write_prometheus_file(metrics, path)
+            except OSError:
+                pass
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="metrics-file-writer", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_prometheus_server(metrics, port, host="127.0.0.1"):
+    """Serve the metrics on http://host:port/metrics in a daemon thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Keep stdout/stderr clean for the MCP transport
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,193 @@
+"""
+Tool call profiling
+
+Opt-in profiling of selected tool calls, or of every call slower than a
+threshold. Two formats are supported:
+
+* "collapsed": a statistical sampler reads the stacks of the threads working
+  on the call every few milliseconds and writes them in the collapsed-stack
+  format used by flame graph tools (flamegraph.pl, speedscope, inferno).
+* "pstats": the deterministic stdlib profiler (cProfile) runs in those
+  threads, and the merged statistics are written for pstats or snakeviz.
+
+Files are named after the tool and the time of the call.
+"""
+
+import cProfile
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_FORMATS = ("collapsed", "pstats")
+DEFAULT_PROFILE_DIR = os.path.expanduser("~/.pbixray/profiles")
+SAMPLE_INTERVAL = 0.005
+
+# cProfile cannot run concurrently in every Python version, so one call is profiled at a time
+_cprofile_lock = threading.Lock()
+
+
+def _collapse(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class CallProfile:
+    """Profile of one tool call, across the threads that work on it."""
+
+    def __init__(self, profiler, tool, format, interval):
+        self.profiler = profiler
+        self.tool = tool
+        self.format = format
+        self.started = time.time()
+        self._threads = set()
+        self._profiles = []
+        self._samples = Counter()
+        self._stopped = threading.Event()
+        self._sampler = None
+        if format == "collapsed":
+            self._threads.add(threading.get_ident())
+            self._sampler = threading.Thread(target=self._sample, args=(interval,), name="profile-sampler", daemon=True)
+            self._sampler.start()
+
+    def _sample(self, interval):
+        while not self._stopped.wait(interval):
+            frames = sys._current_frames()
+            for thread_id in list(self._threads):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self._samples[_collapse(frame)] += 1
+
+    @contextmanager
+    def thread(self):
+        """Profile the current thread for the duration of the block."""
+        if self.format == "collapsed":
+            thread_id = threading.get_ident()
+            self._threads.add(thread_id)
+            try:
+                yield
+            finally:
+                self._threads.discard(thread_id)
+            return
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._profiles.append(profile)
+
+    def stop(self, elapsed):
+        """
+        Stop profiling and write the profile if the call was slow enough.
+
+        Returns:
+            The path of the written file, or None
+        """
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        else:
+            _cprofile_lock.release()
+
+        if elapsed < self.profiler.threshold:
+            return None
+        if self.format == "collapsed" and not self._samples:
+            return None
+        if self.format == "pstats" and not self._profiles:
+            return None
+        return self.profiler.write(self)
+
+
+class ToolProfiler:
+    """Decides which tool calls to profile and where their profiles go."""
+
+    def __init__(self, output_dir=DEFAULT_PROFILE_DIR):
+        self.enabled = False
+        self.tools = None
+        self.threshold = 0.0
+        self.format = "collapsed"
+        self.interval = SAMPLE_INTERVAL
+        self.output_dir = output_dir
+        self.written = 0
+        self._counter = itertools.count(1)
+
+    def configure(self, enabled=None, tools=None, threshold=None, format=None, output_dir=None, interval=None):
+        """
+        Change the profiling settings. Arguments left as None keep their value.
+
+        Args:
+            enabled: Turn profiling on or off
+            tools: Tool names to profile, or an empty list for all tools
+            threshold: Only keep profiles of calls that took at least this many seconds
+            format: "collapsed" or "pstats"
+            output_dir: Directory the profiles are written to
+            interval: Sampling interval in seconds for the collapsed format
+        """
+        if format is not None and format not in PROFILE_FORMATS:
+            raise ValueError(f"Unknown profile format '{format}'. Use one of: {', '.join(PROFILE_FORMATS)}")
+        if threshold is not None and threshold < 0:
+            raise ValueError("The profiling threshold cannot be negative")
+        if enabled is not None:
+            self.enabled = enabled
+        if tools is not None:
+            self.tools = set(tools) or None
+        if threshold is not None:
+            self.threshold = threshold
+        if format is not None:
+            self.format = format
+        if output_dir is not None:
+            self.output_dir = output_dir
+        if interval is not None:
+            self.interval = interval
+
+    def settings(self):
+        return {
+            "enabled": self.enabled,
+            "tools": sorted(self.tools) if self.tools else "all",
+            "threshold_seconds": self.threshold,
+            "format": self.format,
+            "output_dir": self.output_dir,
+            "profiles_written": self.written,
+        }
+
+    def start(self, tool):
+        """
+        Start profiling a call of a tool.
+
+        Returns:
+            A CallProfile, or None when the call is not profiled
+        """
+        if not self.enabled or (self.tools and tool not in self.tools):
+            return None
+        if self.format == "pstats" and not _cprofile_lock.acquire(blocking=False):
+            return None
+        return CallProfile(self, tool, self.format, self.interval)
+
+    def write(self, profile):
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(profile.started))
+        extension = "collapsed" if profile.format == "collapsed" else "pstats"
+        path = os.path.join(self.output_dir, f"{profile.tool}-{timestamp}-{next(self._counter)}.{extension}")
+
+        if profile.format == "collapsed":
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in profile._samples.most_common():
+                    f.write(f"{stack} {count}\n")
+        else:
+            stats = pstats.Stats(profile._profiles[0])
+            for extra in profile._profiles[1:]:
+                stats.add(extra)
+            stats.dump_stats(path)
+
+        self.written += 1
+        return path
@@ -0,0 +1,160 @@
+"""
+Server tracing
+
+Records spans for the stages of tool calls (loading, decoding, filtering,
+slicing, serializing, waiting for and running in worker threads) and writes
+each finished trace as one line of OTLP JSON (an ExportTraceServiceRequest,
+as written by the OpenTelemetry collector file exporter) to a local file.
+
+Tracing is disabled until a file is configured, in which case spans cost
+nothing but a context variable lookup.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+SERVICE_NAME = "pbixray-mcp"
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_ERROR = 2
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    def __init__(self, name, parent=None, attributes=None, start_ns=None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.attributes = dict(attributes or {})
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.error = None
+        # Finished spans of the whole trace, shared with the root span
+        self.trace = parent.trace if parent else []
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, message):
+        self.error = message
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL if self.parent else SPAN_KIND_SERVER,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items() if value is not None],
+            "status": {"code": STATUS_CODE_ERROR, "message": self.error} if self.error else {},
+        }
+        if self.parent:
+            span["parentSpanId"] = self.parent.span_id
+        return span
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class Tracer:
+    """Creates spans and exports finished traces as OTLP JSON lines."""
+
+    def __init__(self, path=None, service_name=SERVICE_NAME):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def configure(self, path):
+        """Write traces to path, or disable tracing when path is None."""
+        self.path = path
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    @staticmethod
+    def current_span():
+        return _current_span.get()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Time a block as a span, child of the current span.
+
+        Yields the span, or None when tracing is disabled. An exception raised
+        in the block marks the span as failed.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(span)
+
+    def add_span(self, name, start_ns, end_ns, **attributes):
+        """Record an already finished operation as a child of the current span."""
+        if not self.enabled:
+            return None
+        span = Span(name, _current_span.get(), attributes, start_ns=start_ns)
+        self._finish(span, end_ns)
+        return span
+
+    def _finish(self, span, end_ns=None):
+        span.end_ns = end_ns or time.time_ns()
+        span.trace.append(span)
+        if span.parent is None:
+            self._export(span.trace)
+
+    def _export(self, spans):
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": self.service_name},
+                            "spans": [span.to_otlp() for span in sorted(spans, key=lambda span: span.start_ns)],
+                        }
+                    ],
+                }
+            ]
+        }
+        line = json.dumps(request, default=str) + "\n"
+        with self._lock:
+            path = self.path
+            if path is None:
+                return
+            try:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError:
+                # Tracing must never make a tool call fail
+                pass
@@ -3,8 +3,27 @@ Pytest configuration for the pbixray-mcp tests.
 """
 
 import os
+import sys
 import pytest
+import asyncio
 import pathlib
+from unittest.mock import patch, MagicMock
+
+# Add the src directory to the path so the tests can import the server modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+# Mock the parse_args function before importing the server, so it does not read the pytest command line
+with patch("argparse.ArgumentParser.parse_args") as mock_parse_args:
+    # Create a mock args object with the expected attributes
+    mock_args = MagicMock()
+    mock_args.disallow = []
+    mock_args.max_rows = 100
+    mock_args.max_sample_rows = 100
+    mock_args.page_size = 20
+    mock_parse_args.return_value = mock_args
+
+    # Import the server module once for every test module
+    import pbixray_server  # noqa: F401
 
 
 def pytest_addoption(parser):
@@ -33,3 +52,18 @@ def pbix_file_path(request):
 
     print(f"Using default PBIX file: {demo_file_path}")
     return demo_file_path
+
+
+@pytest.fixture
+def make_context():
+    """Return a function creating mock Contexts whose async methods complete at once"""
+
+    def make():
+        mock_context = MagicMock()
+        mock_context.info = MagicMock(return_value=asyncio.Future())
+        mock_context.info.return_value.set_result(None)
+        mock_context.report_progress = MagicMock(return_value=asyncio.Future())
+        mock_context.report_progress.return_value.set_result(None)
+        return mock_context
+
+    return make
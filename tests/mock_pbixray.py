@@ -0,0 +1,90 @@
+"""
+Configurable mock of PBIXRay models for the pbixray-mcp tests.
+"""
+
+import time
+import pandas as pd
+
+
+class MockPBIXRay:
+    """
+    Configurable stand-in for PBIXRay, built from pandas frames.
+
+    Args:
+        file_path: Path of the .pbix file
+        tables: Table name to DataFrame, or to a function returning a fresh DataFrame
+        schema: The schema frame, True to derive TableName and ColumnName from the tables, or None for no schema
+        projecting: Whether get_table can decode selected columns, like recent PBIXRay releases
+        delay: Seconds every table decode takes
+        **properties: Other model properties, such as relationships, dax_measures or statistics
+
+    Every decode is recorded in decoded (the selected columns, or None for a whole table) and
+    every schema read in schema_reads. close() sets closed.
+    """
+
+    def __init__(self, file_path, tables=None, schema=None, projecting=False, delay=0, **properties):
+        self.file_path = file_path
+        self.frames = dict(tables or {})
+        self.tables = list(self.frames)
+        self.size = 1024
+        if schema is True:
+            schema = pd.DataFrame(
+                [(table, column) for table in self.tables for column in self.frame(table).columns],
+                columns=["TableName", "ColumnName"],
+            )
+        self._schema = schema
+        self.projecting = projecting
+        self.delay = delay
+        self.decoded = []
+        self.schema_reads = 0
+        self.closed = False
+        for name, value in properties.items():
+            setattr(self, name, value)
+        if not projecting:
+            # The server checks the signature of get_table to see whether it can select columns
+            self.get_table = self.get_whole_table
+
+    @property
+    def schema(self):
+        if self._schema is None:
+            raise AttributeError("schema")
+        self.schema_reads += 1
+        return self._schema
+
+    @property
+    def decode_calls(self):
+        return len(self.decoded)
+
+    def frame(self, table_name):
+        frame = self.frames.get(table_name)
+        if callable(frame):
+            return frame()
+        return pd.DataFrame() if frame is None else frame
+
+    def get_table(self, table_name, columns=None, strings_as_categorical=False):
+        if self.delay:
+            time.sleep(self.delay)
+        self.decoded.append(columns)
+        frame = self.frame(table_name)
+        if columns is not None:
+            frame = frame[columns]
+        if strings_as_categorical:
+            frame = frame.astype({name: "category" for name in frame.columns if pd.api.types.is_string_dtype(frame[name])})
+        return frame
+
+    def get_whole_table(self, table_name):
+        return MockPBIXRay.get_table(self, table_name)
+
+    def close(self):
+        self.closed = True
+
+
+SALES = pd.DataFrame({"Region": ["East", "West", "East"], "Amount": [1.0, 2.0, 3.0]})
+SALES_SCHEMA = pd.DataFrame(
+    {"TableName": ["Sales", "Sales"], "ColumnName": ["Region", "Amount"], "DataType": ["String", "Double"]}
+)
+
+
+def sales_model(file_path, **options):
+    """A model with a single small Sales table; options are passed on to MockPBIXRay"""
+    return MockPBIXRay(file_path, {"Sales": SALES}, schema=SALES_SCHEMA, **options)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the analyze_model_size tool in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_analyze_model_size.py
+"""
+
+import json
+import pytest
+import zipfile
+import pandas as pd
+
+import pbixray_server
+from report_layout import read_report_fields
+from tests.mock_pbixray import MockPBIXRay
+
+
+def size_model(file_path):
+    """A model with storage statistics, DAX and relationships"""
+    columns = [
+        # table, column, type, cardinality, dictionary, hash index, data
+        ("Sales", "OrderKey", "Int64", 2_000_000, 0, 16_000_000, 8_000_000),
+        ("Sales", "CustomerKey", "Int64", 50_000, 400_000, 0, 3_000_000),
+        ("Sales", "Amount", "Float64", 30_000, 240_000, 0, 2_500_000),
+        ("Sales", "Comment", "string", 900_000, 40_000_000, 7_200_000, 3_000_000),
+        ("Sales", "OrderTime", "datetime64[ns]", 1_500_000, 12_000_000, 12_000_000, 6_000_000),
+        ("Sales", "Channel", "string", 3, 1_000, 0, 100_000),
+        ("Customer", "CustomerKey", "Int64", 50_000, 400_000, 0, 200_000),
+        ("Customer", "Name", "string", 49_000, 1_500_000, 0, 150_000),
+    ]
+    return MockPBIXRay(
+        file_path,
+        schema=pd.DataFrame([c[:3] for c in columns], columns=["TableName", "ColumnName", "PandasDataType"]),
+        statistics=pd.DataFrame(
+            columns, columns=["TableName", "ColumnName", "Type", "Cardinality", "Dictionary", "HashIndex", "DataSize"]
+        ).drop(columns="Type"),
+        dax_measures=pd.DataFrame({"TableName": ["Sales"], "Name": ["Total Sales"], "Expression": ["SUMX(Sales, [Amount])"]}),
+        dax_columns=pd.DataFrame(columns=["TableName", "ColumnName", "Expression"]),
+        dax_tables=pd.DataFrame(columns=["TableName", "Expression"]),
+        relationships=pd.DataFrame(
+            {
+                "FromTableName": ["Sales"],
+                "FromColumnName": ["CustomerKey"],
+                "ToTableName": ["Customer"],
+                "ToColumnName": ["CustomerKey"],
+            }
+        ),
+    )
+
+
+def write_report(path):
+    """Write a .pbix archive whose legacy layout has a visual using Customer[Name]"""
+    visual = {
+        "singleVisual": {
+            "prototypeQuery": {
+                "From": [{"Name": "c", "Entity": "Customer"}],
+                "Select": [
+                    {"Column": {"Expression": {"SourceRef": {"Source": "c"}}, "Property": "Name"}, "Name": "Customer.Name"}
+                ],
+            }
+        }
+    }
+    filters = [{"expression": {"Column": {"Expression": {"SourceRef": {"Entity": "Sales"}}, "Property": "Channel"}}}]
+    layout = {"sections": [{"visualContainers": [{"config": json.dumps(visual), "filters": json.dumps(filters)}]}]}
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("Report/Layout", json.dumps(layout).encode("utf-16-le"))
+
+
+def test_read_report_fields(tmp_path):
+    """Test that visual fields are read through query aliases and nested JSON"""
+    path = str(tmp_path / "report.pbix")
+    write_report(path)
+    assert read_report_fields(path) == {("Customer", "Name"), ("Sales", "Channel")}
+
+    # Files without a report layout
+    with zipfile.ZipFile(str(tmp_path / "empty.pbix"), "w") as archive:
+        archive.writestr("DataModel", b"")
+    assert read_report_fields(str(tmp_path / "empty.pbix")) is None
+
+
+@pytest.mark.asyncio
+async def test_analyze_model_size(tmp_path, make_context):
+    """Test ranking and recommendations of analyze_model_size"""
+    mock_context = make_context()
+    path = str(tmp_path / "report.pbix")
+    write_report(path)
+    pbixray_server.select_model(size_model(path), path)
+
+    result = json.loads(await pbixray_server.analyze_model_size(mock_context, top_n=3))
+
+    assert result["report_visuals_checked"] is True
+    assert [t["table"] for t in result["largest_tables"]] == ["Sales", "Customer"]
+    assert [c["column"] for c in result["largest_columns"]] == ["Comment", "OrderTime", "OrderKey"]
+
+    issues = {(r["table"], r["column"]): r for r in result["recommendations"]}
+    # Referenced by a measure, a relationship or a visual: no recommendation
+    for key in [("Sales", "Amount"), ("Sales", "CustomerKey"), ("Customer", "Name"), ("Sales", "Channel")]:
+        assert key not in issues
+    # Unused columns save their full size, which beats the other fixes
+    assert issues[("Sales", "Comment")]["issue"] == "unused_column"
+    assert issues[("Sales", "Comment")]["estimated_savings_bytes"] == 50_200_000
+    assert issues[("Sales", "OrderKey")]["issue"] == "unused_column"
+    assert result["recommendations"][0]["column"] == "Comment"
+    assert result["estimated_total_savings_bytes"] == sum(r["estimated_savings_bytes"] for r in result["recommendations"])
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_analyze_model_size_used_columns(make_context):
+    """Test the high-cardinality text and date/time recommendations of used columns"""
+    mock_context = make_context()
+    model = size_model("/path/to/test.pbix")
+    model.dax_measures = pd.DataFrame(
+        {
+            "TableName": ["Sales", "Sales"],
+            "Name": ["Comments", "Last Order"],
+            "Expression": ["COUNTROWS(VALUES(Sales[Comment]))", "MAX('Sales'[OrderTime])"],
+        }
+    )
+    pbixray_server.select_model(model, None)
+
+    result = json.loads(await pbixray_server.analyze_model_size(mock_context))
+    issues = {(r["table"], r["column"]): r for r in result["recommendations"]}
+
+    assert result["report_visuals_checked"] is False
+    assert issues[("Sales", "Comment")]["issue"] == "high_cardinality_text"
+    assert issues[("Sales", "Comment")]["estimated_savings_bytes"] == 47_200_000
+    assert issues[("Sales", "OrderTime")]["issue"] == "split_datetime"
+    # Dictionary and hash index shrink to date (36,525) + time (86,400) distinct values
+    assert issues[("Sales", "OrderTime")]["estimated_savings_bytes"] == int(24_000_000 * (1 - 122_925 / 1_500_000))
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_analyze_model_size_hierarchies_and_sort_by(make_context):
+    """Test that hierarchy levels and sort-by columns count as used, and unverifiable removals are flagged"""
+    mock_context = make_context()
+    model = size_model("/path/to/test.pbix")
+    pbixray_server.select_model(model, None)
+
+    result = json.loads(await pbixray_server.analyze_model_size(mock_context))
+    issues = {(r["table"], r["column"]): r for r in result["recommendations"]}
+    # Without the metadata, removing a column is only a suggestion
+    assert not result["hierarchies_checked"] and not result["sort_by_columns_checked"]
+    assert issues[("Sales", "OrderKey")]["verified"] is False
+    assert "check them before removing it" in issues[("Sales", "OrderKey")]["detail"]
+
+    model.tmschema_levels = pd.DataFrame(
+        {"HierarchyName": ["Orders"], "TableName": ["Sales"], "Name": ["Order"], "ColumnName": ["OrderKey"]}
+    )
+    model.tmschema_columns = pd.DataFrame(
+        {
+            "ID": [1, 2, 3],
+            "TableName": ["Sales", "Sales", "Customer"],
+            "Name": ["Channel", "Comment", "Name"],
+            "SortByColumnID": [2, None, None],
+        }
+    )
+    # The metadata changed under the same model: drop the cached analysis and response
+    pbixray_server.model_cache.clear()
+    pbixray_server.response_cache.clear()
+    result = json.loads(await pbixray_server.analyze_model_size(mock_context))
+    issues = {(r["table"], r["column"]): r for r in result["recommendations"]}
+
+    assert result["hierarchies_checked"] and result["sort_by_columns_checked"]
+    # OrderKey is a hierarchy level and Comment sorts Channel
+    assert ("Sales", "OrderKey") not in issues
+    assert issues[("Sales", "Comment")]["issue"] == "high_cardinality_text"
+    assert all(r["verified"] for r in result["recommendations"])
+
+    # Clean up
+    pbixray_server.select_model(None, None)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Unit tests for loading the --load-file files of the PBIXRay MCP server in the background
+
+Usage:
+    pytest -xvs tests/test_background_load.py
+"""
+
+import os
+import json
+import pytest
+import asyncio
+import threading
+import pandas as pd
+from unittest.mock import patch
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+# Released by the tests to let the loads finish
+loading = threading.Event()
+started = []
+
+
+def slow_model(file_path):
+    """A model named after its file, which loads until the test releases it"""
+    started.append(os.path.basename(file_path))
+    loading.wait(5)
+    if "broken" in file_path:
+        raise ValueError("Unsupported file")
+    return MockPBIXRay(file_path, tables={os.path.splitext(os.path.basename(file_path))[0]: pd.DataFrame()})
+
+
+@pytest.fixture
+def files(tmp_path):
+    for name in ("sales.pbix", "finance.pbix", "broken.pbix"):
+        (tmp_path / name).write_bytes(b"pbix")
+    loading.clear()
+    started.clear()
+    pbixray_server.response_cache.clear()
+    with patch("pbixray_server.PBIXRay", slow_model):
+        yield tmp_path
+        loading.set()
+        for entry in list(pbixray_server._startup_loads.values()):
+            if entry["thread"] is not None:
+                entry["thread"].join(5)
+    pbixray_server._startup_loads.clear()
+    pbixray_server.select_model(None, None)
+    pbixray_server.LOAD_TIMEOUT = 120.0
+
+
+async def call_tool(name, arguments=None):
+    """Call a tool the way an MCP client does and return its text"""
+    result = await pbixray_server.mcp.call_tool(name, arguments or {})
+    content = result[0] if isinstance(result, tuple) else result
+    return "".join(block.text for block in content)
+
+
+async def wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Condition not reached")
+
+
+def test_tools_wait_for_the_startup_load(files):
+    """Test that the server answers during the load and model tools wait for it"""
+
+    async def scenario():
+        pbixray_server.start_background_loads([str(files / "sales.pbix"), str(files / "finance.pbix")])
+        # Both files load at the same time
+        await wait_for(lambda: len(started) == 2)
+        status = json.loads(await call_tool("get_load_status"))
+        assert [load["status"] for load in status["loads"]] == ["loading", "loading"]
+        assert not status["ready"]
+
+        waiting = asyncio.create_task(call_tool("get_tables"))
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        loading.set()
+        return json.loads(await waiting), json.loads(await call_tool("get_load_status"))
+
+    tables, status = asyncio.run(scenario())
+    assert tables == ["sales"]
+    assert status["ready"] and status["current_model"] == "sales.pbix"
+    assert [load["status"] for load in status["loads"]] == ["loaded", "loaded"]
+
+
+def test_wait_deadline_and_failures(files):
+    """Test that waiting calls give up at the deadline and failed files are reported"""
+    pbixray_server.LOAD_TIMEOUT = 0.1
+
+    async def scenario():
+        pbixray_server.start_background_loads(
+            [str(files / "broken.pbix"), str(files / "sales.pbix"), str(files / "missing.pbix")]
+        )
+        timed_out = await call_tool("get_tables")
+        loading.set()
+        await wait_for(lambda: pbixray_server.active_model() is not None)
+        return timed_out, json.loads(await call_tool("get_load_status"))
+
+    timed_out, status = asyncio.run(scenario())
+    # The first file decides the current model until its load fails
+    assert timed_out.startswith("Error: 'broken.pbix' is still loading after 0.1 seconds")
+    # The first file failed, so the next one became the current model
+    assert status["current_model"] == "sales.pbix"
+    assert [(load["file"], load["status"]) for load in status["loads"]] == [
+        ("broken.pbix", "failed"),
+        ("sales.pbix", "loaded"),
+        ("missing.pbix", "failed"),
+    ]
+    assert status["loads"][0]["error"] == "Unsupported file"
+
+
+def test_load_pbix_file_reuses_startup_loads(files):
+    """Test that loading a file given with --load-file uses the model loaded in the background"""
+    loading.set()
+
+    async def scenario():
+        entries = pbixray_server.start_background_loads([str(files / "sales.pbix"), str(files / "finance.pbix")])
+        response = await call_tool("load_pbix_file", {"file_path": str(files / "finance.pbix")})
+        for entry in entries:
+            assert await pbixray_server.wait_for_load(entry) is None
+        return response
+
+    assert asyncio.run(scenario()) == "Successfully loaded 'finance.pbix'"
+    # finance.pbix was not loaded a second time
+    assert sorted(started) == ["finance.pbix", "sales.pbix"]
+    assert pbixray_server.active_model().tables == ["finance"]
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the benchmark harness and synthetic model
+
+Usage:
+    pytest -xvs tests/test_benchmarks.py
+"""
+
+import os
+import sys
+import json
+import pytest
+
+# Add the benchmarks directory to the path so we can import the harness
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks")))
+
+import run_benchmarks
+from synthetic_model import SyntheticPBIXRay
+
+
+def test_synthetic_model_shape():
+    """Test that the synthetic model is deterministic and consistent with its schema"""
+    model = SyntheticPBIXRay(fact_rows=500, filler_tables=3, filler_columns=7, measures=25)
+    assert model.tables == ["Sales", "Customer", "Product", "Date", "Table001", "Table002", "Table003"]
+    assert len(model.dax_measures) == 25
+    assert len(model.schema[model.schema["TableName"] == "Table002"]) == 7
+
+    sales = model.get_table("Sales")
+    assert len(sales) == 500
+    schema_types = model.schema[model.schema["TableName"] == "Sales"].set_index("ColumnName")["PandasDataType"]
+    assert schema_types.to_dict() == {column: str(dtype) for column, dtype in sales.dtypes.items()}
+    assert sales["CustomerKey"].max() < model.customers
+    assert sales.equals(SyntheticPBIXRay(fact_rows=500, filler_tables=3, filler_columns=7, measures=25).get_table("Sales"))
+
+
+@pytest.fixture
+def restore_server():
+    # The harness installs its model and disables the response cache in the server module
+    yield
+    server = sys.modules.get("pbixray_server")
+    if server is not None:
+        server.response_cache.configure(max_entries=256)
+        server.select_model(None, None)
+
+
+def test_regression_check(tmp_path, restore_server):
+    """Test recording a baseline and flagging scenarios that got slower"""
+    baseline = tmp_path / "baseline.json"
+    options = ["--rows", "2000", "--tables", "2", "--measures", "20", "--repeat", "1", "--baseline", str(baseline)]
+    assert run_benchmarks.main(options + ["--save-baseline", "--scenario", "first_page", "schema"]) == 0
+
+    recorded = json.loads(baseline.read_text())
+    assert set(recorded["results"]) == {"first_page", "schema"}
+    assert run_benchmarks.main(options + ["--scenario", "schema"]) == 0
+    # A baseline recorded with other settings is not comparable
+    assert run_benchmarks.main(["--rows", "3000"] + options[2:] + ["--scenario", "schema"]) == 2
+
+    recorded["results"]["schema"]["median_s"] = 1e-9
+    rows = run_benchmarks.compare({"schema": {"median_s": 0.5}}, recorded, 0.25)
+    assert rows == [("schema", 0.5, 1e-9, rows[0][3], True)]
+    assert not run_benchmarks.compare({"schema": {"median_s": 0.001}}, recorded, 0.25)[0][4]
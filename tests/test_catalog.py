@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the PBIX catalog (pbix_catalog module and catalog tools)
+
+Usage:
+    pytest -xvs tests/test_catalog.py
+"""
+
+import os
+import json
+import pytest
+import sqlite3
+from unittest.mock import patch
+
+import pbixray_server
+from pbix_catalog import PbixCatalog
+
+
+def fake_extractor(calls):
+    """Create an extractor returning artifacts derived from the file name, recording each call"""
+
+    def extract(file_path):
+        calls.append(file_path)
+        report = os.path.splitext(os.path.basename(file_path))[0]
+        if report == "broken":
+            raise ValueError("not a PBIX file")
+        return {
+            "schema": [
+                {"TableName": "Sales", "ColumnName": "Amount", "DataType": "float64"},
+                {"TableName": "Sales", "ColumnName": "CustomerKey", "DataType": "int64"},
+            ],
+            "statistics": [
+                {
+                    "TableName": "Sales",
+                    "ColumnName": "Amount",
+                    "Cardinality": 50,
+                    "Dictionary": 400,
+                    "HashIndex": 0,
+                    "DataSize": 96,
+                },
+            ],
+            "relationships": [
+                {
+                    "FromTableName": "Sales",
+                    "FromColumnName": "CustomerKey",
+                    "ToTableName": "Customer",
+                    "ToColumnName": "CustomerKey",
+                    "IsActive": True,
+                    "Cardinality": "M:1",
+                }
+            ],
+            "dax_measures": [{"TableName": "Sales", "Name": f"{report} Total", "Expression": "SUM(Sales[Amount])"}],
+            "power_query": [
+                {"TableName": "Sales", "Expression": f'let Source = Sql.Database("{report}-srv", "dw") in Source'}
+            ],
+            "metadata": [{"Name": "Version", "Value": "1.0"}],
+        }
+
+    return extract
+
+
+def write_pbix(path, content=b"pbix"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def test_scan_is_incremental(tmp_path):
+    """Test that unchanged files are skipped and changed or deleted files are updated"""
+    reports = tmp_path / "reports"
+    write_pbix(str(reports / "finance.pbix"))
+    write_pbix(str(reports / "nested" / "hr.pbix"))
+    calls = []
+    catalog = PbixCatalog(str(tmp_path / "catalog.sqlite"))
+
+    summary = catalog.scan(str(reports), workers=0, extractor=fake_extractor(calls))
+    assert summary == {"found": 2, "indexed": 2, "skipped": 0, "failed": 0, "removed": 0}
+
+    # Nothing changed: nothing is loaded again
+    calls.clear()
+    summary = catalog.scan(str(reports), workers=0, extractor=fake_extractor(calls))
+    assert summary["skipped"] == 2 and calls == []
+
+    # A modified file is re-indexed and a deleted one removed
+    write_pbix(str(reports / "finance.pbix"), b"pbix v2")
+    os.remove(str(reports / "nested" / "hr.pbix"))
+    summary = catalog.scan(str(reports), workers=0, extractor=fake_extractor(calls))
+    assert summary["indexed"] == 1 and summary["removed"] == 1
+    assert [f["path"] for f in catalog.files()] == [str(reports / "finance.pbix")]
+    assert catalog.search("hr Total") == []
+
+
+def test_search_across_files(tmp_path):
+    """Test full-text search over measures and M code across several files"""
+    reports = tmp_path / "reports"
+    write_pbix(str(reports / "finance.pbix"))
+    write_pbix(str(reports / "sales.pbix"))
+    write_pbix(str(reports / "broken.pbix"))
+    catalog = PbixCatalog(str(tmp_path / "catalog.sqlite"))
+    summary = catalog.scan(str(reports), workers=0, extractor=fake_extractor([]))
+    assert summary["failed"] == 1
+
+    matches = catalog.search("Sql.Database", kind="power_query")
+    assert [os.path.basename(m["file_path"]) for m in matches] == ["finance.pbix", "sales.pbix"]
+    assert "Sql.Database" in matches[0]["excerpt"]
+
+    matches = catalog.search("finance Total", kind="measure")
+    assert len(matches) == 1 and matches[0]["table_name"] == "Sales"
+
+    files = {os.path.basename(f["path"]): f for f in catalog.files()}
+    assert files["broken.pbix"]["error"] == "not a PBIX file"
+    assert files["sales.pbix"]["measures"] == 1 and files["sales.pbix"]["relationships"] == 1
+
+
+def test_failed_files_are_retried(tmp_path):
+    """Test that a file that failed to index is indexed again on the next scan"""
+    reports = tmp_path / "reports"
+    write_pbix(str(reports / "broken.pbix"))
+    calls = []
+    catalog = PbixCatalog(str(tmp_path / "catalog.sqlite"))
+
+    summary = catalog.scan(str(reports), workers=0, extractor=fake_extractor(calls))
+    assert summary["failed"] == 1
+
+    # The file is unchanged but its last attempt failed
+    def recovered(file_path):
+        return fake_extractor(calls)(file_path.replace("broken", "fixed"))
+
+    summary = catalog.scan(str(reports), workers=0, extractor=recovered)
+    assert summary == {"found": 1, "indexed": 1, "skipped": 0, "failed": 0, "removed": 0}
+    assert catalog.files()[0]["error"] is None
+
+    # Once indexed, it is skipped again
+    summary = catalog.scan(str(reports), workers=0, extractor=recovered)
+    assert summary["skipped"] == 1
+
+
+def test_connections_are_closed(tmp_path):
+    """Test that every catalog connection is closed after use"""
+    opened, closed = [], []
+    connect = sqlite3.connect
+
+    class TrackingConnection(sqlite3.Connection):
+        def close(self):
+            closed.append(self)
+            super().close()
+
+    def tracking_connect(*args, **kwargs):
+        opened.append(connect(*args, factory=TrackingConnection, **kwargs))
+        return opened[-1]
+
+    with patch("pbix_catalog.sqlite3.connect", tracking_connect):
+        catalog = PbixCatalog(str(tmp_path / "catalog.sqlite"))
+        catalog.files()
+        catalog.search("anything")
+    assert len(opened) == 3
+    assert closed == opened
+
+
+@pytest.mark.asyncio
+async def test_catalog_tools(tmp_path, make_context):
+    """Test the build_catalog and search_catalog tools"""
+    mock_context = make_context()
+    reports = tmp_path / "reports"
+    write_pbix(str(reports / "finance.pbix"))
+    catalog_path = str(tmp_path / "catalog.sqlite")
+
+    with patch("pbix_catalog.extract_pbix", fake_extractor([])):
+        result = json.loads(
+            await pbixray_server.build_catalog(mock_context, directory=str(reports), catalog_path=catalog_path, workers=0)
+        )
+    assert result["indexed"] == 1
+
+    result = json.loads(await pbixray_server.search_catalog(mock_context, query="CustomerKey", catalog_path=catalog_path))
+    assert {m["kind"] for m in result["matches"]} == {"column", "relationship"}
+
+    result = await pbixray_server.search_catalog(mock_context, query="nothing like this", catalog_path=catalog_path)
+    assert "No catalog entries match" in result
+
+    result = await pbixray_server.search_catalog(mock_context, query="x", kind="table", catalog_path=catalog_path)
+    assert "kind must be one of" in result
+
+    result = await pbixray_server.build_catalog(mock_context, directory=str(tmp_path / "missing"))
+    assert "not found" in result
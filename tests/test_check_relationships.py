@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the check_relationships tool in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_check_relationships.py
+"""
+
+import json
+import pytest
+import pandas as pd
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+# One clean and one broken relationship
+TABLES = {
+    "Sales": pd.DataFrame({"ProductKey": [1, 2, 2, 1], "CustomerKey": ["C1", "C9", "C9", ""]}),
+    "Product": pd.DataFrame({"ProductKey": [1, 2, 3]}),
+    "Customer": pd.DataFrame({"CustomerKey": ["C1", "C2", "C2"]}),
+}
+RELATIONSHIPS = pd.DataFrame(
+    {
+        "FromTableName": ["Sales", "Sales"],
+        "FromColumnName": ["ProductKey", "CustomerKey"],
+        "ToTableName": ["Product", "Customer"],
+        "ToColumnName": ["ProductKey", "CustomerKey"],
+        "IsActive": [True, True],
+        "Cardinality": ["M:1", "M:1"],
+    }
+)
+
+
+@pytest.mark.asyncio
+async def test_check_relationships_finds_issues(make_context):
+    """Test orphan, duplicate and blank key detection"""
+    mock_context = make_context()
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", TABLES, relationships=RELATIONSHIPS), None)
+
+    parsed = json.loads(await pbixray_server.check_relationships(mock_context))
+    assert parsed["relationships_checked"] == 2
+    assert parsed["relationships_with_issues"] == 1
+
+    product, customer = parsed["results"]
+    assert product["status"] == "ok"
+    assert product["orphan_keys"] == 0
+
+    assert customer["status"] == "issues"
+    assert customer["orphan_keys"] == 2  # "C9" and the blank key
+    assert customer["orphan_rows"] == 3
+    assert "C9" in customer["orphan_examples"]
+    assert customer["one_side_duplicate_keys"] == 1
+    assert customer["duplicate_examples"] == ["C2"]
+    assert customer["blank_keys_many_side"] == 1
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_check_relationships_filtering(make_context):
+    """Test restricting the check to some relationships"""
+    mock_context = make_context()
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", TABLES, relationships=RELATIONSHIPS), None)
+
+    parsed = json.loads(await pbixray_server.check_relationships(mock_context, to_table="Product"))
+    assert parsed["relationships_checked"] == 1
+
+    result = await pbixray_server.check_relationships(mock_context, from_table="Product")
+    assert "No relationships found" in result
+
+    # Clean up
+    pbixray_server.select_model(None, None)
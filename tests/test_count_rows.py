@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Unit tests for row counting (count_rows and count_only) in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_count_rows.py
+"""
+
+import json
+import pytest
+import pandas as pd
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+
+def locations():
+    return pd.DataFrame(
+        {
+            "product_id": list(range(1, 11)),
+            "location_id": ["madrid", "barcelona", "albacete"] * 3 + ["madrid"],
+            "period": [100, 110, 120, 130, 140, 150, 160, 170, 180, 190],
+        }
+    )
+
+
+def locations_model(file_path, **options):
+    """A model with a 10-row Sales table, which records every decode"""
+    return MockPBIXRay(file_path, tables={"Sales": locations}, **options)
+
+
+@pytest.mark.asyncio
+async def test_count_rows_unfiltered_and_filtered(make_context):
+    """Test count_rows with and without filters"""
+    mock_context = make_context()
+    model = locations_model("/path/to/test.pbix")
+    pbixray_server.select_model(model, None)
+
+    result = json.loads(await pbixray_server.count_rows(mock_context, table_name="Sales"))
+    assert result["row_count"] == 10
+
+    result = json.loads(
+        await pbixray_server.count_rows(mock_context, table_name="Sales", filters="location_id=madrid;period>100")
+    )
+    assert result["row_count"] == 3
+
+    # The table is decoded once and then served from the cache
+    assert model.decode_calls == 1
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_count_rows_filter_errors(make_context):
+    """Test that count_rows reports filter errors like get_table_contents"""
+    mock_context = make_context()
+    pbixray_server.select_model(locations_model("/path/to/test.pbix"), None)
+
+    result = await pbixray_server.count_rows(mock_context, table_name="Sales", filters="missing=1")
+    assert "Column 'missing' not found" in result
+
+    result = await pbixray_server.count_rows(mock_context, table_name="Sales", filters="no_operator")
+    assert "Invalid filter condition" in result
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_get_table_contents_count_only(make_context):
+    """Test the count_only flag of get_table_contents"""
+    mock_context = make_context()
+    pbixray_server.select_model(locations_model("/path/to/test.pbix"), None)
+
+    result = await pbixray_server.get_table_contents(
+        mock_context, table_name="Sales", filters="location_id=albacete", page_size=2, count_only=True
+    )
+    parsed = json.loads(result)
+    assert parsed["total_rows"] == 3
+    assert parsed["total_pages"] == 2
+    assert "data" not in parsed
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_count_rows_decodes_only_needed_columns(make_context):
+    """Test that counts decode one column, or only the columns the filters use"""
+    mock_context = make_context()
+    model = locations_model("/path/to/test.pbix", schema=True, projecting=True)
+    pbixray_server.select_model(model, None)
+
+    result = json.loads(await pbixray_server.count_rows(mock_context, table_name="Sales"))
+    assert result["row_count"] == 10
+    result = json.loads(await pbixray_server.count_rows(mock_context, table_name="Sales", filters="period>=150"))
+    assert result["row_count"] == 5
+    assert model.decoded == [["product_id"], ["period"]]
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_count_only_decodes_only_needed_columns(make_context):
+    """Test that count_only counts like count_rows, without decoding the whole table"""
+    mock_context = make_context()
+    model = locations_model("/path/to/test.pbix", schema=True, projecting=True)
+    pbixray_server.select_model(model, None)
+
+    result = json.loads(await pbixray_server.get_table_contents(mock_context, table_name="Sales", count_only=True))
+    assert result["total_rows"] == 10
+    result = json.loads(
+        await pbixray_server.get_table_contents(
+            mock_context, table_name="Sales", filters="location_id=madrid", page_size=3, count_only=True
+        )
+    )
+    assert result["total_rows"] == 4 and result["total_pages"] == 2
+    assert model.decoded == [["product_id"], ["location_id"]]
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_filters_are_evaluated_on_every_row(make_context):
+    """Test that every condition is evaluated on the whole table and the results are combined with AND.
+
+    Conditions used to be applied one after the other to the already filtered rows. Now a condition
+    that cannot compare some row fails even when an earlier condition excludes that row.
+    """
+    mock_context = make_context()
+    frame = locations()
+    frame["code"] = pd.Series([1, "x", 3, 4, "y", 6, 7, "z", 9, 10], dtype=object)
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", tables={"Sales": frame}), None)
+
+    result = await pbixray_server.count_rows(mock_context, table_name="Sales", filters="location_id=madrid;code>2")
+    assert result.startswith("Error applying filter 'code>2'")
+
+    # Clean up
+    pbixray_server.select_model(None, None)
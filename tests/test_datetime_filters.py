@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Unit tests for datetime-aware filtering and the aggregate_by_time tool in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_datetime_filters.py
+"""
+
+import json
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+FIXED_NOW = pd.Timestamp("2024-03-15 12:00:00")
+
+
+# A datetime column spanning several months
+SALES = pd.DataFrame(
+    {
+        "order_date": pd.to_datetime(
+            [
+                "2024-01-05 09:30",
+                "2024-01-20 17:00",
+                "2024-02-10 08:00",
+                "2024-03-01 00:00",
+                "2024-03-01 23:59",
+                "2024-03-14 10:00",
+                None,
+            ]
+        ),
+        "amount": [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0],
+    }
+)
+
+
+async def count(mock_context, filters):
+    result = await pbixray_server.count_rows(mock_context, table_name="Sales", filters=filters)
+    return json.loads(result)["row_count"]
+
+
+@pytest.mark.asyncio
+async def test_date_literal_filters(make_context):
+    """Test absolute date and datetime literals on a datetime column"""
+    mock_context = make_context()
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", {"Sales": SALES}), None)
+
+    # A date literal covers the whole day
+    assert await count(mock_context, "order_date=2024-03-01") == 2
+    assert await count(mock_context, "order_date<=2024-03-01") == 5
+    assert await count(mock_context, "order_date>2024-03-01") == 1
+    assert await count(mock_context, "order_date!=2024-03-01") == 4
+    assert await count(mock_context, "order_date>=2024-01-20 17:00") == 5
+
+    result = await pbixray_server.count_rows(mock_context, table_name="Sales", filters="order_date>=not-a-date")
+    assert "not a valid date" in result
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_partial_date_filters(make_context):
+    """Test that a month, quarter or year literal covers the whole period"""
+    mock_context = make_context()
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", {"Sales": SALES}), None)
+
+    assert await count(mock_context, "order_date=2024-03") == 3
+    assert await count(mock_context, "order_date!=2024-03") == 3
+    assert await count(mock_context, "order_date<=2024-02") == 3
+    assert await count(mock_context, "order_date>2024-01") == 4
+    assert await count(mock_context, "order_date=2024-Q1") == 6
+    assert await count(mock_context, "order_date=2024") == 6
+    assert await count(mock_context, "order_date<2024") == 0
+
+    parsed = json.loads(
+        await pbixray_server.aggregate_by_time(
+            mock_context,
+            table_name="Sales",
+            date_column="order_date",
+            value_column="order_date",
+            aggregation="max",
+            granularity="day",
+            filters="order_date=2024-03",
+        )
+    )
+    assert [(b["bucket"], b["value"]) for b in parsed["buckets"]] == [
+        ("2024-03-01", "2024-03-01T23:59:00"),
+        ("2024-03-14", "2024-03-14T10:00:00"),
+    ]
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_relative_date_filters(make_context):
+    """Test relative literals and rolling ranges anchored on the current time"""
+    mock_context = make_context()
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", {"Sales": SALES}), None)
+
+    with patch("pbixray_server.current_time", return_value=FIXED_NOW):
+        assert await count(mock_context, "order_date>=today-14d") == 3
+        assert await count(mock_context, "order_date=last_7_days") == 1
+        assert await count(mock_context, "order_date=last_2_months") == 5
+        assert await count(mock_context, "order_date>=now-2h") == 0
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_aggregate_by_time(make_context):
+    """Test monthly and quarterly aggregation with a filter"""
+    mock_context = make_context()
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", {"Sales": SALES}), None)
+
+    parsed = json.loads(
+        await pbixray_server.aggregate_by_time(
+            mock_context, table_name="Sales", date_column="order_date", value_column="amount", aggregation="sum"
+        )
+    )
+    assert [(b["bucket"], b["value"]) for b in parsed["buckets"]] == [
+        ("2024-01", 30.0),
+        ("2024-02", 30.0),
+        ("2024-03", 150.0),
+    ]
+
+    parsed = json.loads(
+        await pbixray_server.aggregate_by_time(
+            mock_context, table_name="Sales", date_column="order_date", granularity="quarter", filters="amount>15"
+        )
+    )
+    assert parsed["buckets"] == [{"bucket": "2024Q1", "start": "2024-01-01T00:00:00", "value": 5}]
+
+    result = await pbixray_server.aggregate_by_time(
+        mock_context, table_name="Sales", date_column="order_date", aggregation="sum"
+    )
+    assert "needs a value_column" in result
+
+    # Clean up
+    pbixray_server.select_model(None, None)
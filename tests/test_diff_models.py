@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the diff_models tool in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_diff_models.py
+"""
+
+import os
+import json
+import pytest
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+# Models opened by version_model
+loads = []
+
+
+def version_model(file_path):
+    """Create a model whose definition depends on the file name (v1 or v2)"""
+    v2 = "v2" in os.path.basename(file_path)
+    model = MockPBIXRay(
+        file_path,
+        dax_measures=pd.DataFrame(
+            {
+                "TableName": ["Sales", "Sales"] + (["Sales"] if v2 else []),
+                "Name": ["Total Sales", "Margin"] + (["Order Count"] if v2 else []),
+                "Expression": [
+                    "SUM(Sales[Amount])",
+                    "DIVIDE(\n    SUM(Sales[Profit]),\n    SUM(Sales[Amount])\n)" if v2 else "SUM(Sales[Profit])",
+                ]
+                + (["COUNTROWS(Sales)"] if v2 else []),
+                "DisplayFolder": [None, "KPIs" if v2 else None] + ([None] if v2 else []),
+            }
+        ),
+        schema=pd.DataFrame(
+            {
+                "TableName": ["Sales", "Sales", "Sales"],
+                "ColumnName": ["Amount", "Profit", "Region" if v2 else "Country"],
+                "DataType": ["Decimal" if v2 else "Double", "Double", "String"],
+            }
+        ),
+        relationships=pd.DataFrame(
+            {
+                "FromTableName": ["Sales"],
+                "FromColumnName": ["CustomerKey"],
+                "ToTableName": ["Customer"],
+                "ToColumnName": ["CustomerKey"],
+                "IsActive": [not v2],
+                "Cardinality": ["M:1"],
+            }
+        ),
+        power_query=pd.DataFrame({"TableName": ["Sales"], "Expression": ['let Source = Sql.Database("srv", "dw") in Source']}),
+        dax_columns=pd.DataFrame(columns=["TableName", "ColumnName", "Expression"]),
+        dax_tables=pd.DataFrame(columns=["TableName", "Expression"]),
+        m_parameters=pd.DataFrame(columns=["ParameterName", "Description", "Expression"]),
+    )
+    loads.append(model)
+    return model
+
+
+def make_files(tmp_path):
+    paths = []
+    for name in ("report_v1.pbix", "report_v2.pbix"):
+        path = tmp_path / name
+        path.write_bytes(b"pbix")
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.asyncio
+async def test_diff_models(tmp_path, make_context):
+    """Test added, removed and modified objects between two model versions"""
+    mock_context = make_context()
+    old_path, new_path = make_files(tmp_path)
+    pbixray_server._comparison_models.clear()
+
+    with patch("pbixray_server.PBIXRay", version_model):
+        result = json.loads(await pbixray_server.diff_models(mock_context, old_file_path=old_path, new_file_path=new_path))
+
+    assert result["identical"] is False
+    measures = result["differences"]["measures"]
+    assert measures["added"] == ["Sales[Order Count]"]
+    assert measures["removed"] == []
+    assert measures["unchanged"] == 1
+    [margin] = measures["modified"]
+    assert margin["name"] == "Sales[Margin]"
+    assert "+DIVIDE(" in margin["changes"]["Expression"]["diff"]
+    assert "-SUM(Sales[Profit])" in margin["changes"]["Expression"]["diff"]
+    assert margin["changes"]["DisplayFolder"] == {"old": None, "new": "KPIs"}
+
+    columns = result["differences"]["columns"]
+    assert columns["added"] == ["Sales[Region]"] and columns["removed"] == ["Sales[Country]"]
+    assert columns["modified"][0]["changes"] == {"DataType": {"old": "Double", "new": "Decimal"}}
+
+    [relationship] = result["differences"]["relationships"]["modified"]
+    assert relationship["name"] == "Sales[CustomerKey] -> Customer[CustomerKey]"
+    assert result["differences"]["power_queries"]["unchanged"] == 1
+
+    # Clean up
+    pbixray_server._comparison_models.clear()
+
+
+@pytest.mark.asyncio
+async def test_diff_models_reuses_opened_files(tmp_path, make_context):
+    """Test that identical files diff as identical and opened files are reused"""
+    mock_context = make_context()
+    old_path, _ = make_files(tmp_path)
+    pbixray_server._comparison_models.clear()
+    loads.clear()
+
+    with patch("pbixray_server.PBIXRay", version_model):
+        for _ in range(2):
+            result = json.loads(
+                await pbixray_server.diff_models(
+                    mock_context, old_file_path=old_path, new_file_path=old_path, object_types="measures, columns"
+                )
+            )
+            assert result["identical"] is True
+            assert set(result["differences"]) == {"measures", "columns"}
+
+    # The same file is opened once across both comparisons
+    assert len(loads) == 1
+
+    # Clean up
+    pbixray_server._comparison_models.clear()
+
+
+@pytest.mark.asyncio
+async def test_diff_models_errors(tmp_path, make_context):
+    """Test argument validation of diff_models"""
+    mock_context = make_context()
+    old_path, new_path = make_files(tmp_path)
+
+    result = await pbixray_server.diff_models(mock_context, old_file_path=old_path, new_file_path=str(tmp_path / "x.pbix"))
+    assert "not found" in result
+
+    result = await pbixray_server.diff_models(
+        mock_context, old_file_path=old_path, new_file_path=new_path, object_types="measures,visuals"
+    )
+    assert "Unknown object type(s): visuals" in result
+
+
+def test_evicted_comparison_models_are_closed(tmp_path):
+    """Test that models evicted from the comparison LRU are closed once no diff uses them"""
+    paths = []
+    for name in ("a_v1.pbix", "b_v1.pbix", "c_v1.pbix"):
+        (tmp_path / name).write_bytes(b"pbix")
+        paths.append(str(tmp_path / name))
+    pbixray_server._comparison_models.clear()
+
+    with patch("pbixray_server.PBIXRay", version_model):
+        first = pbixray_server.open_comparison_model(paths[0])
+        pbixray_server.unpin_model(first)
+        # A diff is still running on the second model when it is evicted
+        second = pbixray_server.open_comparison_model(paths[1])
+        for path in paths[2:] + paths[:1]:
+            pbixray_server.unpin_model(pbixray_server.open_comparison_model(path))
+
+    assert len(pbixray_server._comparison_models) == pbixray_server.COMPARISON_MODEL_LIMIT
+    assert first.closed and not second.closed
+    pbixray_server.unpin_model(second)
+    assert second.closed
+
+    # Clean up
+    pbixray_server._comparison_models.clear()
+
+
+def test_concurrent_opens_share_one_model(tmp_path):
+    """Test that two diffs opening the same file at once keep one model and close the other copy"""
+    (tmp_path / "report_v1.pbix").write_bytes(b"pbix")
+    path = str(tmp_path / "report_v1.pbix")
+    pbixray_server._comparison_models.clear()
+    loads.clear()
+    both_loading = threading.Barrier(2, timeout=5)
+
+    def slow_model(file_path):
+        both_loading.wait()
+        return version_model(file_path)
+
+    with patch("pbixray_server.PBIXRay", slow_model), ThreadPoolExecutor(max_workers=2) as executor:
+        first, second = executor.map(pbixray_server.open_comparison_model, [path, path])
+
+    assert first is second
+    assert list(pbixray_server._comparison_models.values()) == [first]
+    assert len(loads) == 2 and [model.closed for model in loads if model is not first] == [True]
+    pbixray_server.unpin_model(first)
+    pbixray_server.unpin_model(second)
+    assert pbixray_server._model_pins == {}
+
+    # Clean up
+    pbixray_server._comparison_models.clear()
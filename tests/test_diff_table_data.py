@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the diff_table_data tool in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_diff_table_data.py
+"""
+
+import os
+import json
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+
+def snapshot(file_path):
+    """One of two snapshots of a Sales table, chosen by file name"""
+    if "v2" in os.path.basename(file_path):
+        # Order 3 deleted, order 2 amount and order 4 region changed, order 6 inserted, a Channel column added
+        return pd.DataFrame(
+            {
+                "OrderID": [1, 2, 4, 5, 6],
+                "Line": [1, 1, 1, 1, 1],
+                "Amount": [10.0, 25.0, 40.0, np.nan, 60.0],
+                "Region": ["North", "South", "West", "West", "North"],
+                "Channel": ["Web"] * 5,
+            }
+        )
+    return pd.DataFrame(
+        {
+            "OrderID": [1, 2, 3, 4, 5],
+            "Line": [1, 1, 1, 1, 1],
+            "Amount": [10.0, 20.0, 30.0, 40.0, np.nan],
+            "Region": ["North", "South", "East", "East", "West"],
+        }
+    )
+
+
+def snapshot_model(file_path):
+    return MockPBIXRay(file_path, {"Sales": snapshot(file_path)}, schema=True)
+
+
+def make_files(tmp_path):
+    paths = []
+    for name in ("sales_v1.pbix", "sales_v2.pbix"):
+        path = tmp_path / name
+        path.write_bytes(b"pbix")
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.asyncio
+async def test_diff_table_data(tmp_path, make_context):
+    """Test inserted, deleted and changed rows between two snapshots"""
+    mock_context = make_context()
+    old_path, new_path = make_files(tmp_path)
+    pbixray_server._comparison_models.clear()
+
+    with patch("pbixray_server.PBIXRay", snapshot_model):
+        result = json.loads(
+            await pbixray_server.diff_table_data(
+                mock_context, old_file_path=old_path, new_file_path=new_path, table_name="Sales", key_columns="OrderID, Line"
+            )
+        )
+
+    assert result["compared_columns"] == ["Amount", "Region"]
+    assert result["columns_only_in_new"] == ["Channel"]
+    assert result["inserted"]["count"] == 1
+    assert result["inserted"]["examples"][0]["OrderID"] == 6
+    assert result["deleted"]["count"] == 1
+    assert result["deleted"]["examples"][0]["OrderID"] == 3
+    assert result["changed"]["count"] == 2
+    changes = {example["key"]["OrderID"]: example["changes"] for example in result["changed"]["examples"]}
+    assert changes[2] == {"Amount": {"old": 20.0, "new": 25.0}}
+    assert changes[4] == {"Region": {"old": "East", "new": "West"}}
+    # Missing values on both sides count as unchanged
+    assert result["unchanged"] == 2
+    # The comparison models are no longer pinned once the diff is done
+    assert pbixray_server._model_pins == {}
+
+    # Clean up
+    pbixray_server._comparison_models.clear()
+
+
+@pytest.mark.asyncio
+async def test_diff_table_data_projected_columns_and_errors(tmp_path, make_context):
+    """Test comparing selected columns and reporting unknown columns"""
+    mock_context = make_context()
+    old_path, new_path = make_files(tmp_path)
+    pbixray_server._comparison_models.clear()
+
+    with patch("pbixray_server.PBIXRay", snapshot_model):
+        result = json.loads(
+            await pbixray_server.diff_table_data(
+                mock_context,
+                old_file_path=old_path,
+                new_file_path=new_path,
+                table_name="Sales",
+                key_columns="OrderID",
+                columns="Region",
+            )
+        )
+        assert result["changed"]["count"] == 1
+
+        result = await pbixray_server.diff_table_data(
+            mock_context, old_file_path=old_path, new_file_path=new_path, table_name="Sales", key_columns="Channel"
+        )
+        assert "Column 'Channel' not found in both versions" in result
+
+        result = await pbixray_server.diff_table_data(
+            mock_context, old_file_path=old_path, new_file_path=new_path, table_name="Returns", key_columns="OrderID"
+        )
+        assert "Table 'Returns' not found" in result
+
+    # Clean up
+    pbixray_server._comparison_models.clear()
+
+
+def test_row_hashes_do_not_depend_on_chunk_size():
+    """Test that chunked hashing gives the same hashes as a single chunk"""
+    model = snapshot_model("/path/to/sales_v1.pbix")
+    whole = pbixray_server.hash_table_rows(model, "Sales", ["OrderID"], ["Amount", "Region"], chunk_size=100)
+    chunked = pbixray_server.hash_table_rows(model, "Sales", ["OrderID"], ["Amount", "Region"], chunk_size=2)
+    assert np.array_equal(whole[0], chunked[0]) and np.array_equal(whole[1], chunked[1])
+
+    rows = pbixray_server.fetch_table_rows(model, "Sales", ["OrderID", "Region"], [4, 1], chunk_size=2)
+    assert list(rows.index) == [1, 4] and list(rows["OrderID"]) == [2, 5]
+
+
+class MockPBIXRayChunked(MockPBIXRay):
+    """Mock model with a chunked decoder, like PBIXRay's iter_table, that records the chunks it decodes"""
+
+    def __init__(self, file_path):
+        super().__init__(file_path, {"Sales": snapshot(file_path)}, schema=True)
+        self.passes = 0
+        self.chunks = 0
+
+    def iter_table(self, table_name, columns=None, chunk_size=100):
+        self.passes += 1
+        frame = self.frame(table_name)
+        for start in range(0, len(frame), chunk_size):
+            self.chunks += 1
+            yield frame[columns].iloc[start : start + chunk_size]
+
+
+def test_example_rows_fetched_in_one_pass_per_model():
+    """Test that inserted, deleted and changed examples share one pass that stops at the last example row"""
+    old_model = MockPBIXRayChunked("/path/to/sales_v1.pbix")
+    new_model = MockPBIXRayChunked("/path/to/sales_v2.pbix")
+
+    result = pbixray_server.diff_table_rows(old_model, new_model, "Sales", ["OrderID"], max_examples=1)
+    assert result["deleted"]["examples"][0]["OrderID"] == 3
+    assert result["inserted"]["examples"][0]["OrderID"] == 6
+    assert [example["key"]["OrderID"] for example in result["changed"]["examples"]] == [2]
+
+    # One hashing pass and one example pass per model
+    assert old_model.passes == 2 and new_model.passes == 2
+
+    # Decoding stops at the chunk holding the last requested row
+    old_model.chunks = 0
+    rows = pbixray_server.fetch_table_rows(old_model, "Sales", ["OrderID"], [2, 1, 2], chunk_size=1)
+    assert list(rows["OrderID"]) == [2, 3]
+    assert old_model.chunks == 3
+
+    rows = pbixray_server.fetch_table_rows(old_model, "Sales", ["OrderID"], [], chunk_size=1)
+    assert rows.empty and old_model.passes == 3
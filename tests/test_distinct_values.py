@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the get_distinct_values tool in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_distinct_values.py
+"""
+
+import json
+import pytest
+import pandas as pd
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+REGIONS = ["madrid", "barcelona", "madrid", "albacete", None, "madrid", "barcelona"]
+
+
+def sales():
+    return pd.DataFrame({"region": REGIONS, "amount": list(range(len(REGIONS)))})
+
+
+@pytest.mark.asyncio
+async def test_get_distinct_values_with_counts(make_context):
+    """Test distinct values, counts and ordering"""
+    mock_context = make_context()
+
+    for model in (
+        # Older PBIXRay releases can only decode whole tables
+        MockPBIXRay("/path/to/test.pbix", {"Sales": sales}),
+        MockPBIXRay("/path/to/test.pbix", {"Sales": sales}, projecting=True),
+    ):
+        pbixray_server.select_model(model, None)
+
+        parsed = json.loads(await pbixray_server.get_distinct_values(mock_context, "Sales", "region"))
+        assert parsed["distinct_count"] == 3
+        assert parsed["null_count"] == 1
+        assert [row["value"] for row in parsed["data"]] == ["albacete", "barcelona", "madrid"]
+
+        parsed = json.loads(await pbixray_server.get_distinct_values(mock_context, "Sales", "region", order_by="count"))
+        assert parsed["data"][0] == {"value": "madrid", "count": 3}
+
+    # The projected model only decoded the requested column
+    assert model.decoded == [["region"]]
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_get_distinct_values_prefix_and_paging(make_context):
+    """Test prefix search and pagination of distinct values"""
+    mock_context = make_context()
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", {"Sales": sales}), None)
+
+    parsed = json.loads(await pbixray_server.get_distinct_values(mock_context, "Sales", "region", prefix="MA"))
+    assert [row["value"] for row in parsed["data"]] == ["madrid"]
+
+    parsed = json.loads(await pbixray_server.get_distinct_values(mock_context, "Sales", "region", page=2, page_size=2))
+    assert parsed["pagination"]["total_pages"] == 2
+    assert [row["value"] for row in parsed["data"]] == ["madrid"]
+
+    result = await pbixray_server.get_distinct_values(mock_context, "Sales", "missing")
+    assert "Column 'missing' not found" in result
+
+    # Clean up
+    pbixray_server.select_model(None, None)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Unit tests for local DAX evaluation (dax_engine and the evaluate_measure tool)
+
+Usage:
+    pytest -xvs tests/test_evaluate_measure.py
+"""
+
+import json
+import pytest
+import pandas as pd
+
+import pbixray_server
+from dax_engine import DaxError, parse
+from tests.mock_pbixray import MockPBIXRay
+
+
+def make_model():
+    """A model with a fact table, a dimension and DAX measures"""
+    return MockPBIXRay(
+        "/path/to/test.pbix",
+        {
+            "Sales": pd.DataFrame({"ProductKey": [1, 2, 1, 3], "Amount": [10.0, 20.0, 30.0, 40.0]}),
+            "Product": pd.DataFrame({"ProductKey": [1, 2, 3], "Color": ["Red", "Blue", "Blue"]}),
+        },
+        relationships=pd.DataFrame(
+            {
+                "FromTableName": ["Sales"],
+                "FromColumnName": ["ProductKey"],
+                "ToTableName": ["Product"],
+                "ToColumnName": ["ProductKey"],
+                "IsActive": [True],
+            }
+        ),
+        dax_measures=pd.DataFrame(
+            {
+                "TableName": ["Sales"] * 6,
+                "Name": ["Total Amount", "Order Count", "Red Amount", "Red Share", "Loop", "All Sales"],
+                "Expression": [
+                    "SUM(Sales[Amount])",
+                    "COUNTROWS(Sales)",
+                    'CALCULATE([Total Amount], Product[Color] = "red")',
+                    "DIVIDE([Red Amount], CALCULATE([Total Amount], ALL(Product)))",
+                    "[Loop] + 1",
+                    "CALCULATE([Total Amount], ALL(Sales))",
+                ],
+            }
+        ),
+    )
+
+
+def test_parse_dax_expression():
+    """Test parsing of references, calls and operator precedence"""
+    assert parse("1 + 2 * 3") == ("binary", "+", ("constant", 1), ("binary", "*", ("constant", 2), ("constant", 3)))
+    assert parse("'Sales Order'[Qty]") == ("reference", "Sales Order", "Qty")
+    assert parse("COUNTROWS(Sales) // trailing comment") == ("call", "COUNTROWS", [("table", "Sales")])
+
+    with pytest.raises(DaxError):
+        parse("SUM(Sales[Amount]")
+
+
+@pytest.mark.asyncio
+async def test_evaluate_measure_with_relationship_filters(make_context):
+    """Test measures, CALCULATE filters propagated across relationships and ALL"""
+    mock_context = make_context()
+    pbixray_server.select_model(make_model(), None)
+
+    parsed = json.loads(await pbixray_server.evaluate_measure(mock_context, measure_name="Total Amount"))
+    assert parsed["value"] == 100.0
+
+    parsed = json.loads(await pbixray_server.evaluate_measure(mock_context, measure_name="Red Amount"))
+    assert parsed["value"] == 40.0
+
+    parsed = json.loads(await pbixray_server.evaluate_measure(mock_context, measure_name="Red Share"))
+    assert parsed["value"] == 0.4
+
+    # CALCULATE replaces the outer filter on the same column
+    parsed = json.loads(
+        await pbixray_server.evaluate_measure(mock_context, measure_name="Red Amount", filters="Product[Color]=Blue")
+    )
+    assert parsed["value"] == 40.0
+
+    parsed = json.loads(
+        await pbixray_server.evaluate_measure(
+            mock_context, expression="DISTINCTCOUNT(Sales[ProductKey]) + [Order Count]", filters="Product[Color]=Blue"
+        )
+    )
+    assert parsed["value"] == 4
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_evaluate_measure_group_by_and_errors(make_context):
+    """Test per-group evaluation and error reporting"""
+    mock_context = make_context()
+    pbixray_server.select_model(make_model(), None)
+
+    parsed = json.loads(
+        await pbixray_server.evaluate_measure(mock_context, measure_name="Total Amount", group_by="Product[Color]")
+    )
+    assert parsed["groups"] == [{"group": "Blue", "value": 60.0}, {"group": "Red", "value": 40.0}]
+
+    result = await pbixray_server.evaluate_measure(mock_context, measure_name="Loop")
+    assert "Circular measure reference" in result
+
+    result = await pbixray_server.evaluate_measure(mock_context, expression="SUMX(Sales, Sales[Amount])")
+    assert "Unsupported DAX function 'SUMX'" in result
+
+    result = await pbixray_server.evaluate_measure(mock_context)
+    assert "Specify either measure_name or expression" in result
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_all_removes_filters_from_related_tables(make_context):
+    """Test that ALL on a fact table also removes the filters coming from its dimensions"""
+    mock_context = make_context()
+    pbixray_server.select_model(make_model(), None)
+
+    parsed = json.loads(
+        await pbixray_server.evaluate_measure(mock_context, measure_name="All Sales", filters="Product[Color]=Blue")
+    )
+    assert parsed["value"] == 100.0
+
+    # ALL on the dimension keeps the filters of the fact table
+    parsed = json.loads(
+        await pbixray_server.evaluate_measure(
+            mock_context, expression="CALCULATE([Total Amount], ALL(Product))", filters="Sales[Amount]>15"
+        )
+    )
+    assert parsed["value"] == 90.0
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_group_by_keeps_no_masks_in_the_model_cache(make_context):
+    """Test that filter masks and measure values live only as long as one evaluation"""
+    mock_context = make_context()
+    model = make_model()
+    pbixray_server.select_model(model, None)
+
+    await pbixray_server.evaluate_measure(mock_context, measure_name="Red Share", group_by="Product[ProductKey]")
+    with pbixray_server.model_cache._lock:
+        keys = list(pbixray_server.model_cache._state(model).artifacts)
+    assert not [key for key in keys if key[0] in ("dax_mask", "dax_measure")]
+
+    # Clean up
+    pbixray_server.select_model(None, None)
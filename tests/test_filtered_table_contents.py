@@ -95,8 +95,7 @@ async def test_get_filtered_table_contents_basic():
     mock_context.report_progress.return_value.set_result(None)
 
     # Use our mock PBIXRay class
-    pbixray_server.current_model = MockPBIXRayWithFilterableData("/path/to/test.pbix")
-    pbixray_server.current_model_path = "/path/to/test.pbix"
+    pbixray_server.select_model(MockPBIXRayWithFilterableData("/path/to/test.pbix"), "/path/to/test.pbix")
 
     # Test with a simple equality filter
     result = await pbixray_server.get_table_contents(
@@ -117,8 +116,7 @@ async def test_get_filtered_table_contents_basic():
     assert all(row["location_id"] == "albacete" for row in parsed["data"]), "All rows should have location_id=albacete"
 
     # Clean up
-    pbixray_server.current_model = None
-    pbixray_server.current_model_path = None
+    pbixray_server.select_model(None, None)
 
 
 @pytest.mark.asyncio
@@ -132,8 +130,7 @@ async def test_get_filtered_table_contents_numeric_comparison():
     mock_context.report_progress.return_value.set_result(None)
 
     # Use our mock PBIXRay class
-    pbixray_server.current_model = MockPBIXRayWithFilterableData("/path/to/test.pbix")
-    pbixray_server.current_model_path = "/path/to/test.pbix"
+    pbixray_server.select_model(MockPBIXRayWithFilterableData("/path/to/test.pbix"), "/path/to/test.pbix")
 
     # Test with numeric comparison filters
     result = await pbixray_server.get_table_contents(
@@ -146,8 +143,7 @@ async def test_get_filtered_table_contents_numeric_comparison():
     assert all(150 < row["period"] < 180 for row in parsed["data"]), "All rows should have period between 150 and 180"
 
     # Clean up
-    pbixray_server.current_model = None
-    pbixray_server.current_model_path = None
+    pbixray_server.select_model(None, None)
 
 
 @pytest.mark.asyncio
@@ -161,8 +157,7 @@ async def test_get_filtered_table_contents_multiple_filters():
     mock_context.report_progress.return_value.set_result(None)
 
     # Use our mock PBIXRay class
-    pbixray_server.current_model = MockPBIXRayWithFilterableData("/path/to/test.pbix")
-    pbixray_server.current_model_path = "/path/to/test.pbix"
+    pbixray_server.select_model(MockPBIXRayWithFilterableData("/path/to/test.pbix"), "/path/to/test.pbix")
 
     # Test with multiple filters of different types
     result = await pbixray_server.get_table_contents(
@@ -180,8 +175,7 @@ async def test_get_filtered_table_contents_multiple_filters():
         assert row["amount"] < 20, "All rows should have amount<20"
 
     # Clean up
-    pbixray_server.current_model = None
-    pbixray_server.current_model_path = None
+    pbixray_server.select_model(None, None)
 
 
 @pytest.mark.asyncio
@@ -195,8 +189,7 @@ async def test_get_filtered_table_contents_pagination():
     mock_context.report_progress.return_value.set_result(None)
 
     # Use our mock PBIXRay class
-    pbixray_server.current_model = MockPBIXRayWithFilterableData("/path/to/test.pbix")
-    pbixray_server.current_model_path = "/path/to/test.pbix"
+    pbixray_server.select_model(MockPBIXRayWithFilterableData("/path/to/test.pbix"), "/path/to/test.pbix")
 
     # Test with a filter that returns multiple rows and use pagination
     result_page1 = await pbixray_server.get_table_contents(
@@ -223,8 +216,7 @@ async def test_get_filtered_table_contents_pagination():
     assert not any(pid in page2_ids for pid in page1_ids), "Pages should contain different rows"
 
     # Clean up
-    pbixray_server.current_model = None
-    pbixray_server.current_model_path = None
+    pbixray_server.select_model(None, None)
 
 
 @pytest.mark.asyncio
@@ -238,8 +230,7 @@ async def test_get_filtered_table_contents_error_handling():
     mock_context.report_progress.return_value.set_result(None)
 
     # Use our mock PBIXRay class
-    pbixray_server.current_model = MockPBIXRayWithFilterableData("/path/to/test.pbix")
-    pbixray_server.current_model_path = "/path/to/test.pbix"
+    pbixray_server.select_model(MockPBIXRayWithFilterableData("/path/to/test.pbix"), "/path/to/test.pbix")
 
     # Test with non-existent column
     result = await pbixray_server.get_table_contents(
@@ -266,8 +257,7 @@ async def test_get_filtered_table_contents_error_handling():
     assert "does not exist" in result, "Error should indicate page does not exist"
 
     # Clean up
-    pbixray_server.current_model = None
-    pbixray_server.current_model_path = None
+    pbixray_server.select_model(None, None)
 
 
 @pytest.mark.asyncio
@@ -334,5 +324,4 @@ async def test_get_filtered_table_contents_with_real_file(pbix_file_path):
     assert len(parsed["data"]) > 0, "Expected at least one row in the filtered results"
 
     # Clean up
-    pbixray_server.current_model = None
-    pbixray_server.current_model_path = None
+    pbixray_server.select_model(None, None)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the find_value tool in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_find_value.py
+"""
+
+import json
+import pytest
+import pandas as pd
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+TABLES = {
+    "Sales": pd.DataFrame({"customer_key": ["CUST-00912", "CUST-00100", "CUST-00912"], "amount": [10, 20, 30]}),
+    "Customer": pd.DataFrame({"customer_key": ["CUST-00912", "CUST-00100"], "name": ["Ana", "Luis"]}),
+    "Product": pd.DataFrame({"product_key": ["PROD-1", "PROD-2"], "name": ["Laptop", "Phone"]}),
+}
+
+
+@pytest.mark.asyncio
+async def test_find_value_exact(make_context):
+    """Test finding a key across all tables"""
+    mock_context = make_context()
+    model = MockPBIXRay("/path/to/test.pbix", TABLES, schema=True)
+    pbixray_server.select_model(model, None)
+
+    parsed = json.loads(await pbixray_server.find_value(mock_context, value="cust-00912"))
+
+    assert parsed["columns_searched"] == 6
+    found = {(m["table_name"], m["column_name"]): m["occurrences"] for m in parsed["matches"]}
+    assert found == {("Sales", "customer_key"): 2, ("Customer", "customer_key"): 1}
+
+    # Each table is decoded once even though its columns are searched in parallel
+    assert model.decode_calls == 3
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_find_value_subset_and_match_modes(make_context):
+    """Test restricting the search to some tables and partial matching"""
+    mock_context = make_context()
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", TABLES, schema=True), None)
+
+    parsed = json.loads(await pbixray_server.find_value(mock_context, value="PROD", tables="Product", match="prefix"))
+    assert parsed["columns_searched"] == 2
+    assert parsed["matches"][0]["matching_values"] == 2
+
+    parsed = json.loads(await pbixray_server.find_value(mock_context, value="apt", match="contains"))
+    assert [(m["table_name"], m["examples"]) for m in parsed["matches"]] == [("Product", ["Laptop"])]
+
+    result = await pbixray_server.find_value(mock_context, value="x", match="regex")
+    assert "Error" in result
+
+    # Clean up
+    pbixray_server.select_model(None, None)
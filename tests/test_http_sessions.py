@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-session models of the HTTP transport of the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_http_sessions.py
+"""
+
+import os
+import json
+import time
+import pytest
+import asyncio
+import threading
+import pandas as pd
+from unittest.mock import patch, MagicMock
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+
+def named_model(file_path):
+    """A model whose single table is named after the file"""
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return MockPBIXRay(file_path, tables={name: pd.DataFrame({"Value": [1, 2, 3]})})
+
+
+class FakeSession:
+    """Stand-in for an MCP server session"""
+
+
+@pytest.fixture
+def sessions(tmp_path, make_context):
+    """Enable per-session models and yield a function switching the calling session and a function loading a file"""
+    for name in ("sales", "finance"):
+        (tmp_path / f"{name}.pbix").write_bytes(b"pbix")
+    state = {"session": None}
+
+    pbixray_server.SESSION_MODELS = True
+    pbixray_server.response_cache.clear()
+    pbixray_server.model_cache.clear()
+    with patch("pbixray_server.PBIXRay", named_model), patch("pbixray_server.current_session", lambda: state["session"]):
+
+        def use(session):
+            state["session"] = session
+
+        def load(file_path):
+            # The context futures must be created in the loop that awaits them
+            async def run():
+                return await pbixray_server.load_pbix_file(str(file_path), make_context())
+
+            return asyncio.run(run())
+
+        yield tmp_path, use, load
+
+    pbixray_server.SESSION_MODELS = False
+    pbixray_server._session_models.clear()
+    pbixray_server._shared_models.clear()
+    pbixray_server.select_model(None, None)
+    pbixray_server.model_cache.clear()
+
+
+def test_sessions_select_their_own_model(sessions):
+    """Test that every session works on the model it loaded"""
+    tmp_path, use, load = sessions
+    first, second = FakeSession(), FakeSession()
+
+    use(first)
+    assert load(tmp_path / "sales.pbix").startswith("Successfully loaded")
+    use(second)
+    assert load(tmp_path / "finance.pbix").startswith("Successfully loaded")
+
+    assert json.loads(pbixray_server.get_tables(MagicMock())) == ["finance"]
+    use(first)
+    assert json.loads(pbixray_server.get_tables(MagicMock())) == ["sales"]
+
+    # Sessions without a selection, and the server itself, have no model
+    use(FakeSession())
+    assert pbixray_server.get_tables(MagicMock()).startswith("Error: No Power BI file loaded.")
+    assert pbixray_server.active_model() is None
+
+
+def test_sessions_share_loaded_files(sessions):
+    """Test that a file loaded by one session is reused by the others and closed by the last"""
+    tmp_path, use, load = sessions
+    first, second = FakeSession(), FakeSession()
+
+    use(first)
+    load(tmp_path / "sales.pbix")
+    use(second)
+    assert "shared with other sessions" in load(tmp_path / "sales.pbix")
+    model = pbixray_server.active_model()
+
+    use(first)
+    assert pbixray_server.active_model() is model
+    loaded = json.loads(pbixray_server.get_loaded_models(MagicMock()))
+    assert [(entry["file"], entry["sessions"], entry["selected"]) for entry in loaded["models"]] == [("sales.pbix", 2, True)]
+
+    json.loads(pbixray_server.unload_model(MagicMock()))
+    assert pbixray_server.active_model() is None
+    assert not model.closed
+
+    use(second)
+    pbixray_server.unload_model(MagicMock())
+    assert model.closed
+
+
+def test_loading_another_file_closes_the_previous_model(sessions):
+    """Test that a session switching files closes its previous model unless another session uses it"""
+    tmp_path, use, load = sessions
+    first, second = FakeSession(), FakeSession()
+
+    use(first)
+    load(tmp_path / "sales.pbix")
+    sales = pbixray_server.active_model()
+    use(second)
+    load(tmp_path / "sales.pbix")
+
+    # The other session still works on sales.pbix
+    load(tmp_path / "finance.pbix")
+    finance = pbixray_server.active_model()
+    assert not sales.closed
+    use(first)
+    assert pbixray_server.active_model() is sales
+
+    # The last session leaving sales.pbix closes it
+    load(tmp_path / "finance.pbix")
+    assert sales.closed and not finance.closed
+    assert pbixray_server.active_model() is finance
+    loaded = json.loads(pbixray_server.get_loaded_models(MagicMock()))
+    assert [(entry["file"], entry["sessions"]) for entry in loaded["models"]] == [("finance.pbix", 2)]
+
+
+def test_model_cache_keeps_several_models():
+    """Test that decoded tables of up to max_models models are kept"""
+    cache = pbixray_server.ModelCache(max_tables=4, max_models=2)
+    models = [
+        MockPBIXRay(f"/path/model{index}.pbix", tables={"Sales": pd.DataFrame({"Value": [1, 2, 3]})}) for index in range(3)
+    ]
+
+    cache.get_table(models[0], "Sales")
+    cache.get_table(models[1], "Sales")
+    assert cache.has_table(models[0], "Sales") and cache.has_table(models[1], "Sales")
+    assert cache.stats()["models"] == 2
+    assert len(cache.memory_usage()["tables"]) == 2
+
+    # A third model evicts the least recently used one
+    cache.get_table(models[1], "Sales")
+    cache.get_table(models[2], "Sales")
+    assert not cache.has_table(models[0], "Sales")
+    assert cache.has_table(models[1], "Sales")
+    assert cache.has_table(models[2], "Sales")
+
+    cache.discard(models[2])
+    assert cache.stats()["models"] == 1
+
+
+def test_worker_limit():
+    """Test that --workers bounds the tool calls running in threads at once"""
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+
+    async def run_calls():
+        await asyncio.gather(*(pbixray_server.run_in_thread(work) for _ in range(6)))
+
+    pbixray_server.WORKERS = 2
+    try:
+        asyncio.run(run_calls())
+    finally:
+        pbixray_server.WORKERS = None
+        pbixray_server._worker_limiter = None
+    assert peak[0] == 2
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the get_joined_rows tool in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_joined_rows.py
+"""
+
+import json
+import pytest
+import pandas as pd
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+# A small snowflake schema
+TABLES = {
+    "Sales": pd.DataFrame(
+        {
+            "ProductKey": [1, 2, 1, 3, 9],
+            "CustomerKey": [10, 10, 20, 20, 10],
+            "ShipCustomerKey": [20, 20, 10, 10, 10],
+            "Quantity": [1, 2, 3, 4, 5],
+        }
+    ),
+    "Product": pd.DataFrame({"ProductKey": [1, 2, 3], "Name": ["Bike", "Helmet", "Glove"], "CategoryKey": [100, 200, 200]}),
+    "Category": pd.DataFrame({"CategoryKey": [100, 200], "Category": ["Bikes", "Accessories"]}),
+    "Customer": pd.DataFrame({"CustomerKey": [10, 20], "Country": ["Spain", "France"]}),
+}
+RELATIONSHIPS = pd.DataFrame(
+    {
+        "FromTableName": ["Sales", "Product", "Sales", "Sales"],
+        "FromColumnName": ["ProductKey", "CategoryKey", "CustomerKey", "ShipCustomerKey"],
+        "ToTableName": ["Product", "Category", "Customer", "Customer"],
+        "ToColumnName": ["ProductKey", "CategoryKey", "CustomerKey", "CustomerKey"],
+        "IsActive": [True, True, True, False],
+    }
+)
+
+
+@pytest.mark.asyncio
+async def test_get_joined_rows_snowflake(make_context):
+    """Test joining through an intermediate table with projection"""
+    mock_context = make_context()
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", TABLES, relationships=RELATIONSHIPS), None)
+
+    result = await pbixray_server.get_joined_rows(
+        mock_context,
+        table_name="Sales",
+        dimensions="Category,Customer",
+        columns="Quantity,Product[Name],Category[Category],Customer[Country]",
+    )
+    parsed = json.loads(result)
+
+    assert parsed["total_rows"] == 5
+    assert "Sales[ProductKey] -> Product[ProductKey]" in parsed["joins"]
+    assert parsed["data"][0] == {
+        "Sales[Quantity]": 1,
+        "Product[Name]": "Bike",
+        "Category[Category]": "Bikes",
+        "Customer[Country]": "Spain",
+    }
+    # Unmatched keys produce blanks instead of dropping the row
+    assert parsed["data"][4]["Product[Name]"] is None
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_get_joined_rows_filters_and_limit(make_context):
+    """Test filters on the base and joined tables, and the row limit"""
+    mock_context = make_context()
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", TABLES, relationships=RELATIONSHIPS), None)
+
+    result = await pbixray_server.get_joined_rows(
+        mock_context,
+        table_name="Sales",
+        dimensions="Product,Customer",
+        filters="Quantity>1;Customer[Country]=France;Category[Category]=Accessories",
+        columns="Quantity",
+        limit=1,
+    )
+    # Category is not part of this join
+    assert "not part of the join" in result
+
+    result = await pbixray_server.get_joined_rows(
+        mock_context,
+        table_name="Sales",
+        dimensions="Category,Customer",
+        filters="Quantity>1;Customer[Country]=France;Category[Category]=Accessories",
+        columns="Quantity",
+        limit=1,
+    )
+    parsed = json.loads(result)
+    assert parsed["total_rows"] == 1
+    assert parsed["data"] == [{"Sales[Quantity]": 4}]
+
+    result = await pbixray_server.get_joined_rows(mock_context, table_name="Customer", dimensions="Sales")
+    assert "No active relationship path" in result
+
+    # Clean up
+    pbixray_server.select_model(None, None)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the stdio load-test harness
+
+Usage:
+    pytest -xvs tests/test_load_test.py
+"""
+
+import os
+import sys
+import random
+
+# Add the benchmarks directory to the path so we can import the harness
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks")))
+
+import load_test
+
+
+def test_percentiles_and_mix():
+    """Test nearest-rank percentiles, mix parsing and argument placeholders"""
+    values = list(range(1, 101))
+    assert load_test.percentile(values, 50) == 50
+    assert load_test.percentile(values, 99) == 99
+    assert load_test.percentile([7], 95) == 7
+
+    mix = load_test.parse_mix(["get_table_contents=3", "get_tables"])
+    assert mix[0]["weight"] == 3 and mix[0]["arguments"]["table_name"] == "{table}"
+    assert mix[1] == {"tool": "get_tables", "arguments": {}, "weight": 1.0}
+
+    arguments = load_test.render_arguments(
+        {"table_name": "{table}", "page": "{page}", "filters": "{table}Key>0"}, ["Sales"], 5, random.Random(0)
+    )
+    assert arguments["table_name"] == "Sales" and 1 <= arguments["page"] <= 5
+    assert arguments["filters"] == "SalesKey>0"
+
+
+def test_concurrent_calls_over_stdio():
+    """Test replaying a mix against a real server process"""
+    report = load_test.main(["--mix", "get_cache_stats=3", "get_tables=1", "--requests", "40", "--concurrency", "4"])
+
+    assert sum(stats["calls"] for stats in report["tools"].values()) == 40
+    # Nothing is loaded, so get_tables answers with an error
+    assert report["tools"]["get_tables"]["errors"] == report["tools"]["get_tables"]["calls"]
+    assert report["tools"]["get_cache_stats"]["errors"] == 0
+    assert report["load"]["server_startup"]["calls"] == 1
+    assert report["throughput_per_s"] > 0
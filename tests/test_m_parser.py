@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Power Query (M) parser and the M index tools in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_m_parser.py
+"""
+
+import json
+import pytest
+import pandas as pd
+
+import pbixray_server
+from m_parser import parse_query, split_let
+from tests.mock_pbixray import MockPBIXRay
+
+SALES_QUERY = """let
+    // Server comes from a parameter
+    Source = Sql.Database(ServerName, "dw"),
+    dbo_Sales = Source{[Schema="dbo",Item="Sales"]}[Data],
+    #"Filtered Rows" = Table.SelectRows(dbo_Sales, each [Amount] > 0),
+    #"Added Margin" = Table.AddColumn(#"Filtered Rows", "Margin", each let m = [Amount] - [Cost] in m),
+    Merged = Table.NestedJoin(#"Added Margin", {"CustomerKey"}, Customer, {"CustomerKey"}, "Customer", JoinKind.LeftOuter),
+    Buffered = Table.Buffer(Merged)
+in
+    Buffered"""
+
+CUSTOMER_QUERY = """let
+    Source = Excel.Workbook(File.Contents("C:\\data\\customers.xlsx"), null, true),
+    Sheet = Source{[Item="Customers",Kind="Sheet"]}[Data],
+    Grouped = Table.Group(Sheet, {"Region"}, {{"Count", each Table.RowCount(_), Int64.Type}})
+in
+    Grouped"""
+
+
+POWER_QUERY = pd.DataFrame({"TableName": ["Sales", "Customer"], "Expression": [SALES_QUERY, CUSTOMER_QUERY]})
+M_PARAMETERS = pd.DataFrame(
+    {
+        "ParameterName": ["ServerName", "fnClean"],
+        "Description": [None, None],
+        "Expression": [
+            '"sqlprod01" meta [IsParameterQuery=true, Type="Text", IsParameterQueryRequired=true]',
+            "(t as table) => Table.Distinct(t)",
+        ],
+    }
+)
+
+
+def test_parse_query_steps_and_sources():
+    """Test steps, step types, dependencies, sources and references of a query"""
+    parsed = parse_query(
+        "Sales", SALES_QUERY, query_names={"Sales", "Customer", "ServerName"}, parameters={"ServerName": "sqlprod01"}
+    )
+
+    assert [step["name"] for step in parsed["steps"]] == [
+        "Source",
+        "dbo_Sales",
+        "Filtered Rows",
+        "Added Margin",
+        "Merged",
+        "Buffered",
+    ]
+    types = {step["name"]: step["types"] for step in parsed["steps"]}
+    assert types["Source"] == ["source"]
+    assert types["Added Margin"] == ["custom_column"]
+    assert types["Merged"] == ["merge"]
+    assert types["Buffered"] == ["buffer"]
+    # Record fields ([Amount], Schema=...) are not references to steps or queries
+    depends = {step["name"]: step["depends_on"] for step in parsed["steps"]}
+    assert depends["dbo_Sales"] == ["Source"] and depends["Merged"] == ["Added Margin"]
+
+    assert parsed["output"] == "Buffered"
+    assert parsed["sources"] == [
+        {"step": "Source", "function": "Sql.Database", "arguments": [{"parameter": "ServerName", "value": "sqlprod01"}, "dw"]}
+    ]
+    assert parsed["referenced_queries"] == ["Customer"]
+    assert parsed["parameters"] == ["ServerName"]
+
+
+def test_split_let_handles_strings_comments_and_expressions():
+    """Test that commas and keywords inside strings, comments and brackets do not split steps"""
+    steps, result = split_let('let a = "x, in y", /* b = 1, */ c = {1, 2} in c')
+    assert [name for name, _ in steps] == ["a", "c"]
+    assert result[0][1] == "c"
+
+    # Expressions that are not a let are one step
+    parsed = parse_query("Direct", 'Web.Contents("https://example.com/api")')
+    assert parsed["steps"][0]["name"] == "Direct"
+    assert parsed["sources"][0]["arguments"] == ["https://example.com/api"]
+
+
+@pytest.mark.asyncio
+async def test_m_index_tools(make_context):
+    """Test get_m_sources, find_m_steps and get_m_query_structure"""
+    mock_context = make_context()
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", power_query=POWER_QUERY, m_parameters=M_PARAMETERS), None)
+
+    # Parameters resolve to their values, so the server can be searched for
+    result = json.loads(await pbixray_server.get_m_sources(mock_context, function="Sql", argument="sqlprod01"))
+    assert [source["query"] for source in result] == ["Sales"]
+
+    # Nested connector calls count as one source
+    result = json.loads(await pbixray_server.get_m_sources(mock_context, argument="customers.xlsx"))
+    assert result[0]["function"] == "Excel.Workbook"
+    assert result[0]["arguments"][0] == {"function": "File.Contents", "arguments": ["C:\\data\\customers.xlsx"]}
+
+    result = json.loads(await pbixray_server.find_m_steps(mock_context, function="Table.Buffer"))
+    assert [(step["query"], step["name"]) for step in result] == [("Sales", "Buffered")]
+
+    result = json.loads(await pbixray_server.find_m_steps(mock_context, step_type="grouping"))
+    assert [(step["query"], step["name"]) for step in result] == [("Customer", "Grouped")]
+
+    result = json.loads(await pbixray_server.find_m_steps(mock_context, step_type="distinct"))
+    assert result[0]["query"] == "fnClean" and result[0]["kind"] == "shared"
+
+    result = json.loads(await pbixray_server.get_m_query_structure(mock_context, query_name="Customer"))
+    assert result["referenced_by"] == ["Sales"]
+    assert "Expression" not in result
+
+    result = await pbixray_server.find_m_steps(mock_context, step_type="teleport")
+    assert "step_type must be one of" in result
+    result = await pbixray_server.get_m_query_structure(mock_context, query_name="Missing")
+    assert "Query 'Missing' not found" in result
+    result = await pbixray_server.get_m_sources(mock_context, function="OData")
+    assert "No Power Query sources match" in result
+
+    # Clean up
+    pbixray_server.select_model(None, None)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the memory report and unload tools of the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_memory.py
+"""
+
+import json
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import MagicMock
+
+import pbixray_server
+from server_memory import estimate_size
+from tests.mock_pbixray import MockPBIXRay
+
+
+class MockDataModel:
+    """Stand-in for the decompressed data model held by PBIXRay"""
+
+    def __init__(self, size):
+        self.decompressed_data = b"\x00" * size
+
+
+def memory_model(file_path):
+    """A model with a 4 KB data model and a 1000-row Sales table"""
+    return MockPBIXRay(
+        file_path,
+        tables={"Sales": lambda: pd.DataFrame({"Amount": np.arange(1000, dtype="float64")})},
+        schema=pd.DataFrame({"TableName": ["Sales"], "ColumnName": ["Amount"], "DataType": ["Double"]}),
+        _data_model=MockDataModel(4096),
+    )
+
+
+@pytest.fixture(autouse=True)
+def loaded_model():
+    pbixray_server.model_cache.clear()
+    pbixray_server.response_cache.clear()
+    model = memory_model("/path/to/sales.pbix")
+    pbixray_server.select_model(model, "/path/to/sales.pbix")
+    yield model
+    pbixray_server.select_model(None, None)
+    pbixray_server._comparison_models.clear()
+
+
+def test_estimate_size():
+    """Test that frames, arrays and containers are sized deeply and shared objects counted once"""
+    frame = pd.DataFrame({"Amount": np.zeros(1000)})
+    assert estimate_size(frame) >= 8000
+    shared = np.zeros(1000)
+    assert estimate_size([shared, shared]) < 2 * 8000
+    assert estimate_size({"key": "x" * 1000}) > 1000
+
+
+@pytest.mark.asyncio
+async def test_memory_report_breakdown(make_context):
+    """Test the per-component breakdown of the memory report"""
+    await pbixray_server.get_table_contents(make_context(), table_name="Sales")
+    await pbixray_server.get_distinct_values(make_context(), table_name="Sales", column_name="Amount")
+
+    report = json.loads(await pbixray_server.get_memory_report(make_context()))
+    assert report["model"] == {"file": "sales.pbix", "data_model_bytes": 4096}
+    assert report["decoded_tables"]["Sales"] >= 8000
+    assert report["indexes"]["dictionary"] > 0
+    assert report["components_bytes"]["response_cache"] > 0
+    assert report["total_accounted_bytes"] == sum(report["components_bytes"].values())
+    assert "rss_bytes" in report["process"]
+
+
+def test_unload_model(loaded_model):
+    """Test that unloading drops the model and its caches"""
+    pbixray_server.get_tables(MagicMock())
+    pbixray_server.model_cache.get_table(loaded_model, "Sales")
+
+    result = json.loads(pbixray_server.unload_model(MagicMock()))
+    assert result["unloaded"] == "sales.pbix"
+    assert loaded_model.closed
+    assert pbixray_server.active_model() is None
+    assert pbixray_server.model_cache.stats()["tables"] == []
+    assert pbixray_server.response_cache.stats()["entries"] == 0
+
+    assert pbixray_server.unload_model(MagicMock()) == "Error: No Power BI file loaded."
+    assert "No Power BI file loaded" in pbixray_server.get_tables(MagicMock())
+
+
+def test_clear_caches_keeps_the_model(loaded_model):
+    """Test that clearing caches closes comparison models but keeps the loaded one"""
+    comparison_model = memory_model("/path/to/other.pbix")
+    pbixray_server._comparison_models["other"] = comparison_model
+    pbixray_server.model_cache.get_table(loaded_model, "Sales")
+
+    result = json.loads(pbixray_server.clear_caches(MagicMock()))
+    assert result["cleared"]["decoded_tables"] == 1
+    assert result["cleared"]["comparison_models"] == 1
+    assert comparison_model.closed and not loaded_model.closed
+    assert pbixray_server.active_model() is loaded_model
+
+
+def test_models_in_use_are_closed_by_the_last_call(loaded_model):
+    """Test that models still pinned by running calls are closed when those calls finish"""
+    # A call that started before the unload still runs on the model
+    pbixray_server.pin_model(loaded_model)
+    pbixray_server.unload_model(MagicMock())
+    assert not loaded_model.closed
+    pbixray_server.unpin_model(loaded_model)
+    assert loaded_model.closed
+
+    # A running diff keeps its comparison model open through clear_caches
+    comparison_model = memory_model("/path/to/other.pbix")
+    pbixray_server._comparison_models["other"] = comparison_model
+    pbixray_server.pin_model(comparison_model)
+    pbixray_server.clear_caches(MagicMock())
+    assert not comparison_model.closed
+    pbixray_server.unpin_model(comparison_model)
+    assert comparison_model.closed
+    assert pbixray_server._model_pins == {} and pbixray_server._released_models == {}
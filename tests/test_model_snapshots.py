@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for swapping the loaded model of the PBIXRay MCP server while tools run
+
+Usage:
+    pytest -xvs tests/test_model_snapshots.py
+"""
+
+import os
+import json
+import pytest
+import asyncio
+import threading
+import pandas as pd
+from unittest.mock import patch
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+# Set by a test to hold model construction or table decoding until released
+gates = {}
+
+
+def gated_model(file_path):
+    """A model whose table holds the name of its file, loaded and decoded once the gates are released"""
+    name = os.path.basename(file_path)
+    if name in gates.get("load", {}):
+        gates["load"][name].wait(5)
+
+    def source():
+        if name in gates.get("decode", {}):
+            gates["decode"][name].wait(5)
+        return pd.DataFrame({"File": [name]})
+
+    return MockPBIXRay(file_path, tables={"Source": source}, name=name)
+
+
+@pytest.fixture
+def files(tmp_path):
+    for name in ("old.pbix", "new.pbix"):
+        (tmp_path / name).write_bytes(b"pbix")
+    pbixray_server.model_cache.clear()
+    pbixray_server.response_cache.clear()
+    gates.clear()
+    with patch("pbixray_server.PBIXRay", gated_model):
+        yield tmp_path
+    gates.clear()
+    pbixray_server.select_model(None, None)
+
+
+def test_running_call_keeps_its_model(files, make_context):
+    """Test that a call started before a load finishes on the model it started with"""
+
+    async def scenario():
+        await pbixray_server.load_pbix_file(str(files / "old.pbix"), make_context())
+        decoding = threading.Event()
+        gates["decode"] = {"old.pbix": decoding}
+
+        running = asyncio.create_task(pbixray_server.get_table_contents(make_context(), table_name="Source"))
+        await asyncio.sleep(0.05)
+        assert "Success" in await pbixray_server.load_pbix_file(str(files / "new.pbix"), make_context())
+        decoding.set()
+
+        old = json.loads(await running)
+        new = json.loads(await pbixray_server.get_table_contents(make_context(), table_name="Source"))
+        return old, new
+
+    old, new = asyncio.run(scenario())
+    assert old["data"] == [{"File": "old.pbix"}]
+    assert new["data"] == [{"File": "new.pbix"}]
+    assert pbixray_server.active_model_path().endswith("new.pbix")
+
+
+def test_calls_run_while_a_file_loads(files, make_context):
+    """Test that the previous model keeps answering until the new one is published"""
+
+    async def scenario():
+        await pbixray_server.load_pbix_file(str(files / "old.pbix"), make_context())
+        loading = threading.Event()
+        gates["load"] = {"new.pbix": loading}
+
+        load = asyncio.create_task(pbixray_server.load_pbix_file(str(files / "new.pbix"), make_context()))
+        await asyncio.sleep(0.05)
+        during = await pbixray_server.get_table_contents(make_context(), table_name="Source")
+        loading.set()
+        await load
+        return json.loads(during)
+
+    during = asyncio.run(scenario())
+    assert during["data"] == [{"File": "old.pbix"}]
+    assert pbixray_server.active_model().name == "new.pbix"
+
+
+def test_select_model_publishes_snapshots():
+    """Test that a model and its path are published and read as one snapshot"""
+    model = gated_model("/path/to/sales.pbix")
+    try:
+        previous = pbixray_server.select_model(model, "/path/to/sales.pbix")
+        assert previous == pbixray_server.NO_MODEL
+        assert pbixray_server.current_snapshot() == pbixray_server.ModelSnapshot(model, "/path/to/sales.pbix")
+        assert pbixray_server.active_model() is model
+    finally:
+        pbixray_server.select_model(None, None)
+    assert pbixray_server.current_snapshot() == pbixray_server.NO_MODEL
+
+
+def test_pinned_models_are_in_use(files, make_context):
+    """Test that a model replaced while a call runs on it stays in use until the call finishes"""
+
+    async def scenario():
+        await pbixray_server.load_pbix_file(str(files / "old.pbix"), make_context())
+        old_model = pbixray_server.active_model()
+        decoding = threading.Event()
+        gates["decode"] = {"old.pbix": decoding}
+
+        running = asyncio.create_task(pbixray_server.get_table_contents(make_context(), table_name="Source"))
+        await asyncio.sleep(0.05)
+        pbixray_server.select_model(None, None)
+        during = pbixray_server.model_in_use(old_model)
+        decoding.set()
+        await running
+        return during, pbixray_server.model_in_use(old_model)
+
+    during, after = asyncio.run(scenario())
+    assert during and not after
+    assert pbixray_server._model_pins == {}
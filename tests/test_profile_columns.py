@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the profile_columns tool in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_profile_columns.py
+"""
+
+import json
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+
+def sales():
+    return pd.DataFrame(
+        {
+            "amount": [1.0, 2.0, 3.0, 4.0, np.nan],
+            "region": ["north", "north", "south", None, "north"],
+            "order_date": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"]),
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_profile_columns_statistics(make_context):
+    """Test the statistics computed for numeric, text and date columns"""
+    mock_context = make_context()
+    pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix", {"Sales": sales}), None)
+
+    result = await pbixray_server.profile_columns(mock_context, table_name="Sales", bins=3)
+    profiles = json.loads(result)["columns"]
+
+    amount = profiles["amount"]
+    assert amount["null_count"] == 1
+    assert amount["distinct_count"] == 4
+    assert amount["min"] == 1.0 and amount["max"] == 4.0
+    assert amount["mean"] == 2.5
+    assert amount["quantiles"]["p50"] == 2.5
+    assert sum(bucket["count"] for bucket in amount["histogram"]) == 4
+
+    region = profiles["region"]
+    assert region["null_count"] == 1
+    assert region["top_values"][0] == {"value": "north", "count": 3}
+
+    order_date = profiles["order_date"]
+    assert order_date["min"].startswith("2024-01-01")
+    assert order_date["max"].startswith("2024-01-05")
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_profile_columns_cached(make_context):
+    """Test that profiles are computed from a single decode and reused"""
+    mock_context = make_context()
+    model = MockPBIXRay("/path/to/test.pbix", {"Sales": sales})
+    pbixray_server.select_model(model, None)
+
+    with patch("pbixray_server.profile_series", wraps=pbixray_server.profile_series) as spy:
+        first = await pbixray_server.profile_columns(mock_context, table_name="Sales", columns="amount,region")
+        second = await pbixray_server.profile_columns(mock_context, table_name="Sales", columns="amount")
+
+    assert spy.call_count == 2, "Each column should be profiled only once"
+    assert json.loads(first)["columns"]["amount"] == json.loads(second)["columns"]["amount"]
+    assert model.decode_calls == 1
+
+    result = await pbixray_server.profile_columns(mock_context, table_name="Sales", columns="missing")
+    assert "Column 'missing' not found" in result
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_profile_columns_decodes_only_selected_columns(make_context):
+    """Test that profiling some columns decodes only those columns, and unknown columns decode nothing"""
+    mock_context = make_context()
+    model = MockPBIXRay("/path/to/test.pbix", {"Sales": sales}, schema=True, projecting=True)
+    pbixray_server.select_model(model, None)
+
+    result = json.loads(await pbixray_server.profile_columns(mock_context, table_name="Sales", columns="amount, region"))
+    assert list(result["columns"]) == ["amount", "region"]
+    assert result["columns"]["region"]["top_values"][0] == {"value": "north", "count": 3}
+
+    result = await pbixray_server.profile_columns(mock_context, table_name="Sales", columns="amount,missing")
+    assert "Column 'missing' not found" in result
+    assert model.decoded == [["amount", "region"]]
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+def test_profile_infinite_values():
+    """Test that infinite values are counted apart and kept out of quantiles and histogram"""
+    series = pd.Series([1.0, 2.0, np.inf, -np.inf, 3.0, np.nan])
+    profile = pbixray_server.profile_series(series, bins=2)
+
+    assert profile["null_count"] == 1
+    assert profile["non_finite_count"] == 2
+    assert profile["min"] == 1.0 and profile["max"] == 3.0
+    assert profile["quantiles"]["p50"] == 2.0
+    assert sum(bucket["count"] for bucket in profile["histogram"]) == 3
+    assert {"value": "inf", "count": 1} in profile["top_values"]
+
+    # The profile serializes to standard JSON
+    json.loads(json.dumps(profile, cls=pbixray_server.NumpyEncoder, allow_nan=False))
+
+    only_infinite = pbixray_server.profile_series(pd.Series([np.inf, -np.inf]))
+    assert only_infinite["non_finite_count"] == 2
+    assert "histogram" not in only_infinite
+
+
+def test_profile_timezone_aware_dates():
+    """Test that timezone-aware datetime columns are profiled as UTC"""
+    series = pd.Series(pd.to_datetime(["2024-01-01 01:00", "2024-01-03 01:00"]).tz_localize("Europe/Berlin"))
+    profile = pbixray_server.profile_series(series, bins=2)
+
+    assert profile["min"] == pd.Timestamp("2024-01-01 00:00")
+    assert profile["max"] == pd.Timestamp("2024-01-03 00:00")
+    assert sum(bucket["count"] for bucket in profile["histogram"]) == 2
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the tool call profiler of the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_profiling.py
+"""
+
+import os
+import json
+import pytest
+import pstats
+from unittest.mock import MagicMock
+
+import pbixray_server
+from tests.mock_pbixray import sales_model
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    pbixray_server.tool_profiler.configure(output_dir=str(tmp_path), tools=[], threshold=0.0, format="collapsed")
+    pbixray_server.response_cache.clear()
+    pbixray_server.model_cache.clear()
+    pbixray_server.select_model(sales_model("/path/to/sales.pbix", delay=0.1), None)
+    yield tmp_path
+    pbixray_server.tool_profiler.configure(enabled=False)
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_collapsed_profile_of_worker_threads(profile_dir, make_context):
+    """Test that the sampler captures the worker thread stacks of a selected tool"""
+    settings = json.loads(pbixray_server.set_profiling(MagicMock(), enabled=True, tools="get_table_contents"))
+    assert settings["tools"] == ["get_table_contents"]
+
+    await pbixray_server.count_rows(make_context(), table_name="Sales")
+    assert os.listdir(profile_dir) == []
+
+    pbixray_server.model_cache.clear()
+    await pbixray_server.get_table_contents(make_context(), table_name="Sales")
+    [name] = os.listdir(profile_dir)
+    assert name.startswith("get_table_contents-") and name.endswith(".collapsed")
+
+    lines = (profile_dir / name).read_text().splitlines()
+    assert any("get_table (mock_pbixray.py:" in line for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) >= 1 and ";" in stack
+
+
+@pytest.mark.asyncio
+async def test_pstats_profile_and_threshold(profile_dir, make_context):
+    """Test the pstats format and that fast calls are discarded"""
+    pbixray_server.set_profiling(MagicMock(), enabled=True, tools="all", threshold_seconds=0.05, format="pstats")
+
+    pbixray_server.get_tables(MagicMock())
+    assert os.listdir(profile_dir) == []
+
+    await pbixray_server.get_table_contents(make_context(), table_name="Sales")
+    [name] = os.listdir(profile_dir)
+    assert name.endswith(".pstats")
+    functions = {function for _, _, function in pstats.Stats(str(profile_dir / name)).stats}
+    assert "get_table" in functions
+
+
+def test_invalid_settings():
+    """Test that invalid settings are rejected"""
+    assert pbixray_server.set_profiling(MagicMock(), enabled=True, format="svg").startswith("Error")
+    assert pbixray_server.set_profiling(MagicMock(), enabled=True, threshold_seconds=-1).startswith("Error")
+    assert json.loads(pbixray_server.set_profiling(MagicMock(), enabled=False))["enabled"] is False
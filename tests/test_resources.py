@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pbix:// model resources of the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_resources.py
+"""
+
+import json
+import pytest
+import pandas as pd
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+
+def make_model():
+    """A model with two tables, which records how often the schema and tables are read"""
+    sales = pd.DataFrame({"OrderID": list(range(1, 6)), "Amount": [10.0, 20.0, 30.0, 40.0, 50.0]})
+    schema = pd.DataFrame(
+        {"TableName": ["Sales", "Sales"], "ColumnName": ["OrderID", "Amount"], "DataType": ["Int64", "Double"]}
+    )
+    return MockPBIXRay("/path/to/test.pbix", {"Sales": sales, "Sales Targets": sales}, schema=schema)
+
+
+async def read(uri):
+    """Read a resource through the MCP server and parse its JSON payload"""
+    [contents] = list(await pbixray_server.mcp.read_resource(uri))
+    assert contents.mime_type == "application/json"
+    return json.loads(contents.content)
+
+
+@pytest.mark.asyncio
+async def test_model_resources_are_content_addressed():
+    """Test the resource index, artifact payloads, ETags and server-side memoization"""
+    model = make_model()
+    pbixray_server.select_model(model, None)
+    fingerprint = pbixray_server.get_model_fingerprint(model)
+
+    index = await read("pbix://model")
+    assert index["fingerprint"] == fingerprint
+    assert f"pbix://{fingerprint}/schema" in index["resources"]
+    assert f"pbix://{fingerprint}/tables/Sales%20Targets" in index["resources"]
+
+    first = await read(f"pbix://{fingerprint}/schema")
+    second = await read(f"pbix://{fingerprint}/schema")
+    assert first == second
+    assert first["uri"] == f"pbix://{fingerprint}/schema"
+    assert first["etag"].startswith(f'"{fingerprint}-')
+    assert [column["ColumnName"] for column in first["content"]] == ["OrderID", "Amount"]
+    # The payload is serialized once per model
+    assert model.schema_reads == 1
+
+    tables = await read(f"pbix://{fingerprint}/tables")
+    assert tables["content"] == ["Sales", "Sales Targets"]
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_table_page_resources():
+    """Test paging through table rows and next-page links"""
+    pbixray_server.response_cache.clear()
+    model = make_model()
+    pbixray_server.select_model(model, None)
+    fingerprint = pbixray_server.get_model_fingerprint(model)
+
+    page = await read(f"pbix://{fingerprint}/tables/Sales?page=2&page_size=2")
+    assert page["content"]["pagination"]["total_pages"] == 3
+    assert [row["OrderID"] for row in page["content"]["data"]] == [3, 4]
+    assert page["content"]["next"] == f"pbix://{fingerprint}/tables/Sales?page=3&page_size=2"
+
+    last = await read(page["content"]["next"])
+    assert [row["OrderID"] for row in last["content"]["data"]] == [5]
+    assert last["content"]["next"] is None
+    assert last["etag"] != page["etag"]
+    assert model.decode_calls == 1
+
+    # Pages go to the bounded response cache, not to the artifacts kept for the model
+    assert len([key for key in pbixray_server.response_cache._entries if key[0] == "resource"]) == 2
+    with pbixray_server.model_cache._lock:
+        artifacts = pbixray_server.model_cache._state(model).artifacts
+        assert not [key for key in artifacts if key[0] == "resource"]
+    again = await read(f"pbix://{fingerprint}/tables/Sales?page=2&page_size=2")
+    assert again == page
+
+    with pytest.raises(Exception, match="Page 4 does not exist"):
+        await read(f"pbix://{fingerprint}/tables/Sales?page=4&page_size=2")
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_stale_and_unknown_resources():
+    """Test that URIs of another model and unknown artifacts are rejected"""
+    pbixray_server.select_model(make_model(), None)
+
+    with pytest.raises(Exception, match="is not loaded"):
+        await read("pbix://0123456789abcdef/schema")
+
+    fingerprint = pbixray_server.get_model_fingerprint(pbixray_server.active_model())
+    with pytest.raises(Exception, match="Unknown artifact 'visuals'"):
+        await read(f"pbix://{fingerprint}/visuals")
+
+    # Clean up
+    pbixray_server.select_model(None, None)
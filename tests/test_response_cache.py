@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the tool response cache of the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_response_cache.py
+"""
+
+import json
+import asyncio
+import pytest
+import pandas as pd
+from unittest.mock import patch, MagicMock
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+
+def sales_model(file_path):
+    """A model with one table, which counts its schema reads"""
+    return MockPBIXRay(
+        file_path,
+        {"Sales": pd.DataFrame({"OrderDate": pd.to_datetime(["2024-01-01", "2024-02-01"]), "Amount": [1.0, 2.0]})},
+        schema=pd.DataFrame(
+            {"TableName": ["Sales", "Sales"], "ColumnName": ["OrderDate", "Amount"], "DataType": ["DateTime", "Double"]}
+        ),
+    )
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    pbixray_server.response_cache.clear()
+    pbixray_server.response_cache.configure(max_entries=256, max_bytes=64 * 1024 * 1024)
+    pbixray_server.response_cache.hits = pbixray_server.response_cache.misses = 0
+    yield
+    pbixray_server.response_cache.clear()
+    pbixray_server.select_model(None, None)
+
+
+def test_repeated_calls_are_served_from_cache():
+    """Test that identical calls hit the cache and different arguments miss it"""
+    mock_context = MagicMock()
+    model = sales_model("/path/to/test.pbix")
+    pbixray_server.select_model(model, None)
+
+    first = pbixray_server.get_schema(mock_context, table_name="Sales")
+    # Keyword and positional spellings normalize to the same key
+    second = pbixray_server.get_schema(mock_context, "Sales")
+    assert first == second
+    assert model.schema_reads == 1
+
+    pbixray_server.get_schema(mock_context, table_name="Sales", column_name="Amount")
+    assert model.schema_reads == 2
+
+    stats = json.loads(pbixray_server.get_cache_stats(mock_context))["response_cache"]
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["hit_rate"] == pytest.approx(1 / 3, abs=1e-4)
+
+
+def test_cache_is_bound_to_the_loaded_model(tmp_path, make_context):
+    """Test that another model never gets a cached response, and loading clears the cache"""
+    mock_context = MagicMock()
+    (tmp_path / "third.pbix").write_bytes(b"pbix")
+
+    def load(file_path):
+        async def run():
+            return await pbixray_server.load_pbix_file(file_path, make_context())
+
+        return asyncio.run(run())
+
+    first_model = sales_model("/path/to/first.pbix")
+    pbixray_server.select_model(first_model, None)
+    pbixray_server.get_schema(mock_context)
+
+    second_model = sales_model("/path/to/second.pbix")
+    pbixray_server.select_model(second_model, None)
+    pbixray_server.get_schema(mock_context)
+    assert second_model.schema_reads == 1
+
+    assert load("/path/that/does/not/exist.pbix").startswith("Error: File")
+    assert pbixray_server.response_cache.stats()["entries"] == 2
+
+    with patch("pbixray_server.PBIXRay", sales_model):
+        assert load(str(tmp_path / "third.pbix")).startswith("Successfully loaded")
+    assert pbixray_server.response_cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_uncacheable_responses(make_context):
+    """Test that errors and relative-date filters are not cached"""
+    mock_context = make_context()
+    pbixray_server.select_model(sales_model("/path/to/test.pbix"), None)
+
+    result = await pbixray_server.count_rows(mock_context, table_name="Sales", filters="missing=1")
+    assert "not found" in result
+    await pbixray_server.count_rows(mock_context, table_name="Sales", filters="OrderDate>=today-30d")
+    assert pbixray_server.response_cache.stats()["entries"] == 0
+
+    await pbixray_server.count_rows(mock_context, table_name="Sales", filters="OrderDate>=2024-01-15")
+    assert pbixray_server.response_cache.stats()["entries"] == 1
+
+
+def test_lru_bounds():
+    """Test eviction by entry count and by size"""
+    cache = pbixray_server.ResponseCache(max_entries=2, max_bytes=10)
+    model = sales_model("/path/to/test.pbix")
+    cache.put("a", model, "1234")
+    cache.put("b", model, "1234")
+    assert cache.get("a", model) == "1234"
+    cache.put("c", model, "1234")
+    # "b" was least recently used
+    assert cache.get("b", model) is None
+    cache.put("d", model, "123456789")
+    assert cache.stats()["entries"] == 1 and cache.stats()["evictions"] == 3
+    # Responses larger than the whole cache are not stored
+    cache.put("e", model, "x" * 11)
+    assert cache.get("e", model) is None
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the sample_table tool in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_sample_table.py
+"""
+
+import json
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+import pbixray_server
+from tests.mock_pbixray import MockPBIXRay
+
+SALES_SCHEMA = pd.DataFrame(
+    {"TableName": ["Sales"] * 3, "ColumnName": ["id", "region", "amount"], "DataType": ["Int64", "String", "Double"]}
+)
+
+
+def orders():
+    return pd.DataFrame(
+        {
+            "id": list(range(1000)),
+            "region": ["north"] * 900 + ["south"] * 100,
+            "amount": [float(i % 50) for i in range(1000)],
+        }
+    )
+
+
+def orders_model(file_path, **options):
+    """A model with a Sales table large enough to sample from"""
+    return MockPBIXRay(file_path, tables={"Sales": orders}, **options)
+
+
+@pytest.mark.asyncio
+async def test_sample_table_seeded_is_reproducible(make_context):
+    """Test that the same seed returns the same rows"""
+    mock_context = make_context()
+    pbixray_server.select_model(orders_model("/path/to/test.pbix"), None)
+
+    first = json.loads(await pbixray_server.sample_table(mock_context, table_name="Sales", sample_size=10, seed=42))
+    second = json.loads(await pbixray_server.sample_table(mock_context, table_name="Sales", sample_size=10, seed=42))
+
+    assert first["data"] == second["data"]
+    assert first["sampling"]["sample_rows"] == 10
+    assert len({row["id"] for row in first["data"]}) == 10, "Rows should be drawn without replacement"
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_sample_table_stratified_with_filter_and_columns(make_context):
+    """Test stratified sampling combined with a filter and a column projection"""
+    mock_context = make_context()
+    pbixray_server.select_model(orders_model("/path/to/test.pbix"), None)
+
+    result = await pbixray_server.sample_table(
+        mock_context, table_name="Sales", sample_size=20, filters="amount<25", stratify_by="region", columns="id,region"
+    )
+    parsed = json.loads(result)
+
+    assert parsed["sampling"]["population_rows"] == 500
+    assert len(parsed["data"]) == 20
+    assert set(parsed["data"][0].keys()) == {"id", "region"}
+
+    # Strata are represented in proportion to their size (90% / 10%)
+    regions = [row["region"] for row in parsed["data"]]
+    assert regions.count("north") == 18
+    assert regions.count("south") == 2
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_sample_table_errors(make_context):
+    """Test error handling in sample_table"""
+    mock_context = make_context()
+    pbixray_server.select_model(orders_model("/path/to/test.pbix"), None)
+
+    result = await pbixray_server.sample_table(mock_context, table_name="Sales", stratify_by="missing")
+    assert "Column 'missing' not found" in result
+
+    result = await pbixray_server.sample_table(mock_context, table_name="Sales", sample_size=0)
+    assert "Sample size must be 1 or greater" in result
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_sample_table_limit_and_column_projection(make_context):
+    """Test that samples are capped by --max-sample-rows, not --max-rows, and decode only the needed columns"""
+    mock_context = make_context()
+    model = orders_model("/path/to/test.pbix", schema=SALES_SCHEMA, projecting=True)
+    pbixray_server.select_model(model, None)
+
+    with patch.object(pbixray_server, "MAX_ROWS", 10), patch.object(pbixray_server, "MAX_SAMPLE_ROWS", 100):
+        result = json.loads(
+            await pbixray_server.sample_table(
+                mock_context, table_name="Sales", sample_size=500, filters="amount<25", columns="id"
+            )
+        )
+    assert result["sampling"]["sample_rows"] == 100
+    assert set(result["data"][0]) == {"id"}
+    assert model.decoded == [["id", "amount"]]
+
+    # Clean up
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_sample_table_default_size(make_context):
+    """Test that the default sample size is --max-rows, and that --max-sample-rows caps every sample"""
+    mock_context = make_context()
+    pbixray_server.select_model(orders_model("/path/to/test.pbix"), None)
+
+    async def sample_rows(**arguments):
+        result = json.loads(await pbixray_server.sample_table(mock_context, table_name="Sales", seed=1, **arguments))
+        return result["sampling"]["sample_rows"]
+
+    with patch.object(pbixray_server, "MAX_ROWS", 10), patch.object(pbixray_server, "MAX_SAMPLE_ROWS", 50):
+        assert await sample_rows() == 10
+    with patch.object(pbixray_server, "MAX_ROWS", 1000), patch.object(pbixray_server, "MAX_SAMPLE_ROWS", 50):
+        assert await sample_rows() == 50
+        assert await sample_rows(sample_size=500) == 50
+
+    # Clean up
+    pbixray_server.select_model(None, None)
@@ -129,12 +129,11 @@ async def test_load_pbix_file(pbix_file_path):
         assert "Successfully loaded" in result
 
         # Test that the model was loaded correctly
-        assert pbixray_server.current_model is not None
-        assert pbixray_server.current_model_path == str(pbix_file_path)
+        assert pbixray_server.active_model() is not None
+        assert pbixray_server.active_model_path() == str(pbix_file_path)
 
         # Clean up
-        pbixray_server.current_model = None
-        pbixray_server.current_model_path = None
+        pbixray_server.select_model(None, None)
     else:
         # Fall back to the mock approach if file is not found
         print(f"PBIX file not found: {pbix_file_path}, using mock approach")
@@ -151,21 +150,21 @@ def test_get_tables(pbix_file_path):
     # Create a mock Context
     mock_context = MagicMock()
 
-    if pbix_file_path.exists() and pbixray_server.current_model is None:
+    if pbix_file_path.exists() and pbixray_server.active_model() is None:
         # Use actual PBIX file (load it synchronously for this test)
         try:
             from pbixray import PBIXRay
 
-            pbixray_server.current_model = PBIXRay(str(pbix_file_path))
+            pbixray_server.select_model(PBIXRay(str(pbix_file_path)), str(pbix_file_path))
             using_real_file = True
             print(f"Using PBIX file for tables test: {pbix_file_path}")
         except Exception as e:
             print(f"Could not load PBIX file, using mock: {e}")
-            pbixray_server.current_model = MockPBIXRay("/path/to/test.pbix")
+            pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix"), None)
             using_real_file = False
     else:
         # Use mock
-        pbixray_server.current_model = MockPBIXRay("/path/to/test.pbix")
+        pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix"), None)
         using_real_file = False
 
     # Run the test
@@ -183,7 +182,7 @@ def test_get_tables(pbix_file_path):
         assert "Table2" in result
 
     # Clean up
-    pbixray_server.current_model = None
+    pbixray_server.select_model(None, None)
 
 
 def test_get_metadata(pbix_file_path):
@@ -191,19 +190,19 @@ def test_get_metadata(pbix_file_path):
     # Create a mock Context
     mock_context = MagicMock()
 
-    if pbix_file_path.exists() and pbixray_server.current_model is None:
+    if pbix_file_path.exists() and pbixray_server.active_model() is None:
         # Use actual PBIX file
         try:
             from pbixray import PBIXRay
 
-            pbixray_server.current_model = PBIXRay(str(pbix_file_path))
+            pbixray_server.select_model(PBIXRay(str(pbix_file_path)), str(pbix_file_path))
             using_real_file = True
         except Exception:
-            pbixray_server.current_model = MockPBIXRay("/path/to/test.pbix")
+            pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix"), None)
             using_real_file = False
     else:
         # Use mock
-        pbixray_server.current_model = MockPBIXRay("/path/to/test.pbix")
+        pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix"), None)
         using_real_file = False
 
     # This method wasn't modified to be async
@@ -216,7 +215,7 @@ def test_get_metadata(pbix_file_path):
         assert "version" in result
 
     # Clean up
-    pbixray_server.current_model = None
+    pbixray_server.select_model(None, None)
 
 
 def test_get_model_size(pbix_file_path):
@@ -224,19 +223,19 @@ def test_get_model_size(pbix_file_path):
     # Create a mock Context
     mock_context = MagicMock()
 
-    if pbix_file_path.exists() and pbixray_server.current_model is None:
+    if pbix_file_path.exists() and pbixray_server.active_model() is None:
         # Use actual PBIX file
         try:
             from pbixray import PBIXRay
 
-            pbixray_server.current_model = PBIXRay(str(pbix_file_path))
+            pbixray_server.select_model(PBIXRay(str(pbix_file_path)), str(pbix_file_path))
             using_real_file = True
         except Exception:
-            pbixray_server.current_model = MockPBIXRay("/path/to/test.pbix")
+            pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix"), None)
             using_real_file = False
     else:
         # Use mock
-        pbixray_server.current_model = MockPBIXRay("/path/to/test.pbix")
+        pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix"), None)
         using_real_file = False
 
     # This method wasn't modified to be async
@@ -249,7 +248,7 @@ def test_get_model_size(pbix_file_path):
         assert "1024 bytes" in result
 
     # Clean up
-    pbixray_server.current_model = None
+    pbixray_server.select_model(None, None)
 
 
 @pytest.mark.asyncio
@@ -292,8 +291,7 @@ async def test_get_table_contents(pbix_file_path):
     assert mock_context.report_progress.call_count >= 2, "Progress should be reported multiple times"
 
     # Clean up
-    pbixray_server.current_model = None
-    pbixray_server.current_model_path = None
+    pbixray_server.select_model(None, None)
 
 
 @pytest.mark.asyncio
@@ -306,13 +304,12 @@ async def test_get_model_summary(pbix_file_path):
     mock_context.report_progress = MagicMock(return_value=asyncio.Future())
     mock_context.report_progress.return_value.set_result(None)
 
-    if pbix_file_path.exists() and pbixray_server.current_model is None:
+    if pbix_file_path.exists() and pbixray_server.active_model() is None:
         # Load the actual PBIX file first
         await pbixray_server.load_pbix_file(str(pbix_file_path), mock_context)
     else:
         # Fall back to mock if PBIX file is not available
-        pbixray_server.current_model = MockPBIXRay("/path/to/test.pbix")
-        pbixray_server.current_model_path = "/path/to/test.pbix"
+        pbixray_server.select_model(MockPBIXRay("/path/to/test.pbix"), "/path/to/test.pbix")
 
     result = await pbixray_server.get_model_summary(mock_context)
     assert "file_path" in result
@@ -320,8 +317,7 @@ async def test_get_model_summary(pbix_file_path):
     assert "size_mb" in result
 
     # Clean up
-    pbixray_server.current_model = None
-    pbixray_server.current_model_path = None
+    pbixray_server.select_model(None, None)
 
 
 @pytest.mark.asyncio
@@ -348,8 +344,7 @@ async def test_large_file_handling(pbix_file_path):
         assert progress_call_count >= 2, f"Progress reported only {progress_call_count} times"
 
         # Verify the model was loaded correctly
-        assert pbixray_server.current_model is not None
+        assert pbixray_server.active_model() is not None
 
         # Clean up
-        pbixray_server.current_model = None
-        pbixray_server.current_model_path = None
+        pbixray_server.select_model(None, None)
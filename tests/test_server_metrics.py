@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the per-tool metrics of the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_server_metrics.py
+"""
+
+import json
+import pytest
+import urllib.request
+from unittest.mock import MagicMock
+
+import pbixray_server
+from server_metrics import Histogram, ToolMetrics, start_prometheus_server, write_prometheus_file
+from tests.mock_pbixray import sales_model
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    pbixray_server.tool_metrics.reset()
+    pbixray_server.response_cache.clear()
+    pbixray_server.model_cache.clear()
+    yield
+    pbixray_server.tool_metrics.reset()
+    pbixray_server.select_model(None, None)
+
+
+def test_histogram_quantiles():
+    """Test bucket counting and bucket-based quantiles"""
+    histogram = Histogram((1, 10, 100))
+    for value in (0.5, 5, 5, 50, 500):
+        histogram.observe(value)
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.quantile(0.5) == 10
+    assert histogram.quantile(0.8) == 100
+    # Values above the last bucket have no finite bound
+    assert histogram.quantile(1.0) == float("inf")
+    assert histogram.cumulative()[-1] == (float("inf"), 5)
+
+
+def test_slow_calls_show_in_quantiles():
+    """Test that a call slower than the last latency bucket is reported, not dropped"""
+    metrics = ToolMetrics()
+    metrics.record("get_table_contents", "sales.pbix", 0.02)
+    metrics.record("get_table_contents", "sales.pbix", 75.0)
+
+    latency = metrics.snapshot()[0]["latency_seconds"]
+    assert latency["p50"] == 0.025
+    assert latency["p95"] == latency["p99"] == ">60"
+    json.dumps(latency, allow_nan=False)
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_are_recorded(make_context):
+    """Test that latency, thread-pool time, rows, size and errors are recorded per tool and model"""
+    mock_context = make_context()
+    pbixray_server.select_model(sales_model("/path/to/sales.pbix"), "/path/to/sales.pbix")
+
+    result = await pbixray_server.get_table_contents(mock_context, table_name="Sales", filters="Region=East")
+    await pbixray_server.get_table_contents(mock_context, table_name="Sales", filters="Missing=1")
+
+    metrics = json.loads(pbixray_server.get_server_metrics(MagicMock(), tool_name="get_table_contents"))
+    [series] = metrics["tools"]
+    assert series["model"] == "sales.pbix"
+    assert series["calls"] == 2 and series["errors"] == 1
+    assert series["rows"]["count"] == 1 and series["rows"]["sum"] == 2
+    assert series["thread_seconds"]["count"] >= 1
+    assert series["response_bytes"]["sum"] >= len(result.encode("utf-8"))
+
+
+def test_exceptions_count_as_errors():
+    """Test that a tool raising an exception is recorded as an error"""
+
+    def failing_tool():
+        raise RuntimeError("boom")
+
+    wrapped = pbixray_server.measured_tool(failing_tool, "failing_tool")
+    with pytest.raises(RuntimeError):
+        wrapped()
+    [series] = pbixray_server.tool_metrics.snapshot("failing_tool")
+    assert series["model"] == "none" and series["errors"] == 1
+
+
+def test_prometheus_export(tmp_path):
+    """Test the text format, the file dump and the HTTP endpoint"""
+    metrics = ToolMetrics()
+    metrics.record("get_schema", 'odd "name".pbix', 0.02, response_bytes=2048, rows=None)
+
+    text = metrics.to_prometheus()
+    assert 'pbixray_tool_calls_total{tool="get_schema",model="odd \\"name\\".pbix"} 1' in text
+    assert 'pbixray_tool_latency_seconds_bucket{tool="get_schema",model="odd \\"name\\".pbix",le="0.025"} 1' in text
+    assert 'pbixray_tool_latency_seconds_bucket{tool="get_schema",model="odd \\"name\\".pbix",le="0.01"} 0' in text
+
+    path = tmp_path / "metrics.prom"
+    write_prometheus_file(metrics, str(path))
+    assert path.read_text() == text
+
+    server = start_prometheus_server(metrics, 0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+            assert response.read().decode("utf-8") == text
+    finally:
+        server.shutdown()
+
+
+def test_metrics_format_validation():
+    """Test that the tool rejects unknown formats"""
+    assert pbixray_server.get_server_metrics(MagicMock(), format="xml").startswith("Error")
+    assert pbixray_server.get_server_metrics(MagicMock(), format="prometheus").startswith("# HELP")
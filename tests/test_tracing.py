@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the tracing of tool calls in the PBIXRay MCP server
+
+Usage:
+    pytest -xvs tests/test_tracing.py
+"""
+
+import json
+import pytest
+
+import pbixray_server
+from server_tracing import Tracer
+from tests.mock_pbixray import sales_model
+
+
+def read_traces(path):
+    """Read the spans of every exported trace, keyed by span name"""
+    traces = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            [resource] = json.loads(line)["resourceSpans"]
+            [scope] = resource["scopeSpans"]
+            traces.append(scope["spans"])
+    return traces
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    pbixray_server.tracer.configure(str(path))
+    pbixray_server.response_cache.clear()
+    pbixray_server.model_cache.clear()
+    yield path
+    pbixray_server.tracer.configure(None)
+    pbixray_server.select_model(None, None)
+
+
+@pytest.mark.asyncio
+async def test_table_contents_stages_are_traced(trace_file, make_context):
+    """Test that a table read is traced through its stages and the trace ID is logged"""
+    mock_context = make_context()
+    pbixray_server.select_model(sales_model("/path/to/sales.pbix"), None)
+
+    await pbixray_server.get_table_contents(mock_context, table_name="Sales", filters="Region=East")
+
+    [spans] = read_traces(trace_file)
+    by_name = {span["name"]: span for span in spans}
+    root = by_name["tool/get_table_contents"]
+    assert "parentSpanId" not in root
+    assert {"decode", "filter", "slice", "serialize", "thread.wait", "thread.run"} <= set(by_name)
+    assert {span["traceId"] for span in spans} == {root["traceId"]}
+    assert by_name["decode"]["parentSpanId"] == root["spanId"]
+    assert by_name["thread.run"]["parentSpanId"] in {by_name[stage]["spanId"] for stage in ("decode", "filter", "serialize")}
+    assert {"key": "rows", "value": {"intValue": "2"}} in root["attributes"]
+
+    logged = [call.args[0] for call in mock_context.info.call_args_list]
+    assert f"Trace ID for get_table_contents: {root['traceId']}" in logged
+
+
+@pytest.mark.asyncio
+async def test_errors_are_marked_on_the_span(trace_file, make_context):
+    """Test that an error response marks the root span as failed"""
+    pbixray_server.select_model(sales_model("/path/to/sales.pbix"), None)
+
+    await pbixray_server.get_table_contents(make_context(), table_name="Sales", filters="Missing=1")
+
+    [spans] = read_traces(trace_file)
+    root = next(span for span in spans if span["name"] == "tool/get_table_contents")
+    assert root["status"]["code"] == 2
+    assert "Missing" in root["status"]["message"]
+
+
+def test_disabled_tracer_records_nothing(tmp_path):
+    """Test that spans are free when no trace file is configured"""
+    tracer = Tracer()
+    with tracer.span("work") as span:
+        assert span is None
+    assert tracer.add_span("thread.run", 0, 1) is None
+
+    tracer.configure(str(tmp_path / "traces.jsonl"))
+    with pytest.raises(ValueError):
+        with tracer.span("work"):
+            raise ValueError("boom")
+    [[span]] = read_traces(tmp_path / "traces.jsonl")
+    assert span["status"] == {"code": 2, "message": "ValueError: boom"}